@@ -1,6 +1,7 @@
 #include "esp_camera.h"
 #include <Wire.h>
 #include <LiquidCrystal_I2C.h>
+#include "esp_rom_crc.h"
 #define SDA 14
 #define SCL 15
 // --- I2C LCD Configuration ---
@@ -80,6 +81,25 @@ void setup() {
   Serial.println("ESP32-CAM Ready. Waiting for command...");
 }
 
+// --- Framed image transfer (CAPTUREF) ---
+// magic A5 5A C3 3C | seq u16 | length u32 | header CRC u16 | JPEG | CRC-32
+// Lets the host resync after noise or a dropped byte (see esp_cam/framing.py)
+uint16_t frameSeq = 0;
+
+void sendFramed(const uint8_t *buf, uint32_t len) {
+  uint8_t header[12] = {0xA5, 0x5A, 0xC3, 0x3C};
+  memcpy(header + 4, &frameSeq, 2);
+  memcpy(header + 6, &len, 4);
+  uint16_t headerCrc = esp_rom_crc32_le(0, header + 4, 6) & 0xFFFF;
+  memcpy(header + 10, &headerCrc, 2);
+  uint32_t crc = esp_rom_crc32_le(0, buf, len);
+
+  Serial.write(header, sizeof(header));
+  Serial.write(buf, len);
+  Serial.write((uint8_t *)&crc, 4);
+  frameSeq++;
+}
+
 void loop() {
   // === Handle Image Capture ===
 
@@ -87,8 +107,8 @@ void loop() {
   if (Serial.available()) {
     String command = Serial.readStringUntil('\n');
 
-    // If host sends CAPTURE command
-    if (command == "CAPTURE") {
+    // If host sends CAPTURE (or framed CAPTUREF) command
+    if (command == "CAPTURE" || command == "CAPTUREF") {
       lcd.clear();
       lcd.setCursor(0, 0);
       lcd.print("Capturing...");
@@ -101,10 +121,14 @@ void loop() {
         return;
       }
 
-      // Send image length (4 bytes)
-      uint32_t len = fb->len;
-      Serial.write((uint8_t *)&len, 4);
-      Serial.write(fb->buf, fb->len);
+      if (command == "CAPTUREF") {
+        sendFramed(fb->buf, fb->len);
+      } else {
+        // Send image length (4 bytes)
+        uint32_t len = fb->len;
+        Serial.write((uint8_t *)&len, 4);
+        Serial.write(fb->buf, fb->len);
+      }
       esp_camera_fb_return(fb);
 
       //lcd.setCursor(0, 1);
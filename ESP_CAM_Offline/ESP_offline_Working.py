@@ -1,95 +1,98 @@
-import cv2
-import numpy as np
 import serial
 import time
-from collections import defaultdict
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import (CaptureAhead, Display, EventLog, Metrics, MjpegServer, ModelVariant, ResolutionScaler,
+                     SerialCamera, SerialWriter, TiledDetector, select_detector)
 
 # --- Serial Config ---
 ser = serial.Serial('COM9', 115200, timeout=10)
 time.sleep(2)
 
-# --- YOLO Parameters ---
-whT = 224 # low resolution (faster, less accurate)
-#whT = 320 medium resolution
-#whT = 416 high resolution (slower, more accurate)
-
-confThreshold = 0.3
-nmsThreshold = 0.3
-with open("coco.names", 'rt') as f:
-    classNames = f.read().rstrip('\n').split('\n')
-
-net = cv2.dnn.readNetFromDarknet("yolov3-tiny.cfg", "yolov3-tiny.weights") #works accurate with yolov3.cfg &yolov3.weights
-net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
-
-# --- Trigger ESP to capture ---
-def request_image():
-    ser.write(b"CAPTURE\n")
-    print("[Python] Sent: CAPTURE")
-
-# --- Receive image from ESP32 ---
-def receive_image():
-    length_bytes = ser.read(4)
-    if len(length_bytes) != 4:
-        print("Timeout or no data received")
-        return None
-
-    img_len = int.from_bytes(length_bytes, 'little')
-    print(f"[Python] Receiving {img_len} bytes...")
-    
-    img_data = bytearray()
-    while len(img_data) < img_len:
-        packet = ser.read(img_len - len(img_data))
-        if not packet:
-            break
-        img_data.extend(packet)
-
-    if len(img_data) != img_len:
-        print("Incomplete image")
-        return None
-    
-     # Decode the JPEG byte stream to OpenCV image
-    img_np = np.frombuffer(img_data, dtype=np.uint8)
-    img = cv2.imdecode(img_np, cv2.IMREAD_COLOR)
-    return img
+# --- Metrics: capture/transfer/decode/inference timings and error counters ---
+# useMetrics = False turns them off; metricsPort serves /metrics (Prometheus) on localhost
+useMetrics = True
+metricsPort = None  # e.g. 9100
+metrics = Metrics(enabled=useMetrics, log_interval=60)
+if metricsPort:
+    metrics.serve(metricsPort)
+
+# --- YOLO Detector ---
+# whT = 224 low resolution (faster, less accurate)
+# whT = 320 medium resolution
+# whT = 416 high resolution (slower, more accurate)
+# works accurate with yolov3.cfg & yolov3.weights
+#
+# Model choice: the variants below are listed most accurate first. At startup
+# each one whose files are present is timed, and the most accurate one that
+# fits latencyBudgetMs per frame is used (the fastest if none does). ONNX
+# variants need onnxruntime; FP16 needs OpenCV 4.7+.
+latencyBudgetMs = 400
+inferenceThreads = None  # None = library default (all cores)
+modelVariants = [
+    ModelVariant("yolov3", modelConfig="yolov3.cfg", modelWeights="yolov3.weights"),
+    ModelVariant("yolov3-fp16", modelConfig="yolov3.cfg", modelWeights="yolov3.weights", precision="fp16"),
+    ModelVariant("yolov3-int8-onnx", onnx="yolov3-int8.onnx", precision="int8"),
+    ModelVariant("yolov3-tiny", modelConfig="yolov3-tiny.cfg", modelWeights="yolov3-tiny.weights"),
+]
+detector = select_detector(modelVariants, latencyBudgetMs, classesfile="coco.names", whT=224,
+                           threads=inferenceThreads, confThreshold=0.3, nmsThreshold=0.3, metrics=metrics)
+
+# Tiled / ROI inference: more pixels per object for small objects. Every region
+# is one whT x whT input, so the cost is (number of regions) whole-frame passes.
+# tileMode = None   whole frame (as before)
+# tileMode = 'roi'  recommended: only the regions in rois, (x, y, w, h) in frame
+#                   pixels. One ROI on a quarter of the frame at whT=224 costs
+#                   ~0.3x a 416 pass and sees that quarter at ~448 resolution
+# tileMode = 'grid' overlapping tileGrid tiles over the whole frame, batched into
+#                   one forward pass. Not a saving: 2x2 at whT=224 costs ~1.16x
+#                   a 416 pass (4 x 224^2 vs 416^2) for ~400 effective resolution
+tileMode = None
+tileGrid = (2, 2)
+rois = [(0, 0, 160, 120)]  # top-left quarter of QVGA
+if tileMode is not None:
+    detector = TiledDetector(detector, rois=rois if tileMode == 'roi' else None, grid=tileGrid)
+
+dynamicWhT = True  # step whT down/up to keep detection near latencyBudgetMs (whole frame only)
+scaler = None
+if dynamicWhT and tileMode is None and detector.backend.input_size is None:
+    scaler = ResolutionScaler(detector, sizes=(224, 320, 416), target_ms=latencyBudgetMs)
+
+# --- ESP32-CAM on the serial CAPTURE protocol ---
+# framedProtocol: CAPTUREF frames with sync word, sequence number and CRC, so
+# boot noise or a dropped byte can't desync the link (needs the updated sketch)
+framedProtocol = False
+camera = SerialCamera(ser, framed=framedProtocol, metrics=metrics)
+
+# Capture-ahead: receive the next frame while this one is inferred. Off here
+# because the loop waits for a keypress, which would leave that frame stale.
+captureAhead = False
+ahead = CaptureAhead(camera).start() if captureAhead else None
+
+# --- LCD messages on their own thread, so the next capture never waits on the port ---
+# Every result is sent, repeats too: ESP_offline.ino shows "Capturing..." on each CAPTURE
+writer = SerialWriter(camera, suppress_repeats=False, metrics=metrics).start()
+
+# --- Display on its own thread; boxes are only drawn when the window shows them ---
+headless = False  # True: no window; capture every captureInterval s, not on a key
+captureInterval = 5
+display = Display("Detection", headless=headless).start()
+
+serverPort = None  # e.g. 8080: annotated frames as MJPEG on /stream, JPEG on /latest.jpg
+server = MjpegServer(display, port=serverPort).start() if serverPort else None
+
+# --- Detection event log (esp_cam.event_log) ---
+eventLog = None  # e.g. 'detections.evlog'
+cameraId = 0
+events = EventLog(eventLog) if eventLog else None
 
 # --- YOLO Object Detection ---
 def detect_and_count(img):
-    blob = cv2.dnn.blobFromImage(img, 1 / 255, (whT, whT), [0, 0, 0], 1, crop=False)
-    net.setInput(blob)
-    layernames = net.getLayerNames()
-    outputNames = [layernames[i - 1] for i in net.getUnconnectedOutLayers()]
-    outputs = net.forward(outputNames)
-
-    hT, wT, _ = img.shape
-    bbox, classIds, confs = [], [], []
-
-    for output in outputs:
-        for det in output:
-            scores = det[5:]
-            classId = np.argmax(scores)
-            confidence = scores[classId]
-            if confidence > confThreshold:
-                w, h = int(det[2] * wT), int(det[3] * hT)
-                x, y = int(det[0] * wT - w / 2), int(det[1] * hT - h / 2)
-                bbox.append([x, y, w, h])
-                classIds.append(classId)
-                confs.append(float(confidence))
-
-    indices = cv2.dnn.NMSBoxes(bbox, confs, confThreshold, nmsThreshold)
-    count_dict = defaultdict(int)
-
-    # Draw results and count objects
-    if len(indices) > 0:
-        for i in indices.flatten():
-            label = classNames[classIds[i]]
-            count_dict[label] += 1
-            x, y, w, h = bbox[i]
-            cv2.rectangle(img, (x, y), (x+w, y+h), (255, 0, 255), 2)
-            cv2.putText(img, f"{label} {count_dict[label]}", (x, y - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
-
-    return img, count_dict
+    detections = scaler.detect(img) if scaler else detector.detect(img)
+    if events:
+        events.record(detections, cameraId)
+    return detections, detections.counts()
 
 # --- Send detection result back to ESP32 ---
 def send_result(count_dict):
@@ -98,42 +101,47 @@ def send_result(count_dict):
         return
 
     msg = ",".join([f"{k}:{v}" for k, v in count_dict.items()])
-    framed = f"<{msg}>"
-    print(f"[Python] Sending to ESP: {framed}")
-    ser.write(framed.encode())
+    writer.send(f"<{msg}>")
 
 # --- Main Loop ---
-'''while True:
-    input("Press Enter to trigger image capture...")
-    request_image()
-    img = receive_image()
-    if img is None:
-        continue
-
-    result_img, counts = detect_and_count(img)
-    send_result(counts)
-
-    cv2.imshow("Detection", result_img)
-    if cv2.waitKey(0) & 0xFF == ord('q'):
-        break'''
-
+waiting = False
 while True:
-    print("Capturing new image...")
-    request_image()
-    img = receive_image()
-    if img is None:
+    if not waiting:
+        print("Capturing new image...")
+        waiting = True
+    frame = ahead.get(timeout=0.5) if ahead else camera.capture()  # keep checking for 'q' meanwhile
+    if frame is None:
+        if display.key() == ord('q'):
+            break
         continue
+    waiting = False
+    img = frame.image
 
-    result_img, counts = detect_and_count(img)
+    detections, counts = detect_and_count(img)
+    print(f"[Python] Frame #{frame.seq} captured {time.time() - frame.captured_at:.2f}s ago")
     send_result(counts)
+    metrics.maybe_log()
 
-    cv2.imshow("Detection", result_img)
+    display.show(img, detections)
+    if headless:
+        print(f"Next capture in {captureInterval}s...")
+        display.wait_key(captureInterval)
+        continue
+    # Blocks this loop only; the window keeps repainting on its own thread
     print("Press 'q' to quit or any other key to capture again...")
-    key = cv2.waitKey(0) & 0xFF
+    key = display.wait_key()
     if key == ord('q'):
         break
 
 # Cleanup
-cv2.destroyAllWindows()
+if ahead:
+    ahead.stop()
+writer.stop()
+print(f"[Serial] {writer.report()}")
+if events:
+    events.close()
+if server:
+    server.stop()
+display.stop()
 ser.close()
 
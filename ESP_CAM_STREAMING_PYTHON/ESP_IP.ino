@@ -52,6 +52,19 @@ void handleJpgMid()
   serveJpg();
 }
  
+void handleMjpeg()
+{
+  if (!esp32cam::Camera.changeResolution(hiRes)) {
+    Serial.println("SET-HI-RES FAIL");
+  }
+  Serial.println("STREAM BEGIN");
+  WiFiClient client = server.client();
+  auto startTime = millis();
+  int nFrames = esp32cam::Camera.streamMjpeg(client);
+  auto duration = millis() - startTime;
+  Serial.printf("STREAM END %dfrm %0.2ffps\n", nFrames, 1000.0 * nFrames / duration);
+}
+ 
  
 void  setup(){
   Serial.begin(115200);
@@ -78,10 +91,12 @@ void  setup(){
   Serial.println("  /cam-lo.jpg");
   Serial.println("  /cam-hi.jpg");
   Serial.println("  /cam-mid.jpg");
+  Serial.println("  /stream");
  
   server.on("/cam-lo.jpg", handleJpgLo);
   server.on("/cam-hi.jpg", handleJpgHi);
   server.on("/cam-mid.jpg", handleJpgMid);
+  server.on("/stream", handleMjpeg);
  
   server.begin();
 }
@@ -1,27 +1,39 @@
 import cv2
-import urllib.request
 import numpy as np
+import time
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import MjpegStream
  
-# Replace the URL with the IP camera's stream URL
-url = 'http://192.168.43.219/cam-hi.jpg'
+# Replace the URL with the IP camera's MJPEG stream URL (/stream in ESP_IP.ino)
+url = 'http://192.168.43.219/stream'
 cv2.namedWindow("live Cam Testing", cv2.WINDOW_AUTOSIZE)
  
  
-# Create a VideoCapture object
-cap = cv2.VideoCapture(url)
+# Open the multipart MJPEG stream: one HTTP request for every frame that follows
+stream = MjpegStream(url)
  
 # Check if the IP camera stream is opened successfully
-if not cap.isOpened():
-    print("Failed to open the IP camera stream")
+try:
+    stream.open()
+except Exception as e:
+    print(f"Failed to open the IP camera stream: {e}")
     exit()
  
 # Read and display video frames
 while True:
-    # Read a frame from the video stream
-    img_resp=urllib.request.urlopen(url)
-    imgnp=np.array(bytearray(img_resp.read()),dtype=np.uint8)
-    #ret, frame = cap.read()
+    # Read a frame from the video stream (reconnects if the stream dropped)
+    try:
+        frame = stream.read()
+    except Exception as e:
+        print(f"Stream error: {e}")
+        time.sleep(1)
+        continue
+    imgnp = np.frombuffer(frame.data, dtype=np.uint8)
     im = cv2.imdecode(imgnp,-1)
+    if im is None:
+        continue
  
     cv2.imshow('live Cam Testing',im)
     key=cv2.waitKey(5)
@@ -29,5 +41,5 @@ while True:
         break
     
  
-cap.release()
+stream.close()
 cv2.destroyAllWindows()
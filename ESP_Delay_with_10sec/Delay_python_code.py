@@ -1,18 +1,15 @@
-import cv2
-import numpy as np
 import urllib.request
-from collections import defaultdict
 import serial
 import time
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import (AdaptiveScheduler, Detector, Display, EventLog, FrameBuffer, Metrics, MjpegServer,
+                     ResolutionScaler, SceneGate, SerialWriter)
 
 # --- Setup ESP32-CAM snapshot URL ---
 url = 'http://172.30.91.79/snap'  # <-- Use the /snap endpoint for fresh capture
 
-# --- YOLO model parameters ---
-whT = 416
-confThreshold = 0.3
-nmsThreshold = 0.3
-
 # --- Setup serial communication ---
 try:
     ser = serial.Serial('COM9', 115200, timeout=10)
@@ -21,91 +18,109 @@ except Exception as e:
     print(f"Error opening serial port: {e}")
     ser = None
 
-# --- Load class names ---
-with open('coco.names', 'rt') as f:
-    classNames = f.read().rstrip('\n').split('\n')
+# --- Metrics: per-stage timings and error counters, logged every 5 minutes ---
+# useMetrics = False turns them off; metricsPort serves /metrics (Prometheus) on localhost
+useMetrics = True
+metricsPort = None  # e.g. 9100
+metrics = Metrics(enabled=useMetrics, log_interval=300)
+if metricsPort:
+    metrics.serve(metricsPort)
+
+# --- Load YOLOv3 model (class names, output layers and warm-up done once) ---
+detector = Detector(modelConfig='yolov3.cfg', modelWeights='yolov3.weights', classesfile='coco.names',
+                    whT=416, confThreshold=0.3, nmsThreshold=0.3, metrics=metrics)
+
+dynamicWhT = True  # step whT down/up to keep detection near whTTargetMs
+whTTargetMs = 1000
+scaler = ResolutionScaler(detector, sizes=(224, 320, 416), target_ms=whTTargetMs) if dynamicWhT else None
+detect = scaler.detect if scaler else detector.detect
+
+# --- Detection event log (esp_cam.event_log) ---
+eventLog = None  # e.g. 'detections.evlog'
+cameraId = 0
+events = EventLog(eventLog) if eventLog else None
+
+# --- Scene-change gate: reuse the last counts while the view looks the same ---
+gate = SceneGate(threshold=5.0, refresh_interval=300)
+
+# --- Capture schedule: faster while counts change, slower when stable, never over 50% CPU ---
+scheduler = AdaptiveScheduler(min_interval=2, max_interval=60, start_interval=10, cpu_budget=0.5)
 
-# --- Load YOLOv3-tiny model ---
-modelConfig = 'yolov3.cfg'
-modelWeights = 'yolov3.weights'
-net = cv2.dnn.readNetFromDarknet(modelConfig, modelWeights)
-net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+# --- Window on its own thread, so it stays responsive while we wait for the next capture ---
+headless = False  # True: no window and no box drawing
+display = Display('YOLO Detection', headless=headless, upper=True).start()
 
-# --- Track last sent detection ---
-last_sent = None
+serverPort = None  # e.g. 8080: annotated frames as MJPEG on /stream, JPEG on /latest.jpg
+server = MjpegServer(display, port=serverPort).start() if serverPort else None
+
+# --- JPEG bytes are read straight into one reused buffer ---
+frame_buffer = FrameBuffer()
+
+# --- Serial output on its own thread: newest message wins, repeats are not resent ---
+# At most one LCD update per lcdInterval seconds; a slow or unplugged port never holds up detection
+lcdInterval = 0.5
+writer = SerialWriter(ser, min_interval=lcdInterval, metrics=metrics).start() if ser else None
 
 def send_serial_data(count_dict):
-    global last_sent
-    if ser and ser.is_open and count_dict:
-        try:
-            serial_output = ",".join([f"{k}:{v}" for k, v in count_dict.items()])
-            if serial_output != last_sent:
-                framed_output = f"<{serial_output}>"
-                print(f"Sending to ESP32: {framed_output}")
-                ser.write(framed_output.encode())
-                ser.flush()
-                last_sent = serial_output
-        except Exception as e:
-            print(f"Error sending serial data: {e}")
-
-def findObject(outputs, im):
-    hT, wT, _ = im.shape
-    bbox, classIds, confs = [], [], []
-
-    for output in outputs:
-        for det in output:
-            scores = det[5:]
-            classId = np.argmax(scores)
-            confidence = scores[classId]
-            if confidence > confThreshold:
-                w, h = int(det[2]*wT), int(det[3]*hT)
-                x, y = int(det[0]*wT - w/2), int(det[1]*hT - h/2)
-                bbox.append([x, y, w, h])
-                classIds.append(classId)
-                confs.append(float(confidence))
-
-    indices = cv2.dnn.NMSBoxes(bbox, confs, confThreshold, nmsThreshold)
-    count_dict = defaultdict(int)
-
-    if len(indices) > 0:
-        for i in indices.flatten():
-            x, y, w, h = bbox[i]
-            label = classNames[classIds[i]]
-            count_dict[label] += 1
-            count_text = f"{label.upper()} {count_dict[label]}"
-            cv2.rectangle(im, (x, y), (x+w, y+h), (255, 0, 255), 2)
-            cv2.putText(im, count_text, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
+    if writer and count_dict:
+        serial_output = ",".join([f"{k}:{v}" for k, v in count_dict.items()])
+        writer.send(f"<{serial_output}>")
+
+def findObject(im, scale=1.0):
+    # Kept and logged in original frame pixels: the next frame may decode at another size
+    if gate.should_infer(im):
+        detections = detect(im).scaled(scale)
+        gate.update(im, detections)
+    else:
+        detections = gate.result
+        metrics.inc('skipped')
+        print(f"Scene unchanged, reusing last detection ({gate.skipped} skipped, {gate.inferred} run)")
+    if events:
+        events.record(detections, cameraId)
+    count_dict = detections.counts()
 
     if count_dict:
         print("Detected:")
         for label, count in count_dict.items():
             print(f"{label}: {count}")
         send_serial_data(count_dict)
+    return detections
 
 # --- Main loop ---
 while True:
+    # Wait for the next capture (replaces the fixed 10 second sleep); 'q' in the window quits at once
+    if display.wait_key(scheduler.remaining()) == ord('q'):
+        break
+    if not scheduler.due():
+        continue  # some other key
     try:
-        img_resp = urllib.request.urlopen(url, timeout=5)
-        imgnp = np.array(bytearray(img_resp.read()), dtype=np.uint8)
-        im = cv2.imdecode(imgnp, -1)
+        start = time.monotonic()
+        with metrics.time('fetch'):
+            img_resp = urllib.request.urlopen(url, timeout=5)
+            if not frame_buffer.fill_response(img_resp):
+                raise ValueError("Incomplete image received")
+        with metrics.time('decode'):
+            im, scale = frame_buffer.decode_reduced(detector.whT)
 
         if im is None:
             raise ValueError("Empty image received")
 
-        blob = cv2.dnn.blobFromImage(im, 1/255, (whT, whT), [0,0,0], 1, crop=False)
-        net.setInput(blob)
-        outputNames = [net.getLayerNames()[i - 1] for i in net.getUnconnectedOutLayers().flatten()]
-        outputs = net.forward(outputNames)
-
-        findObject(outputs, im)
-        cv2.imshow('YOLO Detection', im)
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-        time.sleep(10)  # Wait 10 seconds before next capture
+        detections = findObject(im, scale)
+        scheduler.record(time.monotonic() - start, detections.counts())
+        print(f"Next capture in {scheduler.remaining():.1f}s")
+        metrics.maybe_log()
+        display.show(im, detections.scaled(1 / scale))
 
     except Exception as e:
         print(f"Error: {e}")
-        time.sleep(10)
+        metrics.inc('timeouts' if isinstance(e, TimeoutError) else 'errors')
+        scheduler.record_error()
+
+if writer:
+    writer.stop()
+    print(f"[Serial] {writer.report()}")
+if events:
+    events.close()
+if server:
+    server.stop()
+display.stop()
@@ -0,0 +1,99 @@
+import cv2
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import (BatchingDetector, CameraPoller, Detector, EventLog, HttpCamera, InferencePool, LatestQueue,
+                     decode_reduced, draw_detections)
+
+# --- ESP32-CAM endpoints (name, URL, frames per second to poll) ---
+cameras = [
+    HttpCamera('shelf-1', 'http://192.168.108.79/cam-mid.jpg', fps=2),
+    HttpCamera('shelf-2', 'http://192.168.108.80/cam-lo.jpg', fps=2),
+    HttpCamera('shelf-3', 'http://172.30.91.79/snap', fps=0.5),
+]
+
+# --- YOLOv3 model settings ---
+modelConfig = 'yolov3.cfg'
+modelWeights = 'yolov3.weights'
+classesfile = 'coco.names'
+whT = 320
+
+# --- Frames arriving within maxWait of each other share one forward pass ---
+maxBatch = len(cameras)
+maxWait = 0.05  # seconds
+
+# --- Or: run inference in poolWorkers processes, one model each ---
+# For hosts with many cores and many cameras; frames are passed in shared memory
+useProcessPool = False
+poolWorkers = 4
+
+# A frame whose result takes longer than this is skipped, so a hung batch or
+# worker only costs frames, never the camera's polling thread
+inferenceTimeout = 10  # seconds
+
+# --- Detection event log (esp_cam.event_log) ---
+eventLog = None  # e.g. 'detections.evlog'; cameras are logged by index
+
+headless = False  # True: no windows and no box drawing
+
+
+def main():
+    # --- Load the model once (per pool worker when useProcessPool) ---
+    settings = dict(modelConfig=modelConfig, modelWeights=modelWeights, classesfile=classesfile,
+                    whT=whT, confThreshold=0.5, nmsThreshold=0.3)
+    if useProcessPool:
+        inference = InferencePool(workers=poolWorkers, **settings).start()
+    else:
+        inference = BatchingDetector(Detector(**settings), max_batch=maxBatch, max_wait=maxWait).start()
+
+    events = EventLog(eventLog) if eventLog else None
+    camera_ids = {camera.name: i for i, camera in enumerate(cameras)}
+
+    # --- Every camera polls on its own thread; newest results win ---
+    results = LatestQueue(maxsize=len(cameras))
+
+    def on_frame(frame):
+        # Runs on the camera's polling thread: decode here, infer in the batcher or pool
+        im, scale = decode_reduced(frame.data, whT)
+        if im is None:
+            print(f"[{frame.camera}] Could not decode frame #{frame.seq}")
+            return
+        try:
+            detections = inference.detect(im, timeout=inferenceTimeout)
+        except Exception as e:  # timed out, or the worker failed or died
+            print(f"[{frame.camera}] Inference failed on frame #{frame.seq}: {e!r}")
+            return
+        if events:
+            # Logged in original frame pixels; drawn below on the reduced image
+            events.record(detections.scaled(scale), camera_ids[frame.camera])
+        results.put((frame, im, detections))
+
+    poller = CameraPoller(cameras, on_frame)
+    poller.start()
+
+    # --- Main loop: only display here, inference runs on the poll and batcher threads ---
+    while True:
+        result = results.get(timeout=1)
+        if result is not None:
+            frame, im, detections = result
+            count_dict = detections.counts()
+            counts = ",".join([f"{k}:{v}" for k, v in count_dict.items()])
+            print(f"[{frame.camera} #{frame.seq}] {counts or 'nothing detected'}")
+
+            if not headless:
+                draw_detections(im, detections, text="{label} {n}", upper=True)
+                cv2.imshow(frame.camera, im)
+
+        if not headless and cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+    poller.stop()
+    inference.stop()
+    if events:
+        events.close()
+    cv2.destroyAllWindows()
+
+
+# Pool workers are spawned and re-import this file: only run from the command line
+if __name__ == '__main__':
+    main()
@@ -1,123 +1,91 @@
-import cv2
-import numpy as np
 import serial
 import time
-from collections import defaultdict
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import (AdaptiveScheduler, BaselineCounter, CaptureAhead, Detector, Display, EventLog, Metrics,
+                     MjpegServer, SceneGate, SerialCamera, SerialWriter)
 
 # --- Serial Configuration ---
 ser = serial.Serial('COM9', 115200, timeout=5)
 time.sleep(1)
 
-# --- YOLO Parameters ---
-whT = 224
-confThreshold = 0.3
-nmsThreshold = 0.3
+# --- Metrics: capture/transfer/decode/inference timings and error counters ---
+# useMetrics = False turns them off; metricsPort serves /metrics (Prometheus) on localhost
+useMetrics = True
+metricsPort = None  # e.g. 9100
+metrics = Metrics(enabled=useMetrics, log_interval=300)
+if metricsPort:
+    metrics.serve(metricsPort)
 
-# Load class names from COCO dataset
-with open("coco.names", 'rt') as f:
-    classNames = f.read().rstrip('\n').split('\n')
+# --- Load YOLOv3 model (class names, output layers and warm-up done once) ---
+detector = Detector(modelConfig="yolov3.cfg", modelWeights="yolov3.weights", classesfile="coco.names",
+                    whT=224, confThreshold=0.3, nmsThreshold=0.3, metrics=metrics)
 
-# Load YOLOv3 model
-net = cv2.dnn.readNetFromDarknet("yolov3.cfg", "yolov3.weights")
-net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
 
 
+# --- ESP32-CAM on the serial CAPTURE protocol ---
+# framedProtocol: CAPTUREF frames with sync word, sequence number and CRC, so
+# boot noise or a dropped byte can't desync the link (needs the updated sketch)
+framedProtocol = False
+camera = SerialCamera(ser, framed=framedProtocol, metrics=metrics)
 
-# --- Trigger ESP32 to Capture Image ---
-def request_image():
-    ser.write(b"CAPTURE\n")
-    print("[Python] Sent: CAPTURE")
-    
+# Capture mode: 'full' sends every frame at full quality (the old behaviour);
+# 'preview' streams small low-quality frames for the window and asks for a
+# full-quality frame only when a detection is due (needs the updated sketch,
+# which answers PREVIEW / PREVIEWF)
+captureMode = 'full'
+previewMode = captureMode == 'preview'
 
-# --- Receive Image from ESP32 (JPEG) ---
-def receive_image():
-    
-    length_bytes = ser.read(4)
-    if len(length_bytes) != 4:
-        print("[Error] Timeout or no data received")
-        return None
+# Capture-ahead: the next frame crosses the serial link while this one is inferred
+captureAhead = True
+ahead = CaptureAhead(camera, preview=previewMode).start() if captureAhead else None
 
-    img_len = int.from_bytes(length_bytes, 'little')
-    print(f"[Python] Receiving {img_len} bytes...")
+# --- LCD messages on their own thread: newest message wins, repeats are not resent ---
+# At most one LCD update per lcdInterval seconds, so results never wait on the port
+lcdInterval = 0.5
+writer = SerialWriter(camera, min_interval=lcdInterval, metrics=metrics).start()
 
-    img_data = bytearray()
-    while len(img_data) < img_len:
-        packet = ser.read(img_len - len(img_data))
-        if not packet:
-            break
-        img_data.extend(packet)
-
-    if len(img_data) != img_len:
-        print("[Error] Incomplete image received")
-        return None
+# --- Display on its own thread; boxes are only drawn when the window shows them ---
+headless = False  # True: no window and no box drawing
+display = Display("Live YOLO Detection", headless=headless, text="{label}").start()
 
-    img_np = np.frombuffer(img_data, dtype=np.uint8)
-    img = cv2.imdecode(img_np, cv2.IMREAD_COLOR)
-    return img
+serverPort = None  # e.g. 8080: annotated frames as MJPEG on /stream, JPEG on /latest.jpg
+server = MjpegServer(display, port=serverPort).start() if serverPort else None
 
 # --- YOLO Object Detection ---
 def detect_and_count(img):
-    blob = cv2.dnn.blobFromImage(img, 1/255, (whT, whT), [0, 0, 0], 1, crop=False)
-    net.setInput(blob)
-    layernames = net.getLayerNames()
-    outputNames = [layernames[i - 1] for i in net.getUnconnectedOutLayers()]
-    outputs = net.forward(outputNames)
-
-    hT, wT, _ = img.shape
-    bbox, classIds, confs = [], [], []
-    count_dict = defaultdict(int)
-
-    for output in outputs:
-        for det in output:
-            scores = det[5:]
-            classId = np.argmax(scores)
-            confidence = scores[classId]
-            if confidence > confThreshold:
-                w, h = int(det[2] * wT), int(det[3] * hT)
-                x, y = int(det[0] * wT - w / 2), int(det[1] * hT - h / 2)
-                bbox.append([x, y, w, h])
-                classIds.append(classId)
-                confs.append(float(confidence))
-
-    indices = cv2.dnn.NMSBoxes(bbox, confs, confThreshold, nmsThreshold)
-
-    for i in indices:
-        i = i[0] if isinstance(i, (list, tuple, np.ndarray)) else i
-        label = classNames[classIds[i]]
-        count_dict[label] += 1
-        x, y, w, h = bbox[i]
-        cv2.rectangle(img, (x, y), (x+w, y+h), (255, 0, 255), 2)
-        cv2.putText(img, f"{label}", (x, y - 10),
-                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
-
-    return img, count_dict
+    return detector.detect(img)
 
 # --- Baseline Storage ---
-baseline_counts = None
+# Counts are smoothed over the last countWindow results and a class is only
+# reported missing after missAfter results in a row below the baseline, so a
+# single missed detection no longer reaches the LCD.
+# baselinePolicy = 'first'    the first countWindow results are the reference until 'r'
+# baselinePolicy = 'previous' compare with the previous result
+baselinePolicy = 'first'
+countWindow = 5
+missAfter = 2
+baseline = BaselineCounter(detector.classNames, policy=baselinePolicy, window=countWindow,
+                           miss_after=missAfter, clear_after=missAfter)
 
 # --- Send Results to ESP32 for LCD Display ---
-def send_result(current_counts):
-    global baseline_counts
+def send_result(detections):
+    baseline_set = baseline.update(detections.class_ids)
+    current_counts = baseline.counts()
     detected_msg = ",".join([f"{k}:{v}" for k, v in current_counts.items()])
-    
-    if baseline_counts is None:
-        baseline_counts = current_counts.copy()
-        print("[Baseline] Stored as reference:", baseline_counts)
+
+    if baseline_set:
+        print("[Baseline] Stored as reference:", baseline.baseline_counts())
         if not detected_msg:
             msg = "No objects|Baseline Set"
         else:
             msg = f"{detected_msg}|Baseline Set"
+    elif baseline.results_to_baseline():
+        msg = f"{detected_msg or 'No objects'}|Baseline in {baseline.results_to_baseline()}"
     else:
-        missing = []
-        for obj in baseline_counts:
-            base_count = baseline_counts[obj]
-            curr_count = current_counts.get(obj, 0)
-            if curr_count < base_count:
-                missing.append(obj)
-
-        #detected_msg = ",".join([f"{k}:{v}" for k, v in current_counts.items()])
-        
+        missing = baseline.missing_labels()
+
         if missing:
             if not detected_msg:
                 msg = f"Missing: {','.join(missing)}|Nothing detected"
@@ -127,39 +95,78 @@ def send_result(current_counts):
             if not detected_msg:
                 msg = "No missing objects|Nothing detected"
             else:
-                msg = f"No missing objects|{detected_msg}" 
+                msg = f"No missing objects|{detected_msg}"
 
-    framed = f"<{msg}>"
-    print(f"[Python] Sending to ESP: {framed}")
-    ser.write(f"{framed}\n".encode())  #NEWLINE added for correct parsing
+    writer.send(f"<{msg}>\n")  #NEWLINE added for correct parsing
 
-# --- Main Loop ---
-last_detection_time = time.time()
-
-while True:
-    request_image()
-    img = receive_image()
-    if img is None:
-        continue
+# --- Detection event log (esp_cam.event_log) ---
+eventLog = None  # e.g. 'detections.evlog'
+cameraId = 0
+events = EventLog(eventLog) if eventLog else None
 
-    cv2.imshow("Live YOLO Detection", img)
+# --- Scene-change gate: reuse the last counts while the shelf looks the same ---
+gate = SceneGate(threshold=5.0, refresh_interval=300)
 
-    current_time = time.time()
-    if current_time - last_detection_time >= 20:
-        print("\n[Main] 20 seconds elapsed. Running object detection...")
-        result_img, counts = detect_and_count(img.copy())
-        send_result(counts)
-        cv2.imshow("Live YOLO Detection", result_img)
-        last_detection_time = current_time
+# --- Detection schedule: faster while counts change, slower when stable, never over 50% CPU ---
+# (first detection after 20 seconds, as before)
+scheduler = AdaptiveScheduler(min_interval=5, max_interval=120, start_interval=20, start_delay=20, cpu_budget=0.5)
 
-    key = cv2.waitKey(1) & 0xFF
+# --- Main Loop ---
+while True:
+    detection_due = scheduler.due()
+    if ahead:
+        if detection_due:
+            ahead.request_full()
+        frame = ahead.get(timeout=0.5)  # keep checking for 'q' while no frame arrives
+    else:
+        frame = camera.capture(preview=previewMode and not detection_due)
+    if frame is None:
+        if display.key() == ord('q'):
+            break
+        continue
+    img = frame.image
+
+    display.show(img)
+
+    # With capture-ahead the frame already in flight may still be a preview
+    if detection_due and not frame.preview:
+        start = time.monotonic()
+        if gate.should_infer(img):
+            print("\n[Main] Detection due. Running object detection...")
+            detections = detect_and_count(img)
+            gate.update(img, detections)
+            display.show(img, detections)
+        else:
+            detections = gate.result
+            metrics.inc('skipped')
+            print(f"\n[Main] Detection due. Scene unchanged, reusing last counts "
+                  f"({gate.skipped} skipped, {gate.inferred} run)")
+        if events:
+            events.record(detections, cameraId)
+        send_result(detections)
+        camera.stats.add_result(frame)
+        scheduler.record(time.monotonic() - start, detections.counts())
+        print(f"[Main] Next detection in {scheduler.remaining():.1f}s")
+        print(f"[Link] {camera.stats.report()}")
+        metrics.maybe_log()
+
+    key = display.key()
     if key == ord('q'):
         break
     if key == ord('r'):
-        baseline_counts = None
+        baseline.reset()
+        gate.reset()
         print("[Python] Baseline reset. Next detection will set new reference.")
 
-cv2.destroyAllWindows()
+if ahead:
+    ahead.stop()
+writer.stop()
+print(f"[Serial] {writer.report()}")
+if events:
+    events.close()
+if server:
+    server.stop()
+display.stop()
 ser.close()       
 
 
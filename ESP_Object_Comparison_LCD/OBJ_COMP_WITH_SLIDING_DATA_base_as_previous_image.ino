@@ -1,6 +1,7 @@
 #include "esp_camera.h"
 #include <Wire.h>
 #include <LiquidCrystal_I2C.h>
+#include "esp_rom_crc.h"
 camera_config_t config;
 
 #define SDA 14
@@ -82,14 +83,53 @@ void setup() {
   Serial.println("ESP32-CAM Ready. Waiting for command...");
 }
 
+// --- Framed image transfer (CAPTUREF) ---
+// magic A5 5A C3 3C | seq u16 | length u32 | header CRC u16 | JPEG | CRC-32
+// Lets the host resync after noise or a dropped byte (see esp_cam/framing.py)
+uint16_t frameSeq = 0;
+
+void sendFramed(const uint8_t *buf, uint32_t len) {
+  uint8_t header[12] = {0xA5, 0x5A, 0xC3, 0x3C};
+  memcpy(header + 4, &frameSeq, 2);
+  memcpy(header + 6, &len, 4);
+  uint16_t headerCrc = esp_rom_crc32_le(0, header + 4, 6) & 0xFFFF;
+  memcpy(header + 10, &headerCrc, 2);
+  uint32_t crc = esp_rom_crc32_le(0, buf, len);
+
+  Serial.write(header, sizeof(header));
+  Serial.write(buf, len);
+  Serial.write((uint8_t *)&crc, 4);
+  frameSeq++;
+}
+
+// --- Preview frames (PREVIEW / PREVIEWF) ---
+// Small, low-quality frames for the host's live window, so previews don't
+// hog the 115200 baud link; CAPTURE switches back to the full settings.
+#define PREVIEW_FRAME_SIZE   FRAMESIZE_QQVGA
+#define PREVIEW_JPEG_QUALITY 40
+bool previewActive = false;
+
+void setPreviewMode(bool preview) {
+  if (preview == previewActive) return;
+  sensor_t *s = esp_camera_sensor_get();
+  s->set_framesize(s, preview ? PREVIEW_FRAME_SIZE : FRAMESIZE_QVGA);
+  s->set_quality(s, preview ? PREVIEW_JPEG_QUALITY : 10);
+  // The buffered frame was taken with the old settings; drop it
+  camera_fb_t *stale = esp_camera_fb_get();
+  if (stale) esp_camera_fb_return(stale);
+  previewActive = preview;
+}
+
 void loop() {
   // === Handle Image Capture ===
   if (Serial.available()) {
     String command = Serial.readStringUntil('\n');
     command.trim();  // removes \r and extra whitespace
 
-    // If host sends CAPTURE command
-    if (command == "CAPTURE") {
+    // If host sends CAPTURE / PREVIEW (or framed CAPTUREF / PREVIEWF) command
+    if (command == "CAPTURE" || command == "CAPTUREF" ||
+        command == "PREVIEW" || command == "PREVIEWF") {
+      setPreviewMode(command.startsWith("PREVIEW"));
          
       //lcd.clear();
       //lcd.setCursor(0, 0);
@@ -103,10 +143,14 @@ void loop() {
         lcd.print("Capture Failed");
         return;
       }
-      // Send image length (4 bytes)
-      uint32_t len = fb->len;
-      Serial.write((uint8_t *)&len, 4);
-      Serial.write(fb->buf, fb->len); // Send JPEG buffer
+      if (command.endsWith("F")) {
+        sendFramed(fb->buf, fb->len);
+      } else {
+        // Send image length (4 bytes)
+        uint32_t len = fb->len;
+        Serial.write((uint8_t *)&len, 4);
+        Serial.write(fb->buf, fb->len); // Send JPEG buffer
+      }
       
       esp_camera_fb_return(fb);  // Return buffer so next capture is fresh
     } else if (command.startsWith("<") && command.endsWith(">")) {
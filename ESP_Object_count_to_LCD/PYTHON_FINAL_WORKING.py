@@ -1,19 +1,25 @@
-import cv2
-import numpy as np
 import urllib.request
-from collections import defaultdict
 import serial
 import time
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import (Detector, Display, EventLog, IouTracker, Metrics, MjpegServer, Pipeline, ResolutionScaler,
+                     SerialWriter, decode_reduced)
  
 # --- Setup ESP32-CAM snapshot URL ---
 url = 'http://192.168.108.79/cam-mid.jpg'  # Replace with your ESP32-CAM IP
 
+# Overlap fetch, decode and inference on separate threads (False = one frame at a time)
+usePipeline = True
+
+headless = False  # True: no window and no box drawing
+display = Display('YOLO Detection with Count', headless=headless, upper=True).start()
+
+serverPort = None  # e.g. 8080: annotated frames as MJPEG on /stream, JPEG on /latest.jpg
+server = MjpegServer(display, port=serverPort).start() if serverPort else None
+
 
- 
-#--- Setup YOLO model parameters ---
-whT = 320
-confThreshold = 0.5
-nmsThreshold = 0.3
  
 #--- Setup serial communication ---
 try:
@@ -26,65 +32,61 @@ except Exception as e:
     print(f"Error opening serial port: {e}")
     ser = None
  
-#--- Load class names ---
-classesfile = 'coco.names'
-with open(classesfile, 'rt') as f:
-    classNames = f.read().rstrip('\n').split('\n')
- 
-#--- Load YOLOv3 model ---
-modelConfig = 'yolov3.cfg'
-modelWeights = 'yolov3.weights'
-net = cv2.dnn.readNetFromDarknet(modelConfig, modelWeights)
-net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+#--- Metrics: per-stage timings and error counters, logged every 30 s ---
+# useMetrics = False turns them off; metricsPort serves /metrics (Prometheus) on localhost
+useMetrics = True
+metricsPort = None  # e.g. 9100
+metrics = Metrics(enabled=useMetrics, log_interval=30)
+if metricsPort:
+    metrics.serve(metricsPort)
+
+#--- Load YOLOv3 model (class names, output layers and warm-up done once) ---
+detector = Detector(modelConfig='yolov3.cfg', modelWeights='yolov3.weights', classesfile='coco.names',
+                    whT=320, confThreshold=0.5, nmsThreshold=0.3, metrics=metrics)
+
+dynamicWhT = True  # step whT down/up to keep detection near whTTargetMs
+whTTargetMs = 250
+scaler = ResolutionScaler(detector, sizes=(224, 320, 416), target_ms=whTTargetMs) if dynamicWhT else None
+detect = scaler.detect if scaler else detector.detect
+
+# Track objects between detector runs: YOLO runs every trackEvery frames (or
+# sooner when a track gets uncertain) and counts come from stable track IDs
+useTracker = True
+trackEvery = 5
+tracker = IouTracker(detect_every=trackEvery) if useTracker else None
  
+#--- Detection event log (esp_cam.event_log) ---
+eventLog = None  # e.g. 'detections.evlog'
+cameraId = 0
+events = EventLog(eventLog) if eventLog else None
+
+#--- Serial output on its own thread: newest message wins, repeats are not resent ---
+# Counts that flicker between frames are debounced, and the LCD gets at most
+# one update per lcdInterval seconds; a slow or unplugged port never holds up detection
+lcdInterval = 0.5
+writer = SerialWriter(ser, min_interval=lcdInterval, metrics=metrics).start() if ser else None
+
 #--- Function to send data via serial in <label:count,...> format ---
 def send_serial_data(count_dict):
-    if ser and ser.is_open and count_dict:
-        try:
-            serial_output = ",".join([f"{k}:{v}" for k, v in count_dict.items()])
-            framed_output = f"<{serial_output}>"  # Example: <person:2,car:1>
-            print(f"Sending to ESP32: {framed_output}")
-            ser.write(framed_output.encode())
-            ser.flush()
-        except Exception as e:
-            print(f"Error sending serial data: {e}")
+    if writer and count_dict:
+        serial_output = ",".join([f"{k}:{v}" for k, v in count_dict.items()])
+        writer.send(f"<{serial_output}>")  # Example: <person:2,car:1>
  
 #--- Object Detection Function ---
-def findObject(outputs, im):
-    hT, wT, cT = im.shape
-    bbox = []
-    classIds = []
-    confs = []
- 
-    for output in outputs:
-        for det in output:
-            scores = det[5:]
-            classId = np.argmax(scores)
-            confidence = scores[classId]
-            if confidence > confThreshold:
-                w, h = int(det[2] * wT), int(det[3] * hT)
-                x, y = int((det[0] * wT) - w / 2), int((det[1] * hT) - h / 2)
-                bbox.append([x, y, w, h])
-                classIds.append(classId)
-                confs.append(float(confidence))
- 
-    indices = cv2.dnn.NMSBoxes(bbox, confs, confThreshold, nmsThreshold)
- 
+def findObject(im, scale=1.0):
+    # Boxes in original frame pixels, whatever size im was decoded at
+    def detect_frame(img):
+        return detect(img).scaled(scale)
+
+    if tracker is not None:
+        detections = tracker.step(im, detect_frame)
+    else:
+        detections = detect_frame(im)
+    if events:
+        events.record(detections, cameraId)
+
     # Dictionary to count detected object types
-    count_dict = defaultdict(int)
- 
-    if len(indices) > 0:
-        indices = indices.flatten()
-        for i in indices:
-            box = bbox[i]
-            x, y, w, h = box
-            label = classNames[classIds[i]]
-            count_dict[label] += 1
-            count_text = f"{label.upper()} {count_dict[label]}"
-            cv2.rectangle(im, (x, y), (x + w, y + h), (255, 0, 255), 2)
-            cv2.putText(im, count_text, (x, y - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
+    count_dict = detections.counts()
  
     # Console Output + Serial Send
     if count_dict:
@@ -93,26 +95,50 @@ def findObject(outputs, im):
             print(f"{label}: {count}")
         print("-" * 30)
         send_serial_data(count_dict)
- 
-#--- Main loop ---
-while True:
-    try:
+    return detections
+
+#--- Pipeline stages (fetch, decode and inference overlap on separate threads) ---
+def fetch_frame():
+    with metrics.time('fetch'):
         img_resp = urllib.request.urlopen(url, timeout=5)
-        imgnp = np.array(bytearray(img_resp.read()), dtype=np.uint8)
-        im = cv2.imdecode(imgnp, -1)
+        return img_resp.read()
+
+def decode_frame(data):
+    # Decoded at 1/2, 1/4 or 1/8 size when that still covers whT
+    with metrics.time('decode'):
+        return decode_reduced(data, detector.whT)
+
+def infer_frame(decoded):
+    # Drawn on the reduced image, so its boxes go back to that size
+    im, scale = decoded
+    return im, findObject(im, scale).scaled(1 / scale)
 
-        blob = cv2.dnn.blobFromImage(im, 1 / 255, (whT, whT), [0, 0, 0], 1, crop=False)
-        net.setInput(blob)
-        layernames = net.getLayerNames()
-        outputNames = [layernames[i - 1] for i in net.getUnconnectedOutLayers()]
-        outputs = net.forward(outputNames)
+def show_frame(result):
+    # Annotation and imshow happen on the display thread, not here
+    display.show(*result)
+    metrics.maybe_log()
+    return display.key() != ord('q')
 
-        findObject(outputs, im)
+#--- Main loop ---
+if usePipeline:
+    Pipeline(fetch_frame, decode_frame, infer_frame, metrics=metrics).run(show_frame)
+else:
+    while True:
+        try:
+            decoded = decode_frame(fetch_frame())
 
-        cv2.imshow('YOLO Detection with Count', im)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            if not show_frame(infer_frame(decoded)):
+                break
 
-    except Exception as e:
-        print(f"Error fetching image or processing: {e}")
+        except Exception as e:
+            print(f"Error fetching image or processing: {e}")
+            metrics.inc('errors')
 
+if writer:
+    writer.stop()
+    print(f"[Serial] {writer.report()}")
+if events:
+    events.close()
+if server:
+    server.stop()
+display.stop()
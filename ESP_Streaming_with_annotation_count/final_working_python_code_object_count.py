@@ -1,68 +1,73 @@
-import cv2
-import numpy as np
 import urllib.request
-from collections import defaultdict
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import (Detector, Display, EventLog, IouTracker, Metrics, MjpegServer, MjpegStream, Pipeline,
+                     ResolutionScaler, decode_reduced)
 # import serial  # Uncomment if sending to Arduino via COM port
 
 # Set your ESP32-CAM snapshot URL here
 url = 'http://172.30.91.79/cam-hi.jpg'
   # Replace with your ESP32-CAM IP
 
-whT = 320
-confThreshold = 0.5
-nmsThreshold = 0.3
+# Optional MJPEG source (/stream in ESP_IP.ino): one request instead of one per frame
+streamUrl = 'http://172.30.91.79/stream'
+useStream = False
+
+# Overlap fetch, decode and inference on separate threads (False = one frame at a time)
+usePipeline = True
+
+headless = False  # True: no window and no box drawing
+display = Display('YOLO Detection with Count', headless=headless, upper=True).start()
+
+serverPort = None  # e.g. 8080: annotated frames as MJPEG on /stream, JPEG on /latest.jpg
+server = MjpegServer(display, port=serverPort).start() if serverPort else None
 
 # Setup serial communication (optional)
 #ser = serial.Serial('COM5', 9600, timeout=1)  # Replace with your COM port
 
-# Load class names
-classesfile = 'coco.names'
-with open(classesfile, 'rt') as f:
-    classNames = f.read().rstrip('\n').split('\n')
-
-# Load YOLOv3 model
-modelConfig = 'yolov3.cfg'
-modelWeights = 'yolov3.weights'
-net = cv2.dnn.readNetFromDarknet(modelConfig, modelWeights)
-net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
-
-def findObject(outputs, im):
-    hT, wT, cT = im.shape
-    bbox = []
-    classIds = []
-    confs = []
-
-    for output in outputs:
-        for det in output:
-            scores = det[5:]
-            classId = np.argmax(scores)
-            confidence = scores[classId]
-            if confidence > confThreshold:
-                w, h = int(det[2] * wT), int(det[3] * hT)
-                x, y = int((det[0] * wT) - w / 2), int((det[1] * hT) - h / 2)
-                bbox.append([x, y, w, h])
-                classIds.append(classId)
-                confs.append(float(confidence))
-
-    indices = cv2.dnn.NMSBoxes(bbox, confs, confThreshold, nmsThreshold)
+# Metrics: per-stage timings and error counters, logged every 30 s
+# useMetrics = False turns them off; metricsPort serves /metrics (Prometheus) on localhost
+useMetrics = True
+metricsPort = None  # e.g. 9100
+metrics = Metrics(enabled=useMetrics, log_interval=30)
+if metricsPort:
+    metrics.serve(metricsPort)
+
+# Load YOLOv3 model (class names, output layers and warm-up done once)
+detector = Detector(modelConfig='yolov3.cfg', modelWeights='yolov3.weights', classesfile='coco.names',
+                    whT=320, confThreshold=0.5, nmsThreshold=0.3, metrics=metrics)
+
+dynamicWhT = True  # step whT down/up to keep detection near whTTargetMs
+whTTargetMs = 250
+scaler = ResolutionScaler(detector, sizes=(224, 320, 416), target_ms=whTTargetMs) if dynamicWhT else None
+detect = scaler.detect if scaler else detector.detect
+
+# Track objects between detector runs: YOLO runs every trackEvery frames (or
+# sooner when a track gets uncertain) and counts come from stable track IDs
+useTracker = True
+trackEvery = 5
+tracker = IouTracker(detect_every=trackEvery) if useTracker else None
+
+# Detection event log (esp_cam.event_log)
+eventLog = None  # e.g. 'detections.evlog'
+cameraId = 0
+events = EventLog(eventLog) if eventLog else None
+
+def findObject(im, scale=1.0):
+    # Boxes in original frame pixels, whatever size im was decoded at
+    def detect_frame(img):
+        return detect(img).scaled(scale)
+
+    if tracker is not None:
+        detections = tracker.step(im, detect_frame)
+    else:
+        detections = detect_frame(im)
+    if events:
+        events.record(detections, cameraId)
 
     # Dictionary to count objects
-    count_dict = defaultdict(int)
-
-    if len(indices) > 0:
-        indices = indices.flatten()
-        for i in indices:
-            box = bbox[i]
-            x, y, w, h = box
-            label = classNames[classIds[i]]
-            count_dict[label] += 1
-            count_text = f"{label.upper()} {count_dict[label]}"
-
-            # Draw updated label
-            cv2.rectangle(im, (x, y), (x + w, y + h), (255, 0, 255), 2)
-            cv2.putText(im, count_text, (x, y - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
+    count_dict = detections.counts()
 
     # Print to console
     if count_dict:
@@ -74,24 +79,51 @@ def findObject(outputs, im):
         # Optional: Send to serial (uncomment if needed)
         # serial_output = ",".join([f"{k}: {v}" for k, v in count_dict.items()])
         # ser.write((serial_output + "\n").encode())
+    return detections
 
-while True:
-    try:
-        img_resp = urllib.request.urlopen(url, timeout=5)
-        imgnp = np.array(bytearray(img_resp.read()), dtype=np.uint8)
-        im = cv2.imdecode(imgnp, -1)
-
-        blob = cv2.dnn.blobFromImage(im, 1 / 255, (whT, whT), [0, 0, 0], 1, crop=False)
-        net.setInput(blob)
-        layernames = net.getLayerNames()
-        outputNames = [layernames[i - 1] for i in net.getUnconnectedOutLayers()]
-        outputs = net.forward(outputNames)
-
-        findObject(outputs, im)
+#--- Pipeline stages (fetch, decode and inference overlap on separate threads) ---
+stream = MjpegStream(streamUrl) if useStream else None
 
-        cv2.imshow('YOLO Detection with Count', im)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    except Exception as e:
-        print(f"Error fetching image or processing: {e}")
+def fetch_frame():
+    with metrics.time('fetch'):
+        if stream is not None:
+            return stream.read().data
+        img_resp = urllib.request.urlopen(url, timeout=5)
+        return img_resp.read()
+
+def decode_frame(data):
+    # Decoded at 1/2, 1/4 or 1/8 size when that still covers whT
+    with metrics.time('decode'):
+        return decode_reduced(data, detector.whT)
+
+def infer_frame(decoded):
+    # Drawn on the reduced image, so its boxes go back to that size
+    im, scale = decoded
+    return im, findObject(im, scale).scaled(1 / scale)
+
+def show_frame(result):
+    # Annotation and imshow happen on the display thread, not here
+    display.show(*result)
+    metrics.maybe_log()
+    return display.key() != ord('q')
+
+#--- Main loop ---
+if usePipeline:
+    Pipeline(fetch_frame, decode_frame, infer_frame, metrics=metrics).run(show_frame)
+else:
+    while True:
+        try:
+            decoded = decode_frame(fetch_frame())
+
+            if not show_frame(infer_frame(decoded)):
+                break
+
+        except Exception as e:
+            print(f"Error fetching image or processing: {e}")
+            metrics.inc('errors')
+
+if events:
+    events.close()
+if server:
+    server.stop()
+display.stop()
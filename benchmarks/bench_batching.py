@@ -0,0 +1,47 @@
+"""Throughput of Detector.detect_batch against batch size.
+
+  python benchmarks/bench_batching.py --cfg yolov3-tiny.cfg --weights yolov3-tiny.weights
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import Detector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cfg', default='yolov3.cfg')
+    parser.add_argument('--weights', default='yolov3.weights')
+    parser.add_argument('--names', default='coco.names')
+    parser.add_argument('--whT', type=int, default=320)
+    parser.add_argument('--batch-sizes', default='1,2,4,8')
+    parser.add_argument('--frames', type=int, default=32, help='frames per batch size')
+    args = parser.parse_args()
+
+    detector = Detector(args.cfg, args.weights, args.names, whT=args.whT)
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(8)]
+
+    print(f"{'batch':>5} {'frames/s':>10} {'ms/frame':>10}")
+    for batch_size in [int(b) for b in args.batch_sizes.split(',')]:
+        batch = [images[i % len(images)] for i in range(batch_size)]
+        detector.detect_batch(batch)  # the net reallocates when the batch size changes
+
+        runs = max(1, args.frames // batch_size)
+        start = time.perf_counter()
+        for _ in range(runs):
+            detector.detect_batch(batch)
+        elapsed = time.perf_counter() - start
+
+        fps = runs * batch_size / elapsed
+        print(f"{batch_size:>5} {fps:>10.2f} {1000 / fps:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Full vs reduced-resolution JPEG decode at every ESP32-CAM frame size.
+
+  python benchmarks/bench_decode.py --whT 320
+
+Frames are synthetic (gradients plus noise, encoded at the board's default
+quality) so the numbers don't depend on what the camera happens to see.
+Peak MB is how far one decode raises the process's RSS high-water mark:
+the output image plus the decoder's working buffers. It needs Linux
+(/proc/self/clear_refs) and is shown as '-' elsewhere.
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import decode_reduced
+
+FRAME_SIZES = {
+    'QVGA': (320, 240),
+    'CIF': (400, 296),
+    'HVGA': (480, 320),
+    'VGA': (640, 480),
+    'SVGA': (800, 600),
+    'XGA': (1024, 768),
+    'HD': (1280, 720),
+    'SXGA': (1280, 1024),
+    'UXGA': (1600, 1200),
+}
+
+
+def synthetic_jpeg(width, height, quality, rng):
+    y, x = np.mgrid[0:height, 0:width]
+    img = np.dstack([x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)])
+    img = (img + rng.integers(0, 32, img.shape)).clip(0, 255).astype(np.uint8)
+    ok, jpeg = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return jpeg.tobytes()
+
+
+def _proc_status(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) * 1024
+    return None
+
+
+def peak_mb(fn):
+    # RSS high-water mark reached during fn(), above the RSS before it
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'))
+        if hasattr(libc, 'malloc_trim'):
+            libc.malloc_trim(0)  # return freed heap first, or the decode hides in it
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')  # reset VmHWM to the current RSS
+    except OSError:
+        return None
+    before = _proc_status('VmRSS')
+    result = fn()
+    peak = _proc_status('VmHWM') - before
+    del result
+    return peak / 1e6
+
+
+def format_mb(mb):
+    return f"{mb:8.2f}" if mb is not None else f"{'-':>8}"
+
+
+def median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--whT', type=int, default=320)
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality (100 - ESP32 jpeg_quality * 1.6)')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"whT={args.whT}")
+    print(f"{'frame':>6} {'size':>10} {'full ms':>8} {'peak MB':>8} {'reduced':>10} {'ms':>8} {'peak MB':>8} "
+          f"{'speedup':>8}")
+    for name, (width, height) in FRAME_SIZES.items():
+        jpeg = synthetic_jpeg(width, height, args.quality, rng)
+        buf = np.frombuffer(jpeg, dtype=np.uint8)
+
+        decode_full = lambda: cv2.imdecode(buf, cv2.IMREAD_COLOR)
+        decode_small = lambda: decode_reduced(jpeg, args.whT)
+        full_ms, _ = median_ms(decode_full, args.repeat)
+        reduced_ms, (small, scale) = median_ms(decode_small, args.repeat)
+
+        print(f"{name:>6} {width:>4}x{height:<5} {full_ms:8.2f} {format_mb(peak_mb(decode_full))} "
+              f"{small.shape[1]:>4}x{small.shape[0]:<5} {reduced_ms:8.2f} {format_mb(peak_mb(decode_small))} "
+              f"{full_ms / reduced_ms:7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""Per-stage latency of the findObject / detect_and_count path, at every
+ESP32-CAM frame size, without the camera and without the 240 MB weights.
+
+  python benchmarks/bench_stages.py --json results.json
+  python benchmarks/bench_stages.py --json new.json --compare results.json
+  python benchmarks/bench_stages.py --cfg yolov3.cfg --weights yolov3.weights --save-outputs yolo.npz
+  python benchmarks/bench_stages.py --outputs yolo.npz
+
+Without --cfg a tiny Darknet model with random weights is generated, so
+forward() is cheap but decode and NMS see a realistic output layout.
+--save-outputs records a real model's output tensors per frame size and
+--outputs replays them through decode and NMS, so those stages see real
+box counts even with the tiny model.
+
+fetch is measured against FakeCameraServer on loopback: it shows the
+client's HTTP overhead, not the board's capture time or the Wi-Fi link.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import Detector, HttpCamera, decode_outputs, decode_reduced, draw_detections
+from esp_cam.fakes import FakeCameraServer, FakeSerialCamera
+from bench_decode import FRAME_SIZES, synthetic_jpeg
+
+try:
+    import serial
+except ImportError:
+    serial = None
+
+NUM_CLASSES = 80
+
+
+# --- Tiny YOLO: five stride-2 convs and one [yolo] head, random weights ---
+def write_tiny_darknet(folder, whT, rng):
+    filters = [16, 32, 64, 128, 256]
+    head = 3 * (NUM_CLASSES + 5)
+    lines = ["[net]", "batch=1", f"width={whT}", f"height={whT}", "channels=3", ""]
+    for f in filters:
+        lines += ["[convolutional]", f"filters={f}", "size=3", "stride=2", "pad=1", "activation=leaky", ""]
+    lines += ["[convolutional]", f"filters={head}", "size=1", "stride=1", "pad=1", "activation=linear", "",
+              "[yolo]", "mask=0,1,2", "anchors=10,14, 23,27, 37,58, 81,82, 135,169, 344,319",
+              f"classes={NUM_CLASSES}", "num=6", ""]
+    cfg = os.path.join(folder, 'tiny.cfg')
+    with open(cfg, 'w') as fh:
+        fh.write("\n".join(lines))
+
+    weights = os.path.join(folder, 'tiny.weights')
+    with open(weights, 'wb') as fh:
+        np.array([0, 2, 0], np.int32).tofile(fh)  # major, minor, revision
+        np.array([0], np.uint64).tofile(fh)       # images seen
+        channels = 3
+        for f, size in [(f, 3) for f in filters] + [(head, 1)]:
+            fan_in = channels * size * size
+            np.zeros(f, np.float32).tofile(fh)    # biases (no batch norm)
+            (rng.standard_normal(f * fan_in) * np.sqrt(2 / fan_in)).astype(np.float32).tofile(fh)
+            channels = f
+
+    names = os.path.join(folder, 'tiny.names')
+    with open(names, 'w') as fh:
+        fh.write("\n".join(f"class{i}" for i in range(NUM_CLASSES)) + "\n")
+    return cfg, weights, names
+
+
+def measure(fn, repeat):
+    times = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1000
+    return {'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3), 'p99_ms': round(p99, 3),
+            'fps': round(repeat / times.sum(), 1), 'runs': repeat}
+
+
+def run_size(name, jpeg, detector, args, server, link, recorded, saved):
+    camera = HttpCamera(name, f"{server.url}/cam-hi.jpg")
+    buf = np.frombuffer(jpeg, dtype=np.uint8)
+    img = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    whT = detector.whT
+
+    blob = cv2.dnn.blobFromImage(img, 1 / 255, (whT, whT), [0, 0, 0], 1, crop=False)
+    outputs = detector.backend.forward(blob)
+    if saved is not None:
+        for i, o in enumerate(outputs):
+            saved[f"{name}_{i}"] = o
+    if recorded is not None:
+        outputs = [recorded[k] for k in sorted(recorded.files) if k.startswith(f"{name}_")] or outputs
+
+    h, w = img.shape[:2]
+    bbox, classIds, confs = decode_outputs(outputs, w, h, detector.confThreshold)
+    detections = detector.postprocess(outputs, img.shape)
+    message = f"<{','.join(f'{k}:{v}' for k, v in detections.counts().items())}>\n".encode()
+
+    def forward():
+        detector.backend.forward(blob)
+
+    stages = {
+        'fetch': lambda: camera.fetch(),
+        'imdecode': lambda: cv2.imdecode(buf, cv2.IMREAD_COLOR),
+        'imdecode_reduced': lambda: decode_reduced(jpeg, whT),
+        'blobFromImage': lambda: cv2.dnn.blobFromImage(img, 1 / 255, (whT, whT), [0, 0, 0], 1, crop=False),
+        'forward': forward,
+        'decode_outputs': lambda: decode_outputs(outputs, w, h, detector.confThreshold),
+        'NMSBoxes': lambda: cv2.dnn.NMSBoxes(bbox, confs, detector.confThreshold, detector.nmsThreshold),
+        'draw': lambda: draw_detections(img.copy(), detections, text="{label} {n}", upper=True),
+    }
+    if link is not None:
+        stages['serial_write'] = lambda: (link.write(message), link.flush())
+
+    def end_to_end():
+        im = cv2.imdecode(np.frombuffer(camera.fetch().data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        draw_detections(im, detector.detect(im), text="{label} {n}", upper=True)
+        if link is not None:
+            link.write(message)
+            link.flush()
+    stages['end_to_end'] = end_to_end
+
+    results = {stage: measure(fn, args.repeat) for stage, fn in stages.items()}
+    results['boxes'] = {'candidates': len(bbox), 'after_nms': len(detections)}
+    camera.close()
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)['results']
+    print(f"\np50 against {baseline_path} (>1.00 = slower now)")
+    for size, stages in results.items():
+        ratios = [f"{stage} {stats['p50_ms'] / baseline[size][stage]['p50_ms']:.2f}"
+                  for stage, stats in stages.items()
+                  if 'p50_ms' in stats and baseline.get(size, {}).get(stage, {}).get('p50_ms')]
+        print(f"{size:>6}: " + ", ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cfg', help='real Darknet cfg (default: generated tiny model)')
+    parser.add_argument('--weights')
+    parser.add_argument('--names', default='coco.names')
+    parser.add_argument('--whT', type=int, default=320)
+    parser.add_argument('--conf', type=float, default=0.5)
+    parser.add_argument('--sizes', default=','.join(FRAME_SIZES), help='comma-separated frame sizes')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--quality', type=int, default=80)
+    parser.add_argument('--outputs', help='replay recorded output tensors (.npz) in decode and NMS')
+    parser.add_argument('--save-outputs', help='record the model output tensors to this .npz')
+    parser.add_argument('--json', help='write results here')
+    parser.add_argument('--compare', help='earlier --json file to compare p50 against')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.cfg:
+            cfg, weights, names = args.cfg, args.weights, args.names
+        else:
+            cfg, weights, names = write_tiny_darknet(tmp, args.whT, rng)
+        detector = Detector(cfg, weights, names, whT=args.whT, confThreshold=args.conf)
+
+    sizes = args.sizes.split(',')
+    jpegs = {name: synthetic_jpeg(*FRAME_SIZES[name], args.quality, rng) for name in sizes}
+    recorded = np.load(args.outputs) if args.outputs else None
+    saved = {} if args.save_outputs else None
+
+    current = {}
+    fake_serial = FakeSerialCamera(b'').start() if serial is not None else None
+    link = serial.Serial(fake_serial.port, 115200) if fake_serial else None
+    if link is None:
+        print("pyserial not installed, skipping serial_write")
+    server = FakeCameraServer(lambda path: current['jpeg']).start()
+    print("fetch: loopback FakeCameraServer, not the board or Wi-Fi")
+    results = {}
+    try:
+        for name in sizes:
+            current['jpeg'] = jpegs[name]
+            results[name] = run_size(name, jpegs[name], detector, args, server, link, recorded, saved)
+            e2e = results[name]['end_to_end']
+            print(f"{name:>6} {'x'.join(map(str, FRAME_SIZES[name])):>10}  end to end "
+                  f"p50 {e2e['p50_ms']:.1f} ms  p99 {e2e['p99_ms']:.1f} ms  {e2e['fps']:.1f} fps")
+            for stage, stats in results[name].items():
+                if stage != 'end_to_end' and 'p50_ms' in stats:
+                    print(f"{'':>18}{stage:>17}  p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  "
+                          f"p99 {stats['p99_ms']:8.2f} ms")
+    finally:
+        server.stop()
+        if link is not None:
+            link.close()
+            fake_serial.stop()
+
+    if saved is not None:
+        np.savez(args.save_outputs, **saved)
+        print(f"Saved output tensors to {args.save_outputs}")
+    if args.json:
+        meta = {'model': args.cfg or 'generated tiny', 'whT': args.whT, 'conf': args.conf,
+                'repeat': args.repeat, 'quality': args.quality, 'opencv': cv2.__version__,
+                'numpy': np.__version__, 'python': platform.python_version(),
+                'machine': platform.machine(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'fetch': 'loopback FakeCameraServer'}
+        with open(args.json, 'w') as fh:
+            json.dump({'meta': meta, 'results': results}, fh, indent=2)
+        print(f"Wrote {args.json}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Throughput of InferencePool against the number of worker processes.
+
+  python benchmarks/bench_worker_pool.py --cfg yolov3.cfg --weights yolov3.weights
+  python benchmarks/bench_worker_pool.py --workers 1,2,4,8,16
+
+Without --cfg the tiny random-weight model from bench_stages is used.
+The first line is one in-process Detector for reference, at OpenCV's
+default thread count (all cores), i.e. what a script without the pool
+gets; every pool row keeps all slots busy from a single submitting
+thread, like several cameras would.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import Detector, InferencePool
+from bench_stages import write_tiny_darknet
+
+
+def pool_fps(workers, frames, images, settings):
+    pool = InferencePool(workers=workers, max_shape=images[0].shape, **settings).start()
+    try:
+        for future in [pool.submit(images[i % len(images)]) for i in range(pool.slots)]:
+            future.result()  # first frame in every worker
+        start = time.perf_counter()
+        futures = [pool.submit(images[i % len(images)]) for i in range(frames)]
+        for future in futures:
+            future.result()
+        return frames / (time.perf_counter() - start)
+    finally:
+        pool.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cfg', help='Darknet cfg (default: generated tiny model)')
+    parser.add_argument('--weights')
+    parser.add_argument('--names', default='coco.names')
+    parser.add_argument('--whT', type=int, default=320)
+    parser.add_argument('--workers', default=','.join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=1, help='OpenCV threads per worker')
+    parser.add_argument('--frames', type=int, default=64, help='frames per worker count')
+    parser.add_argument('--size', default='640x480', help='frame size WxH')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    w, h = (int(v) for v in args.size.split('x'))
+    images = [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for _ in range(8)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        if args.cfg:
+            cfg, weights, names = args.cfg, args.weights, args.names
+        else:
+            cfg, weights, names = write_tiny_darknet(folder, args.whT, rng)
+        settings = dict(modelConfig=os.path.abspath(cfg), modelWeights=os.path.abspath(weights),
+                        classesfile=os.path.abspath(names), whT=args.whT)
+
+        detector = Detector(**settings)
+        start = time.perf_counter()
+        for i in range(args.frames):
+            detector.detect(images[i % len(images)])
+        single = args.frames / (time.perf_counter() - start)
+
+        print(f"{'workers':>7} {'frames/s':>10} {'speed-up':>9}")
+        print(f"{'inline':>7} {single:>10.2f} {1.0:>9.2f}")
+        for workers in [int(n) for n in args.workers.split(',')]:
+            fps = pool_fps(workers, args.frames, images, dict(settings, threads=args.threads))
+            print(f"{workers:>7} {fps:>10.2f} {fps / single:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Replay recorded frames through per-frame detection and through IouTracker,
+and compare the counts and throughput of the two.
+
+  python benchmarks/replay_tracker.py --record http://172.30.91.79/cam-hi.jpg --frames 200 frames/
+  python benchmarks/replay_tracker.py --cfg yolov3-tiny.cfg --weights yolov3-tiny.weights frames/
+
+The source is a folder of JPEGs (replayed in name order) or a video file.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import urllib.request
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esp_cam import Detector, IouTracker, MjpegStream
+
+
+def record(url, folder, frames):
+    os.makedirs(folder, exist_ok=True)
+    stream = MjpegStream(url) if url.endswith('/stream') else None
+    for i in range(frames):
+        data = stream.read().data if stream else urllib.request.urlopen(url, timeout=5).read()
+        with open(os.path.join(folder, f"{i:06d}.jpg"), 'wb') as f:
+            f.write(data)
+    print(f"Recorded {frames} frames to {folder}")
+
+
+def load_frames(source):
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, '*.jpg')))
+        return [cv2.imread(p) for p in paths]
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while True:
+        ok, img = cap.read()
+        if not ok:
+            return frames
+        frames.append(img)
+
+
+def total(count_dict):
+    return sum(count_dict.values())
+
+
+def flicker(totals):
+    # Frames whose total count differs from the frame before
+    return sum(a != b for a, b in zip(totals, totals[1:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='folder of .jpg frames or a video file')
+    parser.add_argument('--record', metavar='URL', help='save --frames frames from URL into source first')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--cfg', default='yolov3.cfg')
+    parser.add_argument('--weights', default='yolov3.weights')
+    parser.add_argument('--names', default='coco.names')
+    parser.add_argument('--whT', type=int, default=320)
+    parser.add_argument('--detect-every', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.source, args.frames)
+
+    frames = load_frames(args.source)
+    if not frames:
+        sys.exit(f"No frames in {args.source}")
+    detector = Detector(args.cfg, args.weights, args.names, whT=args.whT)
+
+    start = time.perf_counter()
+    per_frame = [total(detector.detect(img).counts()) for img in frames]
+    detect_time = time.perf_counter() - start
+
+    tracker = IouTracker(detect_every=args.detect_every)
+    tracked = []
+    start = time.perf_counter()
+    for img in frames:
+        tracker.step(img, detector.detect)
+        tracked.append(total(tracker.counts()))
+    track_time = time.perf_counter() - start
+
+    n = len(frames)
+    mean_error = sum(abs(a - b) for a, b in zip(per_frame, tracked)) / n
+    print(f"{n} frames, detector every {args.detect_every} (ran {tracker.detector_runs} times)")
+    print(f"{'':>12} {'fps':>8} {'flicker':>8} {'mean count':>11}")
+    print(f"{'per-frame':>12} {n / detect_time:8.1f} {flicker(per_frame):8d} {sum(per_frame) / n:11.2f}")
+    print(f"{'tracked':>12} {n / track_time:8.1f} {flicker(tracked):8d} {sum(tracked) / n:11.2f}")
+    print(f"Mean |tracked - per-frame| count: {mean_error:.2f}")
+    print(f"Distinct tracks per label: {dict(tracker.seen)}")
+
+
+if __name__ == '__main__':
+    main()
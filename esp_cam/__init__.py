@@ -0,0 +1,29 @@
+# Shared helpers for the ESP32-CAM object counting scripts.
+#
+# The scripts in the ESP_* folders are run directly (python script.py), so
+# each one puts the repository root on sys.path before importing from here.
+
+from .backends import ModelVariant, OnnxBackend, OpenCVBackend, quantize_onnx, select_detector
+from .batching import BatchingDetector
+from .counting import BaselineCounter, CountHistory
+from .decode import decode_outputs
+from .detector import Detector, Detections
+from .display import Display
+from .event_log import EventLog
+from .frame_buffer import FrameBuffer
+from .framing import FrameReader, encode_frame
+from .gating import SceneGate
+from .http_source import CameraPoller, Frame, HttpCamera
+from .jpeg import decode_reduced, jpeg_size
+from .metrics import Metrics
+from .mjpeg import MjpegStream
+from .mjpeg_server import MjpegServer
+from .pipeline import LatestQueue, Pipeline
+from .render import draw_detections
+from .resolution import ResolutionScaler
+from .scheduler import AdaptiveScheduler
+from .serial_link import CaptureAhead, SerialCamera, SerialFrame, TransferStats
+from .serial_writer import SerialWriter
+from .tiling import TiledDetector, tile_grid
+from .tracking import IouTracker
+from .worker_pool import InferencePool
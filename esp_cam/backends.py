@@ -0,0 +1,179 @@
+import os
+import time
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+# --- OpenCV DNN on the CPU (what every script used before) ---
+class OpenCVBackend:
+    """Darknet cfg/weights through cv2.dnn.
+
+    precision='fp16' uses DNN_TARGET_CPU_FP16 where this OpenCV build has
+    it (4.7+). threads sets cv2.setNumThreads, which is process-wide.
+    """
+
+    name = 'opencv'
+    input_size = None  # blobs of any whT
+
+    def __init__(self, modelConfig, modelWeights, threads=None, precision='fp32'):
+        if threads:
+            cv2.setNumThreads(threads)
+        self.net = cv2.dnn.readNetFromDarknet(modelConfig, modelWeights)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        target = cv2.dnn.DNN_TARGET_CPU
+        if precision == 'fp16':
+            target = getattr(cv2.dnn, 'DNN_TARGET_CPU_FP16', None)
+            if target is None:
+                raise ValueError(f"OpenCV {cv2.__version__} has no CPU FP16 target")
+        elif precision != 'fp32':
+            raise ValueError(f"OpenCV backend runs fp32 or fp16, not {precision!r}")
+        self.net.setPreferableTarget(target)
+        self.outputNames = list(self.net.getUnconnectedOutLayersNames())
+
+    def forward(self, blob):
+        self.net.setInput(blob)
+        return self.net.forward(self.outputNames)
+
+
+# --- ONNX Runtime on the CPU (optional dependency) ---
+def boxes_confs_to_rows(boxes, confs):
+    """(N, R, 1, 4) corner boxes + (N, R, classes) scores -> (N, R, 5 + classes) rows.
+
+    The split layout of pytorch-YOLOv4's demo_darknet2onnx.py exports:
+    boxes are normalised x1, y1, x2, y2 and the scores already include
+    objectness, so the objectness column is set to 1.
+    """
+    boxes = boxes.reshape(boxes.shape[0], -1, 4)
+    rows = np.empty(confs.shape[:2] + (5 + confs.shape[2],), np.float32)
+    rows[..., 0:2] = (boxes[..., 0:2] + boxes[..., 2:4]) / 2
+    rows[..., 2:4] = boxes[..., 2:4] - boxes[..., 0:2]
+    rows[..., 4] = 1
+    rows[..., 5:] = confs
+    return rows
+
+
+class OnnxBackend:
+    """An ONNX export of the same model through onnxruntime.
+
+    Two output layouts are understood: YOLO-layer rows like OpenCV's
+    (normalised cx, cy, w, h, objectness, class scores; any number of
+    outputs), or the two outputs `boxes` (N, R, 1, 4) and `confs`
+    (N, R, classes) of pytorch-YOLOv4's demo_darknet2onnx.py, which are
+    turned into rows here. threads sets the intra-op thread count of this
+    session only. For INT8, pass a graph made with quantize_onnx().
+
+    input_size is the whT the graph was exported with, or None when its
+    height and width are dynamic; a fixed-size graph can't follow
+    ResolutionScaler.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model, threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("OnnxBackend needs onnxruntime (pip install onnxruntime)") from None
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model, options, providers=['CPUExecutionProvider'])
+        graph_input = self.session.get_inputs()[0]
+        self.input_name = graph_input.name
+
+        # NCHW; dynamic dimensions come back as names or None
+        height, width = graph_input.shape[2:4]
+        fixed = isinstance(height, int) or isinstance(width, int)
+        if fixed and height != width:
+            raise ValueError(f"{model} takes {graph_input.shape} inputs, not square whT x whT")
+        self.input_size = height if fixed else None
+
+        # Split layout: a 4-wide boxes output next to the scores
+        outputs = self.session.get_outputs()
+        self.split = len(outputs) == 2 and outputs[0].shape[-1] == 4
+
+    def forward(self, blob):
+        outputs = self.session.run(None, {self.input_name: blob})
+        if self.split:
+            return [boxes_confs_to_rows(*outputs)]
+        return outputs
+
+
+def quantize_onnx(model, quantized):
+    # Dynamic INT8 weight quantization; activations stay float
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(model, quantized, weight_type=QuantType.QInt8)
+    return quantized
+
+
+# --- One model/backend/precision combination that could be used ---
+@dataclass
+class ModelVariant:
+    name: str
+    modelConfig: str = None   # Darknet cfg + weights for the OpenCV backend
+    modelWeights: str = None
+    onnx: str = None          # ONNX graph for the ONNX Runtime backend
+    precision: str = 'fp32'   # 'fp32', 'fp16' (OpenCV) or 'int8' (quantized ONNX graph)
+
+    def available(self):
+        files = [self.onnx] if self.onnx else [self.modelConfig, self.modelWeights]
+        return all(f and os.path.exists(f) for f in files)
+
+    def backend(self, threads=None):
+        if self.onnx:
+            return OnnxBackend(self.onnx, threads)
+        return OpenCVBackend(self.modelConfig, self.modelWeights, threads, self.precision)
+
+
+def select_detector(variants, budget_ms, classesfile='coco.names', whT=320, threads=None, runs=5,
+                    metrics=None, **kwargs):
+    """Return a Detector for the most accurate variant that fits budget_ms.
+
+    `variants` are listed most accurate first. Each one whose files exist
+    is loaded and timed on `runs` frames (detect, after warm-up); the first
+    with a median at or under the budget wins. If none fits, the fastest
+    one is used. Variants that fail to load or to run (no onnxruntime, no
+    FP16 target, a broken graph) are skipped. A graph with a fixed input
+    size runs at that whT instead. Extra keyword arguments go to Detector.
+    """
+    from .detector import Detector
+    from .metrics import DISABLED
+
+    frame = np.random.default_rng(0).integers(0, 256, (whT * 3 // 4, whT, 3), dtype=np.uint8)
+    fastest = None
+    for variant in variants:
+        if not variant.available():
+            print(f"[Model] {variant.name}: files not found, skipped")
+            continue
+        try:
+            backend = variant.backend(threads)
+            detector = Detector(classesfile=classesfile, whT=backend.input_size or whT, backend=backend, **kwargs)
+
+            times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                detector.detect(frame)
+                times.append(time.perf_counter() - start)
+        except Exception as e:
+            print(f"[Model] {variant.name}: {e!r}")
+            continue
+        median_ms = float(np.median(times)) * 1000
+        print(f"[Model] {variant.name}: {median_ms:.0f} ms/frame (budget {budget_ms:.0f} ms)")
+
+        detector.variant = variant
+        if median_ms <= budget_ms:
+            break
+        if fastest is None or median_ms < fastest[0]:
+            fastest = (median_ms, detector)
+    else:
+        if fastest is None:
+            raise FileNotFoundError("No usable model variant found")
+        detector = fastest[1]
+        print(f"[Model] Nothing fits the budget, using the fastest: {detector.variant.name}")
+
+    # Profiling runs stay out of the metrics
+    detector.metrics = metrics or DISABLED
+    return detector
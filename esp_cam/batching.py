@@ -0,0 +1,80 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+# --- Collect frames from several callers into one batched forward pass ---
+class BatchingDetector:
+    """Front a Detector with a batcher.
+
+    submit(image) returns a Future for that frame's Detections. A worker
+    thread waits for the first pending frame, then keeps collecting until it
+    has max_batch frames or max_wait seconds have passed, and runs them all
+    through Detector.detect_batch.
+    """
+
+    def __init__(self, detector, max_batch=4, max_wait=0.02):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.pending = queue.Queue()
+        self.batches = 0
+        self.frames = 0
+        self.thread = None
+
+    def submit(self, image):
+        future = Future()
+        self.pending.put((image, future))
+        return future
+
+    def detect(self, image, timeout=None):
+        return self.submit(image).result(timeout)
+
+    def _collect(self):
+        item = self.pending.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self.pending.put(None)  # let the outer loop see the stop
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            images = [image for image, _ in batch]
+            try:
+                results = self.detector.detect_batch(images)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            self.batches += 1
+            self.frames += len(batch)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="batcher", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.pending.put(None)
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+            self.thread = None
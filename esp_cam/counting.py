@@ -0,0 +1,124 @@
+import numpy as np
+
+
+# --- Last `window` per-class count vectors in a fixed NumPy ring buffer ---
+class CountHistory:
+    """Per-class counts of the last `window` frames, indexed by class id.
+
+    add() writes one row in place (no dicts, no allocation per frame);
+    median() and mode() summarise each class over the filled part of the
+    window, so one missed or spurious detection doesn't move the result.
+    """
+
+    def __init__(self, num_classes, window=5, dtype=np.int16):
+        self.rows = np.zeros((window, num_classes), dtype)
+        self.window = window
+        self.index = 0
+        self.filled = 0
+
+    def add(self, class_ids):
+        counts = np.bincount(np.asarray(class_ids, np.int64), minlength=self.rows.shape[1])
+        self.rows[self.index] = counts[:self.rows.shape[1]]
+        self.index = (self.index + 1) % self.window
+        self.filled = min(self.filled + 1, self.window)
+
+    def recent(self):
+        return self.rows[:self.filled] if self.filled < self.window else self.rows
+
+    def median(self):
+        # Half counts (even window) round up, so a tie keeps the higher count
+        return np.floor(np.median(self.recent(), axis=0) + 0.5).astype(self.rows.dtype)
+
+    def mode(self):
+        # Most frequent count per class; ties go to the lower count
+        recent = self.recent()
+        values = np.arange(int(recent.max()) + 1)[:, None, None]
+        frequency = (recent[None] == values).sum(axis=1)
+        return frequency.argmax(axis=0).astype(self.rows.dtype)
+
+    def clear(self):
+        self.rows[:] = 0
+        self.index = 0
+        self.filled = 0
+
+
+# --- Baseline comparison on smoothed counts, with hysteresis on "missing" ---
+class BaselineCounter:
+    """Compare windowed counts against a baseline and report missing classes.
+
+    The baseline is taken once `window` results have been added, from
+    their smoothed counts, so a detection missed on the very first frame
+    can't become the reference. policy='first' then keeps it (the
+    OBJ_COMP_First_as_Base behaviour); policy='previous' compares against
+    the last result instead (OBJ_COMP_Base_as_previous_image), but only
+    follows a drop once it has been reported.
+
+    A class becomes missing after its smoothed count has been below the
+    baseline for `miss_after` results in a row, and stops being missing
+    after `clear_after` results at or above it.
+    """
+
+    def __init__(self, class_names, policy='first', window=5, statistic='median',
+                 miss_after=2, clear_after=2):
+        if policy not in ('first', 'previous'):
+            raise ValueError(f"policy must be 'first' or 'previous', not {policy!r}")
+        if statistic not in ('median', 'mode'):
+            raise ValueError(f"statistic must be 'median' or 'mode', not {statistic!r}")
+        self.class_names = class_names
+        self.policy = policy
+        self.statistic = statistic
+        self.miss_after = miss_after
+        self.clear_after = clear_after
+        self.history = CountHistory(len(class_names), window)
+        n = len(class_names)
+        self.below = np.zeros(n, np.int32)  # results in a row under the baseline
+        self.above = np.zeros(n, np.int32)  # results in a row at or over it
+        self.missing = np.zeros(n, bool)
+        self.baseline = None
+        self.current = np.zeros(n, self.history.rows.dtype)
+
+    def update(self, class_ids):
+        """Add one result; returns True if it set the baseline."""
+        self.history.add(class_ids)
+        self.current = getattr(self.history, self.statistic)()
+
+        if self.baseline is None:
+            if self.history.filled < self.history.window:
+                return False
+            self.baseline = self.current.copy()
+            return True
+
+        short = self.current < self.baseline
+        self.below = np.where(short, self.below + 1, 0)
+        self.above = np.where(short, 0, self.above + 1)
+        confirmed = self.below >= self.miss_after
+        self.missing = (self.missing | confirmed) & ~(self.above >= self.clear_after)
+
+        if self.policy == 'previous':
+            follow = ~short | confirmed
+            self.baseline[follow] = self.current[follow]
+        return False
+
+    def results_to_baseline(self):
+        # Results still needed before the baseline is set (0 once it is)
+        return 0 if self.baseline is not None else self.history.window - self.history.filled
+
+    def counts(self):
+        # <label:count> for the smoothed counts, in class id order
+        return {self.class_names[i]: int(self.current[i]) for i in np.flatnonzero(self.current)}
+
+    def baseline_counts(self):
+        if self.baseline is None:
+            return {}
+        return {self.class_names[i]: int(self.baseline[i]) for i in np.flatnonzero(self.baseline)}
+
+    def missing_labels(self):
+        return [self.class_names[i] for i in np.flatnonzero(self.missing)]
+
+    def reset(self):
+        self.history.clear()
+        self.below[:] = 0
+        self.above[:] = 0
+        self.missing[:] = False
+        self.baseline = None
+        self.current[:] = 0
@@ -0,0 +1,37 @@
+import numpy as np
+
+
+# --- Vectorized YOLO output decoding ---
+def decode_outputs(outputs, wT, hT, confThreshold):
+    """Turn raw YOLO output layers into (bbox, classIds, confs) for NMSBoxes.
+
+    Same result as the old per-row loop in findObject / detect_and_count:
+    boxes are [x, y, w, h] in pixels of a wT x hT frame, and only rows whose
+    best class score is strictly above confThreshold are kept.
+    """
+    dets = np.concatenate([o.reshape(-1, o.shape[-1]) for o in outputs])
+    scores = dets[:, 5:]
+
+    # The old loop did its arithmetic on NumPy scalars and Python numbers,
+    # which promotes to float32 on NumPy 2 and to float64 before it. Use the
+    # same precision, so the threshold and int() truncation agree bit for bit.
+    ftype = (dets.dtype.type(0) * 1.0).dtype
+
+    # Max first: most rows are dropped here, so argmax only runs on survivors
+    best = scores.max(axis=1)
+    keep = best.astype(ftype) > confThreshold
+    if not keep.any():
+        return [], [], []
+
+    dets = dets[keep].astype(ftype)
+    classIds = scores[keep].argmax(axis=1)
+    confs = best[keep]
+
+    # int() in the old loop truncates toward zero, so does astype
+    w = (dets[:, 2] * wT).astype(np.int64)
+    h = (dets[:, 3] * hT).astype(np.int64)
+    x = (dets[:, 0] * wT - w.astype(ftype) / 2).astype(np.int64)
+    y = (dets[:, 1] * hT - h.astype(ftype) / 2).astype(np.int64)
+
+    bbox = np.stack([x, y, w, h], axis=1).tolist()
+    return bbox, classIds.tolist(), confs.tolist()
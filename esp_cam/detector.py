@@ -0,0 +1,104 @@
+import cv2
+import numpy as np
+from collections import defaultdict
+from dataclasses import dataclass
+
+from .backends import OpenCVBackend
+from .decode import decode_outputs
+from .metrics import DISABLED
+
+
+# --- Detection result (frame is never touched) ---
+@dataclass
+class Detections:
+    boxes: np.ndarray        # (N, 4) int32 x, y, w, h in frame pixels
+    class_ids: np.ndarray    # (N,) int32
+    confidences: np.ndarray  # (N,) float32
+    labels: list             # class name per box
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def scaled(self, scale):
+        # Boxes in another frame's pixels, e.g. the original after a reduced decode
+        if scale == 1:
+            return self
+        boxes = np.round(self.boxes * scale).astype(np.int32)
+        return Detections(boxes, self.class_ids, self.confidences, self.labels)
+
+    def counts(self):
+        # Same <label:count> dict the scripts used to build while drawing
+        count_dict = defaultdict(int)
+        for label in self.labels:
+            count_dict[label] += 1
+        return count_dict
+
+
+def empty_detections():
+    return Detections(np.zeros((0, 4), np.int32), np.zeros(0, np.int32),
+                      np.zeros(0, np.float32), [])
+
+
+# --- YOLO detector: model, class names and output layers loaded once ---
+# backend: an OpenCVBackend / OnnxBackend (see backends.py); by default the
+# Darknet files run on OpenCV DNN with `threads` CPU threads.
+class Detector:
+    def __init__(self, modelConfig='yolov3.cfg', modelWeights='yolov3.weights',
+                 classesfile='coco.names', whT=320, confThreshold=0.5,
+                 nmsThreshold=0.3, warmup=True, metrics=None, backend=None, threads=None):
+        self.whT = whT
+        self.metrics = metrics or DISABLED
+        self.confThreshold = confThreshold
+        self.nmsThreshold = nmsThreshold
+
+        with open(classesfile, 'rt') as f:
+            self.classNames = f.read().rstrip('\n').split('\n')
+
+        self.backend = backend or OpenCVBackend(modelConfig, modelWeights, threads)
+        self.variant = None  # set by select_detector()
+
+        # First forward allocates every layer; pay for it now, not on frame 1
+        if warmup:
+            self.detect(np.zeros((whT, whT, 3), np.uint8))
+
+    def forward(self, img):
+        with self.metrics.time('inference'):
+            blob = cv2.dnn.blobFromImage(img, 1 / 255, (self.whT, self.whT), [0, 0, 0], 1, crop=False)
+            return self.backend.forward(blob)
+
+    def postprocess(self, outputs, shape):
+        with self.metrics.time('postprocess'):
+            return self._postprocess(outputs, shape)
+
+    def _postprocess(self, outputs, shape):
+        hT, wT = shape[:2]
+        bbox, classIds, confs = decode_outputs(outputs, wT, hT, self.confThreshold)
+        if not bbox:
+            return empty_detections()
+
+        indices = cv2.dnn.NMSBoxes(bbox, confs, self.confThreshold, self.nmsThreshold)
+        # Older OpenCV returns (N, 1), newer returns (N,)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+
+        class_ids = np.asarray(classIds, np.int32)[indices]
+        return Detections(np.asarray(bbox, np.int32)[indices].reshape(-1, 4), class_ids,
+                          np.asarray(confs, np.float32)[indices],
+                          [self.classNames[c] for c in class_ids])
+
+    def detect(self, img):
+        return self.postprocess(self.forward(img), img.shape)
+
+    # --- Several frames (any sizes, any cameras) in one forward pass ---
+    def detect_batch(self, images):
+        if len(images) == 1:
+            return [self.detect(images[0])]
+
+        with self.metrics.time('inference'):
+            blob = cv2.dnn.blobFromImages(images, 1 / 255, (self.whT, self.whT), [0, 0, 0], 1, crop=False)
+            outputs = self.backend.forward(blob)
+
+        # YOLO layers give (N, rows, 85) for a batch; split back per frame
+        n = len(images)
+        outputs = [o.reshape(n, -1, o.shape[-1]) for o in outputs]
+        return [self.postprocess([o[i] for o in outputs], img.shape)
+                for i, img in enumerate(images)]
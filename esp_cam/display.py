@@ -0,0 +1,111 @@
+import threading
+import time
+
+import cv2
+
+from .render import draw_detections
+
+
+# --- Latest frame + detections, annotated only when someone looks ---
+class Display:
+    """Keep imshow/waitKey and box drawing off the capture/inference loop.
+
+    show(img, detections) only stores references (the loop must not modify
+    img afterwards; every decode returns a new array anyway). Annotation
+    happens on a copy, and only when it is needed: on the render thread
+    when a window is open, or in snapshot() for other consumers.
+
+    headless=True opens no window and starts no thread, so nothing is
+    drawn unless snapshot() is called. key() returns the last key pressed
+    in the window (or -1) without blocking.
+
+    The window lives on the render thread; that works with the Win32 and
+    GTK/Qt backends OpenCV ships for Windows and Linux.
+    """
+
+    def __init__(self, title, headless=False, text="{label} {n}", upper=False, fps=30):
+        self.title = title
+        self.headless = headless
+        self.text = text
+        self.upper = upper
+        self.interval = 1.0 / fps
+        self.lock = threading.Lock()
+        self.latest = None  # (img, detections)
+        self.seq = 0        # bumped by every show(), for other consumers
+        self.updated = threading.Condition(self.lock)
+        self.new_frame = threading.Event()
+        self.keys = []
+        self.key_pressed = threading.Condition(self.lock)
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def show(self, img, detections=None):
+        with self.lock:
+            self.latest = (img, detections)
+            self.seq += 1
+            self.updated.notify_all()
+        self.new_frame.set()
+
+    def snapshot(self, annotate=True):
+        # Copy of the latest frame (annotated if asked), or None before the first one
+        return self.snapshot_seq(annotate)[1]
+
+    def snapshot_seq(self, annotate=True):
+        # (seq, image) so a consumer can tell whether it has seen this frame
+        with self.lock:
+            latest, seq = self.latest, self.seq
+        if latest is None:
+            return seq, None
+        img, detections = latest
+        img = img.copy()
+        if annotate and detections is not None:
+            draw_detections(img, detections, text=self.text, upper=self.upper)
+        return seq, img
+
+    def wait_new(self, seq, timeout=None):
+        # Block until a frame newer than seq has been shown; returns the latest seq
+        with self.updated:
+            self.updated.wait_for(lambda: self.seq != seq, timeout)
+            return self.seq
+
+    def _run(self):
+        while not self.stopping.is_set():
+            if self.new_frame.wait(self.interval):
+                # Frames shown in between are skipped: only the newest is drawn
+                self.new_frame.clear()
+                img = self.snapshot()
+                if img is not None:
+                    cv2.imshow(self.title, img)
+            key = cv2.waitKey(1)  # also runs the GUI event loop
+            if key != -1:
+                with self.key_pressed:
+                    self.keys.append(key & 0xFF)
+                    self.key_pressed.notify_all()
+        cv2.destroyWindow(self.title)
+
+    def start(self):
+        if not self.headless:
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._run, name=f"display-{self.title}", daemon=True)
+            self.thread.start()
+        return self
+
+    def key(self):
+        with self.lock:
+            return self.keys.pop(0) if self.keys else -1
+
+    def wait_key(self, timeout=None):
+        # Block until a key is pressed (or timeout); headless just waits out the timeout
+        if self.headless:
+            time.sleep(timeout or 0)
+            return -1
+        with self.key_pressed:
+            if not self.key_pressed.wait_for(lambda: self.keys, timeout):
+                return -1
+            return self.keys.pop(0)
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
@@ -0,0 +1,265 @@
+import glob
+import os
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b'ESPEVT1\0'
+HEADER_SIZE = 16  # magic + record size (u4) + reserved (u4)
+NO_CLASS = 0xFFFF  # class_id of the row written for a frame with no detections
+SEARCH_STEP = 4096  # records per block of the two-step time search
+
+# One row per (frame, class): everything fixed-width, little-endian, packed
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'),      # time.time() of the result
+    ('camera', '<u2'),    # camera id, chosen by the script
+    ('class_id', '<u2'),  # COCO class id, or NO_CLASS
+    ('count', '<u2'),
+    ('conf_max', '<f4'),
+    ('conf_mean', '<f4'),
+    ('x0', '<i2'),        # box summary: union of this class's boxes, frame pixels
+    ('y0', '<i2'),
+    ('x1', '<i2'),
+    ('y1', '<i2'),
+])
+
+
+def summarize(detections, camera=0, t=None):
+    # Detections of one frame -> one RECORD_DTYPE row per class present
+    t = time.time() if t is None else t
+    if not len(detections):
+        rows = np.zeros(1, RECORD_DTYPE)
+        rows['class_id'] = NO_CLASS
+    else:
+        classes, inverse = np.unique(detections.class_ids, return_inverse=True)
+        boxes = detections.boxes
+        confs = detections.confidences
+        counts = np.bincount(inverse, minlength=len(classes))
+
+        rows = np.zeros(len(classes), RECORD_DTYPE)
+        rows['class_id'] = classes
+        rows['count'] = counts
+        rows['conf_mean'] = np.bincount(inverse, confs, len(classes)) / counts
+        conf_max = np.zeros(len(classes), np.float32)
+        np.maximum.at(conf_max, inverse, confs)
+        rows['conf_max'] = conf_max
+
+        x0 = np.full(len(classes), np.iinfo(np.int32).max)
+        y0 = x0.copy()
+        x1 = np.full(len(classes), np.iinfo(np.int32).min)
+        y1 = x1.copy()
+        np.minimum.at(x0, inverse, boxes[:, 0])
+        np.minimum.at(y0, inverse, boxes[:, 1])
+        np.maximum.at(x1, inverse, boxes[:, 0] + boxes[:, 2])
+        np.maximum.at(y1, inverse, boxes[:, 1] + boxes[:, 3])
+        for name, values in (('x0', x0), ('y0', y0), ('x1', x1), ('y1', y1)):
+            rows[name] = np.clip(values, -32768, 32767)
+    rows['time'] = t
+    rows['camera'] = camera
+    return rows
+
+
+# --- Append-only detection log, one fixed-width record per class per frame ---
+class EventLog:
+    """Record every detection result to a binary file.
+
+    record(detections, camera) appends one RECORD_DTYPE row per class in
+    the frame (a NO_CLASS row when nothing was detected, so empty frames
+    count too) and flushes, so readers never wait for a close. When the
+    file would grow past max_bytes it is rotated like logging's
+    RotatingFileHandler: path -> path.1 -> ... -> path.<backups>, the oldest
+    deleted. A partial record left by a crash is cut off on open. One
+    EventLog (one process) per file; any number of readers.
+
+    Times never go backwards in the file: a row stamped before the last one
+    written (the wall clock stepped back, e.g. by NTP) gets the last time
+    instead, so queries can keep searching by time.
+
+    Read it back with read_log() / query() / counts_over_time(); they
+    memory-map the files instead of loading them.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, backups=10):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.Lock()
+        self.records = 0
+        self.rotations = 0
+        self.last_time = float('-inf')
+        self.file = None
+        self._open()
+
+    def _open(self):
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        self.file = open(self.path, 'r+b' if os.path.exists(self.path) else 'w+b')
+        size = self.file.seek(0, os.SEEK_END)
+        if size < HEADER_SIZE:
+            self.file.seek(0)
+            self.file.truncate()
+            self.file.write(_header())
+        else:
+            _check_header(self.path, self.file)
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+            if whole != size:
+                self.file.truncate(whole)
+            if whole > HEADER_SIZE:
+                self.file.seek(whole - RECORD_DTYPE.itemsize)
+                last = np.frombuffer(self.file.read(RECORD_DTYPE.itemsize), RECORD_DTYPE)[0]
+                self.last_time = max(self.last_time, float(last['time']))
+            self.file.seek(whole)
+        self.file.flush()
+
+    def _rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
+
+    def record(self, detections, camera=0, t=None):
+        with self.lock:
+            # Stamped under the lock, so rows from several threads stay in time order
+            t = max(time.time() if t is None else t, self.last_time)
+            self.last_time = t
+            data = summarize(detections, camera, t).tobytes()
+            if self.file.tell() + len(data) > self.max_bytes and self.file.tell() > HEADER_SIZE:
+                self._rotate()
+            self.file.write(data)
+            self.file.flush()
+            self.records += len(data) // RECORD_DTYPE.itemsize
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def _header():
+    return MAGIC + np.array([RECORD_DTYPE.itemsize, 0], '<u4').tobytes()
+
+
+def _check_header(path, f):
+    f.seek(0)
+    header = f.read(HEADER_SIZE)
+    itemsize = int(np.frombuffer(header, '<u4', 1, len(MAGIC))[0])
+    if header[:len(MAGIC)] != MAGIC or itemsize != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a detection event log of this version")
+
+
+# --- Reading: memory-mapped, oldest file first ---
+def log_files(path):
+    # path.N ... path.1, path: oldest first
+    rotated = [p for p in glob.glob(glob.escape(path) + '.*') if p.rsplit('.', 1)[1].isdigit()]
+    rotated.sort(key=lambda p: int(p.rsplit('.', 1)[1]), reverse=True)
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def read_log(path):
+    """The records of one log file as a read-only structured memmap.
+
+    Only whole records are mapped, so a file that is being appended to can
+    be read at any time.
+    """
+    with open(path, 'rb') as f:
+        _check_header(path, f)
+    n = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if n <= 0:
+        return np.zeros(0, RECORD_DTYPE)
+    return np.memmap(path, RECORD_DTYPE, 'r', HEADER_SIZE, (n,))
+
+
+def _search(times, value):
+    # searchsorted copies a strided memmap column whole: search every
+    # SEARCH_STEP-th time first, then only the block that holds the answer
+    k = int(np.searchsorted(times[::SEARCH_STEP], value, 'left'))
+    lo = max(0, (k - 1) * SEARCH_STEP)
+    hi = min(len(times), k * SEARCH_STEP)
+    return lo + int(np.searchsorted(times[lo:hi], value, 'left'))
+
+
+def _time_slice(records, start, end):
+    # Records are appended in time order: no full scan of the mapped column
+    times = records['time']
+    lo = 0 if start is None else _search(times, start)
+    hi = len(records) if end is None else _search(times, end)
+    return records[lo:hi]
+
+
+def query(path, start=None, end=None, camera=None, class_id=None):
+    """Records with start <= time < end, optionally for one camera / class.
+
+    Searches every rotated file of `path` and returns a (copied) structured
+    array in time order.
+    """
+    parts = []
+    for file in log_files(path):
+        records = read_log(file)
+        if not len(records):
+            continue
+        if (start is not None and records[-1]['time'] < start) or \
+                (end is not None and records[0]['time'] >= end):
+            continue
+        records = _time_slice(records, start, end)
+        mask = np.ones(len(records), bool)
+        if camera is not None:
+            mask &= records['camera'] == camera
+        if class_id is not None:
+            mask &= records['class_id'] == class_id
+        parts.append(np.array(records[mask]))
+    return np.concatenate(parts) if parts else np.zeros(0, RECORD_DTYPE)
+
+
+def _frame_times(records):
+    # One entry per recorded frame: a frame's rows share camera and time
+    keys = np.stack([records['time'], records['camera'].astype(np.float64)], axis=1)
+    return np.unique(keys, axis=0)[:, 0]
+
+
+def class_totals(path, start=None, end=None, camera=None):
+    """Per class_id: frames it was seen in, mean count per frame, max count.
+
+    The mean is over every recorded frame in the range (including frames
+    where the class was absent), i.e. the average number on the shelf.
+    """
+    records = query(path, start, end, camera)
+    frames = len(_frame_times(records))
+    records = records[records['class_id'] != NO_CLASS]
+    totals = {}
+    for c in np.unique(records['class_id']):
+        counts = records['count'][records['class_id'] == c]
+        totals[int(c)] = {'frames': len(counts), 'mean': float(counts.sum()) / frames,
+                          'max': int(counts.max())}
+    return totals
+
+
+def counts_over_time(path, class_id, bin_seconds=3600, start=None, end=None, camera=None):
+    """(bin start times, mean count per frame) for one class.
+
+    Bins with no recorded frames are NaN. E.g. bottles (COCO 39) on camera 2
+    per hour over the last week:
+
+        counts_over_time('detections.evlog', 39, 3600, time.time() - 7 * 86400, camera=2)
+    """
+    records = query(path, start, end, camera)
+    if not len(records):
+        return np.zeros(0), np.zeros(0)
+    origin = records['time'][0] if start is None else start
+    frame_bins = ((_frame_times(records) - origin) // bin_seconds).astype(np.int64)
+    nbins = int(frame_bins.max()) + 1 if end is None else int(np.ceil((end - origin) / bin_seconds))
+
+    hits = records[records['class_id'] == class_id]
+    hit_bins = ((hits['time'] - origin) // bin_seconds).astype(np.int64)
+    frame_counts = np.bincount(frame_bins, minlength=nbins)[:nbins]
+    totals = np.bincount(hit_bins, hits['count'].astype(np.float64), nbins)[:nbins]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(frame_counts > 0, totals / frame_counts, np.nan)
+    return origin + np.arange(nbins) * bin_seconds, means
@@ -0,0 +1,199 @@
+# Local stand-ins for the ESP32-CAM (HTTP and serial), so the Python side
+# can be exercised without the board on the desk.
+
+import os
+import pty
+import socket
+import threading
+import time
+import tty
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .framing import encode_frame
+
+
+# --- HTTP camera: snapshots on /cam-*.jpg and /snap, MJPEG on /stream ---
+class FakeCameraServer:
+    """Serves `jpeg` (bytes, or a callable(path) -> bytes) like the board.
+
+    Headers and body go out in separate writes, as in the esp32cam
+    library's serveJpg. With nodelay=False that interacts with Nagle and
+    delayed ACKs exactly like the board can (~40 ms per keep-alive request
+    on Linux); the default sets TCP_NODELAY. drop_after=n closes every
+    connection after n responses without saying so, like an ESP32 that
+    drops idle sockets. stream_frames=n ends each /stream response after
+    n frames.
+    """
+
+    paths = ('/cam-lo.jpg', '/cam-mid.jpg', '/cam-hi.jpg', '/snap')
+    boundary = 'frame'
+
+    def __init__(self, jpeg, host='127.0.0.1', port=0, fps=10, nodelay=True, drop_after=None,
+                 stream_frames=None):
+        self.jpeg = jpeg if callable(jpeg) else (lambda path: jpeg)
+        self.fps = fps
+        self.nodelay = nodelay
+        self.drop_after = drop_after
+        self.stream_frames = stream_frames
+        self.requests = 0
+        self.connections = 0
+        self.streamed = 0
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like a well-behaved server
+
+            def setup(self):
+                super().setup()
+                if server.nodelay:
+                    self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.served = 0
+                with server.lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                if self.path == '/stream':
+                    self.stream()
+                    return
+                if self.path not in server.paths:
+                    self.send_error(404)
+                    return
+                with server.lock:
+                    server.requests += 1
+                body = server.jpeg(self.path)
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                self.served += 1
+                if server.drop_after and self.served >= server.drop_after:
+                    self.close_connection = True  # no Connection: close header, just gone
+
+            def stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', f'multipart/x-mixed-replace;boundary={server.boundary}')
+                self.end_headers()
+                self.close_connection = True
+                sent = 0
+                try:
+                    while not server.stopping.is_set() and sent != server.stream_frames:
+                        body = server.jpeg(self.path)
+                        self.wfile.write(f"--{server.boundary}\r\nContent-Type: image/jpeg\r\n"
+                                         f"Content-Length: {len(body)}\r\n\r\n".encode())
+                        self.wfile.write(body)
+                        self.wfile.write(b"\r\n")
+                        sent += 1
+                        with server.lock:
+                            server.streamed += 1
+                        time.sleep(1.0 / server.fps)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# --- Serial camera on a pseudo-terminal: answers CAPTURE with length + JPEG ---
+class FakeSerialCamera:
+    """Open `port` with serial.Serial(port, 115200) on the Python side.
+
+    "CAPTURE" is answered with the 4-byte little-endian length and the JPEG,
+    "CAPTUREF" with a framed packet (framing.encode_frame); "PREVIEW" and
+    "PREVIEWF" the same way with the `preview` JPEG (default: the same one).
+    Every reply goes through faults(wire_bytes) first, for fault injection.
+    Other lines (the <...> LCD messages) are collected in `messages`.
+    """
+
+    def __init__(self, jpeg, faults=None, preview=None):
+        self.jpeg = jpeg if callable(jpeg) else (lambda: jpeg)
+        if preview is None:
+            self.preview = self.jpeg
+        else:
+            self.preview = preview if callable(preview) else (lambda: preview)
+        self.faults = faults or (lambda wire: wire)
+        self.seq = 0
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)  # no echo, no newline translation
+        self.port = os.ttyname(self.slave)
+        self.captures = 0
+        self.previews = 0
+        self.messages = []
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def _send(self, wire):
+        self.captures += 1
+        os.write(self.master, self.faults(wire))
+
+    def _image(self, command):
+        if command.startswith(b'PREVIEW'):
+            self.previews += 1
+            return self.preview()
+        return self.jpeg()
+
+    def _run(self):
+        line = b''
+        while not self.stopping.is_set():
+            try:
+                chunk = os.read(self.master, 1024)
+            except OSError:
+                break
+            line += chunk
+            while b'\n' in line:
+                command, line = line.split(b'\n', 1)
+                command = command.strip()
+                if command in (b'CAPTURE', b'PREVIEW'):
+                    data = self._image(command)
+                    self._send(len(data).to_bytes(4, 'little') + data)
+                elif command in (b'CAPTUREF', b'PREVIEWF'):
+                    self._send(encode_frame(self.seq, self._image(command)))
+                    self.seq += 1
+                elif command:
+                    self.messages.append(command.decode(errors='replace'))
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        os.close(self.slave)
+        os.close(self.master)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+
+from .jpeg import decode_reduced
+
+
+# --- Reusable receive buffer: one JPEG at a time, no per-frame allocation ---
+class FrameBuffer:
+    """Preallocated byte buffer filled with readinto() and decoded in place.
+
+    The buffer only grows (doubling) when a bigger frame than any before
+    arrives; in steady state every frame lands in the same memory and
+    cv2.imdecode reads it through a NumPy view.
+    """
+
+    def __init__(self, size=64 * 1024):
+        self.length = 0
+        self._allocate(size)
+
+    def _allocate(self, size):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.array = np.frombuffer(self.buf, dtype=np.uint8)
+
+    def reserve(self, size):
+        if size > len(self.buf):
+            self._allocate(max(size, 2 * len(self.buf)))
+
+    def fill(self, readinto, size):
+        # readinto is e.g. ser.readinto or an HTTP response's readinto
+        self.reserve(size)
+        got = 0
+        while got < size:
+            n = readinto(self.view[got:size])
+            if not n:
+                break
+            got += n
+        self.length = got
+        return got == size
+
+    def fill_response(self, resp):
+        # HTTP response with Content-Length (the ESP32 sketches always send it)
+        size = resp.getheader('Content-Length')
+        if size is None:
+            data = resp.read()
+            self.reserve(len(data))
+            self.view[:len(data)] = data
+            self.length = len(data)
+            return True
+        return self.fill(resp.readinto, int(size))
+
+    def data(self):
+        return self.array[:self.length]
+
+    def decode(self, flags=cv2.IMREAD_COLOR):
+        return cv2.imdecode(self.data(), flags)
+
+    def decode_reduced(self, whT):
+        # (image, scale) at the smallest DCT scale that still covers whT
+        return decode_reduced(self.data(), whT)
@@ -0,0 +1,109 @@
+import struct
+import zlib
+
+# --- Framed serial protocol ---
+#
+#   magic    4 bytes  A5 5A C3 3C
+#   seq      u16      little-endian, wraps at 65536
+#   length   u32      payload bytes
+#   hdr_crc  u16      low 16 bits of CRC-32 over seq + length
+#   payload  length bytes (the JPEG)
+#   crc      u32      CRC-32 over the payload
+#
+# The header CRC lets the receiver reject a corrupted length straight away
+# instead of waiting for bytes that will never come.
+
+MAGIC = b'\xa5\x5a\xc3\x3c'
+HEADER = struct.Struct('<4sHIH')
+TRAILER = struct.Struct('<I')
+
+
+def header_crc(seq, length):
+    return zlib.crc32(struct.pack('<HI', seq, length)) & 0xFFFF
+
+
+# --- Reference encoder (what the ESP32 sends for CAPTUREF) ---
+def encode_frame(seq, payload):
+    seq &= 0xFFFF
+    return (HEADER.pack(MAGIC, seq, len(payload), header_crc(seq, len(payload)))
+            + bytes(payload) + TRAILER.pack(zlib.crc32(payload)))
+
+
+# --- Receiver that resynchronises on the magic word ---
+class FrameReader:
+    """Read framed payloads from anything with read(n) (a serial.Serial).
+
+    Garbage, truncated and corrupted frames are skipped by scanning forward
+    to the next magic word, so one bad byte never desyncs the stream.
+    read_frame() returns (seq, payload) or None when the port times out.
+    """
+
+    def __init__(self, ser, max_length=512 * 1024):
+        self.ser = ser
+        self.max_length = max_length
+        self.pending = bytearray()
+        self.last_seq = None
+        self.frames = 0
+        self.corrupt = 0    # bad header or payload CRC, or cut short
+        self.dropped = 0    # gaps in the sequence numbers (lost or corrupt)
+        self.retried = 0    # bumped by callers that re-request a frame
+        self.skipped_bytes = 0
+
+    def _fill(self, size):
+        while len(self.pending) < size:
+            chunk = self.ser.read(size - len(self.pending))
+            if not chunk:
+                return False
+            self.pending += chunk
+        return True
+
+    def _skip(self, count):
+        del self.pending[:count]
+        self.skipped_bytes += count
+
+    def read_frame(self):
+        while True:
+            if not self._fill(HEADER.size):
+                return None
+
+            start = self.pending.find(MAGIC)
+            if start < 0:
+                self._skip(len(self.pending) - (len(MAGIC) - 1))  # magic may straddle reads
+                continue
+            if start > 0:
+                self._skip(start)
+                continue
+
+            _, seq, length, hcrc = HEADER.unpack_from(self.pending)
+            if hcrc != header_crc(seq, length) or length > self.max_length:
+                self.corrupt += 1
+                self._skip(1)
+                continue
+
+            total = HEADER.size + length + TRAILER.size
+            if not self._fill(total):
+                # Cut short: drop what we have and look for the next frame later
+                self.corrupt += 1
+                self._skip(len(self.pending))
+                return None
+
+            with memoryview(self.pending) as view:
+                payload_crc = zlib.crc32(view[HEADER.size:HEADER.size + length])
+            (crc,) = TRAILER.unpack_from(self.pending, HEADER.size + length)
+            if crc != payload_crc:
+                self.corrupt += 1
+                self._skip(1)  # the next real frame may start inside this one
+                continue
+
+            payload = bytes(self.pending[HEADER.size:HEADER.size + length])
+            del self.pending[:total]
+
+            if self.last_seq is not None:
+                self.dropped += (seq - self.last_seq - 1) & 0xFFFF
+            self.last_seq = seq
+            self.frames += 1
+            return seq, payload
+
+    def stats(self):
+        return {'frames': self.frames, 'corrupt': self.corrupt, 'dropped': self.dropped,
+                'retried': self.retried, 'skipped_bytes': self.skipped_bytes}
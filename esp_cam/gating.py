@@ -0,0 +1,56 @@
+import time
+
+import cv2
+import numpy as np
+
+
+# --- Skip YOLO when the scene hasn't changed since the last inferred frame ---
+class SceneGate:
+    """Cheap change detector in front of the detector.
+
+    Frames are compared as small grayscale thumbnails against the last frame
+    that was actually inferred. should_infer() is False while the mean
+    absolute difference stays under `threshold` (0-255 scale) and the last
+    inference is younger than `refresh_interval` seconds; the caller then
+    reuses `result` from the last update().
+    """
+
+    def __init__(self, threshold=5.0, size=(64, 48), refresh_interval=300.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self.reference = None
+        self.reference_time = None
+        self.result = None
+        self.last_difference = None
+        self.inferred = 0
+        self.skipped = 0
+
+    def thumbnail(self, img):
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def should_infer(self, img):
+        if self.reference is None:
+            return True
+        if self.clock() - self.reference_time >= self.refresh_interval:
+            return True
+
+        self.last_difference = float(np.abs(self.thumbnail(img) - self.reference).mean())
+        if self.last_difference >= self.threshold:
+            return True
+
+        self.skipped += 1
+        return False
+
+    def update(self, img, result):
+        # Call after running the detector on img
+        self.reference = self.thumbnail(img)
+        self.reference_time = self.clock()
+        self.result = result
+        self.inferred += 1
+
+    def reset(self):
+        self.reference = None
+        self.result = None
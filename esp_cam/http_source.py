@@ -0,0 +1,126 @@
+import http.client
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from .metrics import DISABLED
+
+
+# --- One fetched JPEG, tagged with where and when it came from ---
+@dataclass
+class Frame:
+    camera: str
+    seq: int          # per-camera sequence number, starts at 1
+    timestamp: float  # time.time() when the response finished
+    data: bytes
+
+
+# --- ESP32-CAM snapshot endpoint, optionally on a persistent connection ---
+class HttpCamera:
+    """Fetch JPEG snapshots from one camera URL.
+
+    By default every fetch opens a new connection, like urlopen. With
+    keep_alive=True the connection is reused (and reopened once when the
+    board has dropped it), which saves the TCP handshake but is only faster
+    when the server sends headers and body in one segment or sets
+    TCP_NODELAY. The esp32cam library's serveJpg writes them separately, so
+    on the board each keep-alive request can stall on Nagle plus delayed
+    ACK (~40 ms); measure with benchmarks/bench_stages.py before turning it on.
+    """
+
+    def __init__(self, name, url, fps=1.0, timeout=5, keep_alive=False, metrics=None):
+        parts = urlsplit(url)
+        self.name = name
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or '/'
+        self.fps = fps
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.conn = None
+        self.seq = 0
+        self.errors = 0
+        self.connects = 0
+        self.metrics = metrics or DISABLED
+
+    def _get(self):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.connects += 1
+        self.conn.request('GET', self.path, headers={'Connection': 'keep-alive' if self.keep_alive else 'close'})
+        resp = self.conn.getresponse()
+        data = resp.read()
+        if resp.will_close or not self.keep_alive:
+            self.close()
+        return resp.status, data
+
+    def fetch(self):
+        with self.metrics.time('fetch'):
+            return self._fetch()
+
+    def _fetch(self):
+        try:
+            status, data = self._get()
+        except (http.client.HTTPException, OSError):
+            # The ESP32 may have dropped the idle connection (or a new one failed); try once more
+            self.close()
+            try:
+                status, data = self._get()
+            except (http.client.HTTPException, OSError):
+                self.close()
+                self.errors += 1
+                self.metrics.inc('errors')
+                raise
+
+        if status != 200:
+            self.errors += 1
+            self.metrics.inc('errors')
+            raise IOError(f"{self.name}: HTTP {status} from {self.url}")
+
+        self.seq += 1
+        return Frame(self.name, self.seq, time.time(), data)
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# --- Poll several cameras concurrently, each at its own rate ---
+class CameraPoller:
+    def __init__(self, cameras, on_frame, error_delay=1.0):
+        self.cameras = cameras
+        self.on_frame = on_frame
+        self.error_delay = error_delay
+        self.stopping = threading.Event()
+        self.threads = []
+
+    def _poll(self, camera):
+        interval = 1.0 / camera.fps if camera.fps else 0.0
+        next_time = time.monotonic()
+        while not self.stopping.is_set():
+            try:
+                self.on_frame(camera.fetch())
+            except Exception as e:
+                print(f"[{camera.name}] Error fetching image: {e}")
+                next_time = time.monotonic() + self.error_delay
+
+            # Fixed rate, but never try to catch up on missed slots
+            next_time = max(next_time + interval, time.monotonic())
+            self.stopping.wait(next_time - time.monotonic())
+        camera.close()
+
+    def start(self):
+        self.stopping.clear()
+        for camera in self.cameras:
+            t = threading.Thread(target=self._poll, args=(camera,), name=camera.name, daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def stop(self):
+        self.stopping.set()
+        for t in self.threads:
+            t.join(timeout=10)
+        self.threads = []
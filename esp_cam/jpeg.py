@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+
+# JPEG start-of-frame markers carry the image size (C4, C8 and CC are not SOF)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+# --- Read (width, height) from the JPEG header without decoding ---
+def jpeg_size(data):
+    view = memoryview(data).cast('B')
+    i = 2  # skip SOI
+    while i + 4 <= len(view):
+        if view[i] != 0xFF:
+            return None
+        marker = view[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        length = (view[i + 2] << 8) | view[i + 3]
+        if marker in SOF_MARKERS and i + 9 <= len(view):
+            height = (view[i + 5] << 8) | view[i + 6]
+            width = (view[i + 7] << 8) | view[i + 8]
+            return width, height
+        if marker == 0xDA:  # start of scan: no SOF before the image data
+            return None
+        i += 2 + length
+    return None
+
+
+# --- Largest DCT-domain reduction that still leaves >= whT pixels per side ---
+def reduction_for(width, height, whT):
+    for factor in (8, 4, 2):
+        if min(width, height) // factor >= whT:
+            return factor
+    return 1
+
+
+def decode_reduced(data, whT):
+    """Decode a JPEG at the smallest 1/2, 1/4 or 1/8 scale that still covers whT.
+
+    blobFromImage shrinks every frame to whT x whT anyway, so decoding the
+    full /cam-hi.jpg first is wasted work. Returns (image, scale) where
+    scale is the factor from image pixels back to the original frame; pass
+    it to Detections.scaled() to get boxes in original-frame coordinates.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    size = jpeg_size(buf)
+    factor = reduction_for(*size, whT) if size else 1
+    img = cv2.imdecode(buf, REDUCED_FLAGS[factor])
+    if img is None or factor == 1:
+        return img, 1.0
+    return img, size[0] / img.shape[1]
@@ -0,0 +1,196 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Timer:
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = self.metrics.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, self.metrics.clock() - self.start)
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+NO_TIMER = _NoTimer()
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# --- Per-stage timings, counters and gauges for the main loops ---
+class Metrics:
+    """Rolling per-stage latency plus counters, cheap enough to leave on.
+
+        with metrics.time('inference'):
+            ...
+        metrics.inc('timeouts')
+
+    Each stage keeps its last `window` durations (a deque, so recording is
+    O(1)); percentiles are only computed when a snapshot is taken. Counters
+    only go up; gauges hold the latest value (e.g. the current whT).
+
+    Results are available as snapshot() / to_json(), as a one-line summary
+    every `log_interval` seconds via maybe_log(), and in Prometheus text
+    format from prometheus() or serve(). enabled=False turns every call
+    into a no-op.
+    """
+
+    def __init__(self, enabled=True, window=512, log_interval=30.0, clock=time.monotonic, log=print):
+        self.enabled = enabled
+        self.window = window
+        self.log_interval = log_interval
+        self.clock = clock
+        self.log = log
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.totals = defaultdict(float)  # seconds since start, per stage
+        self.calls = defaultdict(int)     # observations since start, per stage
+        self.counters = defaultdict(int)
+        self.gauges = {}
+        self.started = clock()
+        self.last_log = self.started
+        self.server = None
+
+    def time(self, stage):
+        return _Timer(self, stage) if self.enabled else NO_TIMER
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.samples[stage].append(seconds)
+            self.totals[stage] += seconds
+            self.calls[stage] += 1
+
+    def inc(self, counter, n=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[counter] += n
+
+    def set_gauge(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        with self.lock:
+            samples = {stage: sorted(values) for stage, values in self.samples.items()}
+            totals, calls = dict(self.totals), dict(self.calls)
+            counters, gauges = dict(self.counters), dict(self.gauges)
+        uptime = self.clock() - self.started
+
+        stages = {}
+        for stage, ordered in samples.items():
+            if not ordered:
+                continue
+            stages[stage] = {
+                'count': calls[stage],
+                'rate': calls[stage] / uptime if uptime > 0 else 0.0,
+                'mean_ms': sum(ordered) / len(ordered) * 1000,
+                'p50_ms': _percentile(ordered, 0.50) * 1000,
+                'p95_ms': _percentile(ordered, 0.95) * 1000,
+                'p99_ms': _percentile(ordered, 0.99) * 1000,
+                'max_ms': ordered[-1] * 1000,
+                'total_s': totals[stage],
+            }
+        return {'uptime_s': uptime, 'stages': stages, 'counters': counters, 'gauges': gauges}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            f.write(self.to_json(indent=2))
+
+    def log_line(self):
+        snap = self.snapshot()
+        parts = [f"{stage} p50 {s['p50_ms']:.1f}ms p95 {s['p95_ms']:.1f}ms {s['rate']:.2f}/s"
+                 for stage, s in snap['stages'].items()]
+        parts += [f"{name}={value}" for name, value in sorted(snap['counters'].items())]
+        parts += [f"{name}={value}" for name, value in sorted(snap['gauges'].items())]
+        return "[Metrics] " + (" | ".join(parts) or "no data yet")
+
+    def maybe_log(self):
+        # Call from the main loop; logs at most once per log_interval
+        if not self.enabled or not self.log_interval:
+            return
+        now = self.clock()
+        if now - self.last_log >= self.log_interval:
+            self.last_log = now
+            self.log(self.log_line())
+
+    def prometheus(self, prefix='esp_cam'):
+        snap = self.snapshot()
+        lines = [f"# TYPE {prefix}_stage_seconds summary"]
+        for stage, s in snap['stages'].items():
+            for q, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('0.99', 'p99_ms')):
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {s[key] / 1000:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {s["total_s"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+        for name, value in sorted(snap['counters'].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in sorted(snap['gauges'].items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        lines.append(f"{prefix}_uptime_seconds {snap['uptime_s']:.3f}")
+        return "\n".join(lines) + "\n"
+
+    # --- Optional local endpoint: /metrics (Prometheus) and /metrics.json ---
+    def serve(self, port=9100, host='127.0.0.1'):
+        if not self.enabled:
+            return None
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = metrics.prometheus(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, content_type = metrics.to_json(), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True).start()
+        return self.server
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+# Shared disabled instance: the default wherever metrics are optional
+DISABLED = Metrics(enabled=False)
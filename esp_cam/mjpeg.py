@@ -0,0 +1,96 @@
+import http.client
+import time
+from urllib.parse import urlsplit
+
+from .http_source import Frame
+
+SOI = b'\xff\xd8'  # JPEG start of image
+EOI = b'\xff\xd9'  # JPEG end of image
+
+
+# --- multipart/x-mixed-replace MJPEG reader: one request, many frames ---
+class MjpegStream:
+    """Frame source for an ESP32-CAM MJPEG stream (e.g. /stream).
+
+    Frames are cut out of the response at the JPEG start/end markers, so the
+    part headers and boundary strings don't need to be parsed. read()
+    returns the next Frame and reopens the stream if it was closed.
+    """
+
+    def __init__(self, url, name=None, timeout=5, chunk_size=16384, max_frame=2 * 1024 * 1024):
+        parts = urlsplit(url)
+        self.url = url
+        self.name = name or url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or '/'
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.max_frame = max_frame
+        self.conn = None
+        self.resp = None
+        self.buf = bytearray()
+        self.scan_from = 0
+        self.seq = 0
+
+    def open(self):
+        self.close()
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        self.conn.request('GET', self.path)
+        resp = self.conn.getresponse()
+        content_type = resp.getheader('Content-Type', '')
+        if resp.status != 200 or not content_type.startswith('multipart/'):
+            self.close()
+            raise IOError(f"{self.url}: not an MJPEG stream (HTTP {resp.status}, {content_type!r})")
+        self.resp = resp
+
+    def _next_jpeg(self):
+        buf = self.buf
+        start = buf.find(SOI)
+        if start < 0:
+            del buf[:-1]  # keep a trailing 0xFF, it may be half a marker
+            return None
+        if start > 0:
+            del buf[:start]  # boundary and part headers
+            self.scan_from = 0
+
+        end = buf.find(EOI, max(2, self.scan_from))
+        if end < 0:
+            if len(buf) > self.max_frame:
+                del buf[:]  # no end marker in sight, resync on the next SOI
+            self.scan_from = max(2, len(buf) - 1)
+            return None
+
+        jpeg = bytes(buf[:end + 2])
+        del buf[:end + 2]
+        self.scan_from = 0
+        return jpeg
+
+    def read(self):
+        if self.resp is None:
+            self.open()
+        try:
+            while True:
+                jpeg = self._next_jpeg()
+                if jpeg is not None:
+                    self.seq += 1
+                    return Frame(self.name, self.seq, time.time(), jpeg)
+                chunk = self.resp.read1(self.chunk_size)
+                if not chunk:
+                    raise IOError(f"{self.url}: stream ended")
+                self.buf += chunk
+        except (http.client.HTTPException, OSError):
+            self.close()
+            raise
+
+    def __iter__(self):
+        while True:
+            yield self.read()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = None
+        self.resp = None
+        del self.buf[:]
+        self.scan_from = 0
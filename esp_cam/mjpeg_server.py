@@ -0,0 +1,139 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+
+# --- Re-serve the latest (annotated) frame to any number of viewers ---
+class MjpegServer:
+    """MJPEG on /stream (and /), a single JPEG on /latest.jpg.
+
+    Frames come from a Display, so the ESP32 only ever sees the detection
+    script's own requests however many people are watching. Each new frame
+    is annotated and JPEG-encoded once, by whichever client needs it first,
+    and the same bytes go to everyone. Clients always get the newest frame,
+    skipping any they were too slow for; a client whose socket stays
+    blocked for `send_timeout` seconds is disconnected instead of buffered.
+    """
+
+    boundary = 'frame'
+
+    def __init__(self, display, host='0.0.0.0', port=8080, annotate=True, quality=80, fps=10,
+                 send_timeout=2.0, max_clients=16):
+        self.display = display
+        self.annotate = annotate
+        self.quality = quality
+        self.interval = 1.0 / fps
+        self.send_timeout = send_timeout
+        self.max_clients = max_clients
+        self.lock = threading.Lock()
+        self.cached = (None, None)  # (display seq, jpeg bytes)
+        self.clients = 0
+        self.encoded = 0
+        self.served = 0
+        self.dropped = 0
+        self.stopping = threading.Event()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def latest_jpeg(self):
+        # (seq, bytes) of the newest frame, encoded at most once per frame
+        with self.lock:
+            if self.cached[1] is not None and self.cached[0] == self.display.seq:
+                return self.cached
+            seq, img = self.display.snapshot_seq(self.annotate)
+            if img is None:
+                return seq, None
+            if self.cached[0] != seq:
+                ok, jpeg = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if not ok:
+                    return seq, None
+                self.cached = (seq, jpeg.tobytes())
+                self.encoded += 1
+            return self.cached
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if self.path in ('/', '/stream'):
+                    self.stream()
+                elif self.path == '/latest.jpg':
+                    self.snapshot()
+                else:
+                    self.send_error(404)
+
+            def snapshot(self):
+                _, body = server.latest_jpeg()
+                if body is None:
+                    self.send_error(503, "No frame yet")
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def stream(self):
+                with server.lock:
+                    if server.clients >= server.max_clients:
+                        self.send_error(503, "Too many viewers")
+                        return
+                    server.clients += 1
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Type', f'multipart/x-mixed-replace;boundary={server.boundary}')
+                    self.send_header('Cache-Control', 'no-store')
+                    self.end_headers()
+                    self.close_connection = True
+                    self.connection.settimeout(server.send_timeout)
+
+                    seq = None
+                    while not server.stopping.is_set():
+                        server.display.wait_new(seq, timeout=1.0)
+                        seq, body = server.latest_jpeg()
+                        if body is None:
+                            continue
+                        sent = time.monotonic()
+                        self.wfile.write(f"--{server.boundary}\r\nContent-Type: image/jpeg\r\n"
+                                         f"Content-Length: {len(body)}\r\n\r\n".encode())
+                        self.wfile.write(body)
+                        self.wfile.write(b"\r\n")
+                        with server.lock:
+                            server.served += 1
+                        server.stopping.wait(max(0.0, server.interval - (time.monotonic() - sent)))
+                except socket.timeout:
+                    with server.lock:
+                        server.dropped += 1  # too slow: disconnect rather than queue frames
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with server.lock:
+                        server.clients -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mjpeg-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
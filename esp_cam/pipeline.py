@@ -0,0 +1,120 @@
+import collections
+import threading
+import time
+
+from .metrics import DISABLED
+
+
+# --- Bounded queue that drops the oldest item when full ---
+class LatestQueue:
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self.items = collections.deque()
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        # Returns True if an older item was dropped to make room
+        with self.cond:
+            dropped = len(self.items) >= self.maxsize
+            if dropped:
+                self.items.popleft()  # stale frame, nobody will want it now
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+        return dropped
+
+    def get(self, timeout=None):
+        # Returns None once closed, or when the timeout runs out
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.items or self.closed, timeout):
+                return None
+            if self.items:
+                return self.items.popleft()
+            return None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+# --- fetch -> decode -> infer threads, output on the caller's thread ---
+class Pipeline:
+    """Run the per-frame stages concurrently so fetch and inference overlap.
+
+    fetch() returns raw bytes, decode(data) returns an image, infer(image)
+    returns whatever output(result) needs. A stage that raises or returns
+    None drops that frame. Queues between stages hold `maxsize` items and
+    drop the oldest, so inference always works on the freshest frame.
+    """
+
+    def __init__(self, fetch, decode, infer, maxsize=1, error_delay=0.5, metrics=None):
+        self.stages = [("fetch", fetch), ("decode", decode), ("infer", infer)]
+        self.queues = [LatestQueue(maxsize) for _ in self.stages]
+        self.error_delay = error_delay
+        self.running = threading.Event()
+        self.threads = []
+        self.processed = collections.Counter()
+        self.errors = collections.Counter()
+        self.metrics = metrics or DISABLED  # counts errors and skipped (dropped) frames
+
+    @property
+    def dropped(self):
+        return {name: q.dropped for (name, _), q in zip(self.stages, self.queues)}
+
+    def _worker(self, index):
+        name, fn = self.stages[index]
+        in_q = self.queues[index - 1] if index > 0 else None
+        out_q = self.queues[index]
+
+        while self.running.is_set():
+            if in_q is None:
+                args = ()
+            else:
+                item = in_q.get(timeout=0.5)
+                if item is None:
+                    continue
+                args = (item,)
+
+            try:
+                result = fn(*args)
+            except Exception as e:
+                print(f"[Pipeline] Error in {name}: {e}")
+                self.errors[name] += 1
+                self.metrics.inc('errors')
+                if in_q is None:
+                    time.sleep(self.error_delay)  # don't hammer a camera that is down
+                continue
+
+            if result is not None:
+                self.processed[name] += 1
+                if out_q.put(result):
+                    self.metrics.inc('skipped')
+
+    def start(self):
+        self.running.set()
+        for index, (name, _) in enumerate(self.stages):
+            t = threading.Thread(target=self._worker, args=(index,), name=name, daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def stop(self):
+        self.running.clear()
+        for q in self.queues:
+            q.close()
+        for t in self.threads:
+            t.join(timeout=2)
+        self.threads = []
+
+    def run(self, output):
+        # output(result) runs here (GUI calls need the main thread); return False to stop
+        self.start()
+        try:
+            while self.running.is_set():
+                result = self.queues[-1].get(timeout=0.5)
+                if result is not None and output(result) is False:
+                    break
+        finally:
+            self.stop()
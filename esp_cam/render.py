@@ -0,0 +1,14 @@
+import cv2
+from collections import defaultdict
+
+
+# --- Draw boxes and "<label> <n>" text onto a frame (in place) ---
+def draw_detections(img, detections, text="{label} {n}", upper=False):
+    seen = defaultdict(int)
+    for (x, y, w, h), label in zip(detections.boxes.tolist(), detections.labels):
+        seen[label] += 1
+        shown = label.upper() if upper else label
+        cv2.rectangle(img, (x, y), (x + w, y + h), (255, 0, 255), 2)
+        cv2.putText(img, text.format(label=shown, n=seen[label]), (x, y - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 255), 2)
+    return img
@@ -0,0 +1,76 @@
+import time
+
+
+# --- Move the network input size up and down with the measured latency ---
+class ResolutionScaler:
+    """Pick whT from `sizes` at runtime to keep detect() near target_ms.
+
+    Wraps a Detector: detect(img) times the call and feeds a smoothed
+    latency (EWMA, like AdaptiveScheduler). Over target_ms it steps down to
+    the next smaller size; when the next larger size, scaled by pixel
+    count, is predicted to fit in headroom * target_ms it steps up. Only
+    detector.whT changes: blobFromImage uses it on the next frame and the
+    network is never reloaded. The first `settle` frames after a change
+    are not counted, since they include the re-allocation for the new
+    input shape.
+
+    The current size is published as the 'whT' gauge in the detector's
+    metrics.
+    """
+
+    def __init__(self, detector, sizes=(224, 320, 416), target_ms=250.0, headroom=0.7,
+                 smoothing=0.3, settle=2, clock=time.perf_counter):
+        self.detector = detector
+        self.sizes = sorted(sizes)
+        self.target_ms = target_ms
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.settle = settle
+        self.clock = clock
+        # Start from the detector's size, or the nearest configured one
+        self.index = min(range(len(self.sizes)), key=lambda i: abs(self.sizes[i] - detector.whT))
+        self.latency = None  # smoothed seconds per detect()
+        self.skip = 0
+        self.changes = 0
+        self._apply()
+
+    @property
+    def whT(self):
+        return self.sizes[self.index]
+
+    def _apply(self):
+        self.detector.whT = self.whT
+        self.detector.metrics.set_gauge('whT', self.whT)
+
+    def step(self, delta):
+        old = self.whT
+        self.index += delta
+        self._apply()
+        self.latency = None
+        self.skip = self.settle
+        self.changes += 1
+        print(f"[Resolution] whT {old} -> {self.whT}")
+
+    def record(self, seconds):
+        if self.skip:
+            self.skip -= 1
+            return
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += self.smoothing * (seconds - self.latency)
+
+        latency_ms = self.latency * 1000
+        if latency_ms > self.target_ms and self.index > 0:
+            self.step(-1)
+        elif self.index < len(self.sizes) - 1:
+            # Forward cost grows with the number of input pixels
+            predicted = latency_ms * (self.sizes[self.index + 1] / self.whT) ** 2
+            if predicted < self.target_ms * self.headroom:
+                self.step(+1)
+
+    def detect(self, img):
+        start = self.clock()
+        detections = self.detector.detect(img)
+        self.record(self.clock() - start)
+        return detections
@@ -0,0 +1,71 @@
+import time
+
+
+# --- Decide when to capture/detect next from latency, CPU budget and activity ---
+class AdaptiveScheduler:
+    """Replaces fixed sleeps and fixed detection timers.
+
+    After each detection call record(latency, counts). The interval shrinks
+    by `speedup` when the counts changed and grows by `backoff` when they
+    didn't, within [min_interval, max_interval]. It never drops below
+    latency / cpu_budget, so detection uses at most that share of the time.
+    Errors back off exponentially from `error_delay`.
+
+    clock and sleep are injectable so the schedule can be driven by a fake
+    clock.
+    """
+
+    def __init__(self, min_interval=2.0, max_interval=60.0, start_interval=None, start_delay=0.0, cpu_budget=0.5,
+                 speedup=0.5, backoff=1.5, error_delay=1.0, smoothing=0.3,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cpu_budget = cpu_budget
+        self.speedup = speedup
+        self.backoff = backoff
+        self.error_delay = error_delay
+        self.smoothing = smoothing
+        self.clock = clock
+        self.sleep = sleep
+
+        self.interval = start_interval if start_interval is not None else min_interval
+        self.latency = None       # smoothed seconds per detection
+        self.last_counts = None
+        self.errors_in_row = 0
+        self.next_time = clock() + start_delay
+
+    def due(self):
+        return self.clock() >= self.next_time
+
+    def remaining(self):
+        return max(0.0, self.next_time - self.clock())
+
+    def wait(self):
+        delay = self.remaining()
+        if delay > 0:
+            self.sleep(delay)
+
+    def record(self, latency, counts=None):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+
+        counts = dict(counts or {})
+        if self.last_counts is not None and counts != self.last_counts:
+            self.interval *= self.speedup   # something moved: look again soon
+        else:
+            self.interval *= self.backoff   # quiet: back off
+        self.interval = min(self.max_interval, max(self.min_interval, self.interval))
+        self.last_counts = counts
+        self.errors_in_row = 0
+
+        floor = self.latency / self.cpu_budget if self.cpu_budget else 0.0
+        self.next_time = self.clock() + max(self.interval, floor)
+        return self.next_time
+
+    def record_error(self):
+        delay = min(self.max_interval, self.error_delay * 2 ** self.errors_in_row)
+        self.errors_in_row += 1
+        self.next_time = self.clock() + delay
+        return self.next_time
@@ -0,0 +1,242 @@
+import queue
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+from .frame_buffer import FrameBuffer
+from .framing import FrameReader
+from .metrics import DISABLED
+
+
+# --- One JPEG received over serial, tagged so results can be matched to it ---
+@dataclass
+class SerialFrame:
+    seq: int
+    captured_at: float  # time.time() when CAPTURE was sent
+    received_at: float  # time.time() when the last byte arrived
+    size: int           # JPEG bytes on the wire
+    image: np.ndarray = None
+    preview: bool = False  # small low-quality frame, for display only
+
+    @property
+    def mode(self):
+        return 'preview' if self.preview else 'full'
+
+
+# --- Bytes and capture-to-result latency per capture mode ---
+class TransferStats:
+    def __init__(self):
+        self.frames = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self.results = defaultdict(int)
+        self.latency = defaultdict(float)  # summed seconds, capture -> result
+
+    def add_frame(self, frame):
+        self.frames[frame.mode] += 1
+        self.bytes[frame.mode] += frame.size
+
+    def add_result(self, frame):
+        self.results[frame.mode] += 1
+        self.latency[frame.mode] += time.time() - frame.captured_at
+
+    def report(self):
+        parts = []
+        for mode in sorted(self.frames):
+            line = f"{mode}: {self.frames[mode]} frames, {self.bytes[mode] / 1024:.1f} kB"
+            if self.results[mode]:
+                line += f", capture-to-result {self.latency[mode] / self.results[mode]:.2f}s avg"
+            parts.append(line)
+        return "; ".join(parts)
+
+
+# --- ESP32-CAM on the serial CAPTURE protocol ---
+# Legacy: CAPTURE -> 4-byte little-endian length + JPEG.
+# framed=True: CAPTUREF -> magic/seq/length/CRC frame (see framing.py), with
+# resync on corruption and up to `retries` re-requests per capture.
+# preview=True asks for PREVIEW / PREVIEWF instead: a small, low-quality frame.
+# Lengths over max_length are rejected before any buffer is allocated.
+class SerialCamera:
+    def __init__(self, ser, verbose=True, framed=False, retries=2, metrics=None, max_length=512 * 1024):
+        self.ser = ser
+        self.verbose = verbose
+        self.max_length = max_length  # bigger "lengths" are text or noise, not a JPEG
+        self.reader = FrameReader(ser, max_length) if framed else None
+        self.retries = retries
+        self.header = bytearray(4)
+        self.frame_buffer = FrameBuffer()  # JPEG bytes land here, every frame
+        self.write_lock = threading.Lock()  # CAPTURE and LCD messages share the port
+        self.seq = 0
+        self.stats = TransferStats()
+        self.metrics = metrics or DISABLED
+
+    def write(self, data):
+        with self.write_lock:
+            self.ser.write(data)
+
+    def discard_input(self, quiet=0.2):
+        # Drop bytes until the port has been quiet for `quiet` seconds
+        timeout, self.ser.timeout = self.ser.timeout, quiet
+        try:
+            while self.ser.read(4096):
+                pass
+        finally:
+            self.ser.timeout = timeout
+
+    def request_image(self, preview=False):
+        command = "PREVIEW" if preview else "CAPTURE"
+        if self.reader is not None:
+            command += "F"
+        self.write(f"{command}\n".encode())
+        if self.verbose:
+            print(f"[Python] Sent: {command}")
+
+    def receive_image(self):
+        # Fills self.frame_buffer; returns the JPEG length, or None on error
+        if self.ser.readinto(self.header) != 4:
+            print("[Error] Timeout or no data received")
+            self.metrics.inc('timeouts')
+            return None
+
+        img_len = int.from_bytes(self.header, 'little')
+        if not 0 < img_len <= self.max_length:
+            # e.g. the sketch's "LCD Line1: ..." echo read as a header ("LCD " = 541 MB)
+            print(f"[Error] Bad image length {img_len} (header {bytes(self.header)!r}), discarding input")
+            self.metrics.inc('errors')
+            self.discard_input()
+            return None
+        if self.verbose:
+            print(f"[Python] Receiving {img_len} bytes...")
+
+        if not self.frame_buffer.fill(self.ser.readinto, img_len):
+            print("[Error] Incomplete image received")
+            self.metrics.inc('errors')
+            return None
+        return img_len
+
+    def capture_framed(self, preview=False):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.reader.retried += 1
+                self.metrics.inc('retries')
+                print(f"[Python] Retrying capture ({attempt}/{self.retries})")
+            captured_at = time.time()
+            self.request_image(preview)
+            with self.metrics.time('transfer'):
+                result = self.reader.read_frame()
+            if result is None:
+                print("[Error] No valid frame received", self.reader.stats())
+                self.metrics.inc('timeouts')
+                continue
+
+            seq, payload = result
+            with self.metrics.time('decode'):
+                image = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                self.metrics.inc('errors')
+                continue
+            if self.verbose:
+                print(f"[Python] Received frame #{seq} ({len(payload)} bytes)")
+            return SerialFrame(seq, captured_at, time.time(), len(payload), image, preview)
+        return None
+
+    def capture(self, preview=False):
+        with self.metrics.time('capture'):
+            if self.reader is not None:
+                frame = self.capture_framed(preview)
+            else:
+                frame = self.capture_legacy(preview)
+        if frame is not None:
+            self.stats.add_frame(frame)
+        return frame
+
+    def capture_legacy(self, preview=False):
+        captured_at = time.time()
+        self.request_image(preview)
+        with self.metrics.time('transfer'):
+            img_len = self.receive_image()
+        if img_len is None:
+            return None
+
+        self.seq += 1
+        with self.metrics.time('decode'):
+            image = self.frame_buffer.decode()  # decoded before the buffer is reused
+        if image is None:
+            self.metrics.inc('errors')
+            return None
+        return SerialFrame(self.seq, captured_at, time.time(), img_len, image, preview)
+
+
+# --- Double buffering: frame N+1 crosses the link while frame N is inferred ---
+class CaptureAhead:
+    """Keep one CAPTURE in flight on a background thread.
+
+    As soon as get() hands a frame to the caller, the next CAPTURE is sent
+    and received (and decoded) in the background. Each SerialFrame carries
+    its capture timestamp and sequence number.
+
+    With preview=True the background frames are previews; request_full()
+    makes the next capture a full-quality one (e.g. when a detection is due).
+
+    A capture that raises (port unplugged, ...) is counted in `errors` and
+    retried after error_delay seconds; the thread keeps running. Use
+    get(timeout) so the caller's loop stays responsive meanwhile.
+    """
+
+    def __init__(self, camera, preview=False, error_delay=1.0):
+        self.camera = camera
+        self.preview = preview
+        self.error_delay = error_delay
+        self.errors = 0
+        self.want_full = threading.Event()
+        self.ready = queue.Queue(maxsize=1)
+        self.taken = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def _run(self):
+        while not self.stopping.is_set():
+            full = self.want_full.is_set() or not self.preview
+            try:
+                frame = self.camera.capture(preview=not full)
+            except Exception as e:
+                self.errors += 1
+                self.camera.metrics.inc('errors')
+                print(f"[Error] Capture failed: {e}")
+                self.stopping.wait(self.error_delay)
+                continue
+            if frame is None:
+                continue
+            if full:
+                self.want_full.clear()
+            self.ready.put(frame)
+            # Next CAPTURE goes out the moment the caller picks this one up
+            while not self.stopping.is_set() and not self.taken.wait(0.5):
+                pass
+            self.taken.clear()
+
+    def start(self):
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="capture-ahead", daemon=True)
+        self.thread.start()
+        return self
+
+    def request_full(self):
+        self.want_full.set()
+
+    def get(self, timeout=None):
+        try:
+            frame = self.ready.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.taken.set()
+        return frame
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.camera.ser.timeout or 5)
+            self.thread = None
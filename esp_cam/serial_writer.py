@@ -0,0 +1,141 @@
+import threading
+import time
+
+from .metrics import DISABLED
+
+
+# --- LCD / serial messages from a writer thread, newest message wins ---
+class SerialWriter:
+    """Non-blocking output channel for the <label:count,...> messages.
+
+    send(text) only puts text in a one-message slot and returns; a writer
+    thread does the actual port.write (and flush, if the port has one). The
+    16x2 LCD is cleared and redrawn on every message, so the thread:
+
+    - skips text equal to what the LCD already shows (suppressed), unless
+      suppress_repeats=False, for sketches that overwrite the LCD
+      themselves (e.g. "Capturing..." on every CAPTURE),
+    - waits until the text has been stable for `debounce` seconds, but no
+      longer than `max_delay` after the first unsent message,
+    - sends at most once per `min_interval`,
+    - replaces a message that hasn't gone out yet (dropped).
+
+    A slow or unplugged port only holds up the writer thread; a failed
+    write is counted in `errors` (and dropped) and the next message tries
+    again. `port` is a serial.Serial or a SerialCamera (whose write shares
+    the lock with CAPTURE requests).
+    """
+
+    def __init__(self, port, min_interval=0.5, debounce=0.3, max_delay=2.0, suppress_repeats=True, verbose=True,
+                 metrics=None, clock=time.monotonic):
+        self.port = port
+        self.suppress_repeats = suppress_repeats
+        self.min_interval = min_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.verbose = verbose
+        self.metrics = metrics or DISABLED
+        self.clock = clock
+        self.changed = threading.Condition()
+        self.pending = None      # text waiting to go out
+        self.pending_at = None   # when it last changed
+        self.first_at = None     # when the slot was last filled from empty
+        self.last_text = None    # what the LCD shows
+        self.last_sent_at = None
+        self.stopping = False
+        self.thread = None
+        self.sent = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def send(self, text):
+        with self.changed:
+            if text == self.pending:
+                self._count('suppressed')
+                return
+            if self.pending is not None:
+                self._count('dropped')
+            if self.suppress_repeats and text == self.last_text:
+                # Back to what is already on the LCD: nothing to send
+                self.pending = None
+                self._count('suppressed')
+                return
+            now = self.clock()
+            self.pending = text
+            self.pending_at = now
+            if self.first_at is None:
+                self.first_at = now
+            self.changed.notify()
+
+    def _count(self, name, n=1):
+        setattr(self, name, getattr(self, name) + n)
+        self.metrics.inc(f"serial_{name}", n)
+
+    def _due(self):
+        due = min(self.pending_at + self.debounce, self.first_at + self.max_delay)
+        if self.last_sent_at is not None:
+            due = max(due, self.last_sent_at + self.min_interval)
+        return due
+
+    def _next(self):
+        # Block until a message is due; None once stopped with nothing left
+        with self.changed:
+            while True:
+                if self.pending is None:
+                    if self.stopping:
+                        return None
+                    self.changed.wait()
+                    continue
+                wait = self._due() - self.clock()
+                if wait <= 0 or self.stopping:
+                    text, self.pending, self.first_at = self.pending, None, None
+                    return text
+                self.changed.wait(wait)
+
+    def _write(self, text):
+        try:
+            with self.metrics.time('serial_send'):
+                self.port.write(text.encode())
+                if hasattr(self.port, 'flush'):
+                    self.port.flush()
+            return True
+        except Exception as e:
+            print(f"[Serial] Error sending {text.strip()}: {e}")
+            return False
+
+    def _run(self):
+        while True:
+            text = self._next()
+            if text is None:
+                break
+            ok = self._write(text)
+            with self.changed:
+                self.last_sent_at = self.clock()
+                if ok:
+                    self.last_text = text
+                    self._count('sent')
+                else:
+                    self._count('errors')
+                    self._count('dropped')
+            if ok and self.verbose:
+                print(f"[Serial] Sent: {text.strip()}")
+
+    def report(self):
+        return (f"{self.sent} sent, {self.suppressed} suppressed, {self.dropped} dropped"
+                + (f", {self.errors} errors" if self.errors else ""))
+
+    def start(self):
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, name="serial-writer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        # A message still waiting goes out now (unless the port is stuck)
+        with self.changed:
+            self.stopping = True
+            self.changed.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
@@ -0,0 +1,164 @@
+from collections import defaultdict
+
+import numpy as np
+
+from .detector import Detections, empty_detections
+
+
+def iou_matrix(a, b):
+    # IoU between every (x, y, w, h) box in a and every box in b
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+
+    iw = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    ih = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = iw * ih
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+# --- One tracked object ---
+class Track:
+    def __init__(self, track_id, box, class_id, label, confidence):
+        self.id = track_id
+        self.box = np.asarray(box, np.float64)  # x, y, w, h
+        self.velocity = np.zeros(2)             # pixels per frame, box centre
+        self.class_id = class_id
+        self.label = label
+        self.confidence = confidence            # decays while only predicted
+        self.hits = 1
+        self.misses = 0                         # detector runs without a match
+        self.since_update = 0                   # frames since the last match
+
+    def predict(self, decay):
+        self.box[:2] += self.velocity
+        self.confidence *= decay
+        self.since_update += 1
+
+    def update(self, box, confidence, smoothing):
+        box = np.asarray(box, np.float64)
+        if self.since_update:
+            # Box was already moved by the old velocity; blend in the correction
+            correction = (box[:2] - self.box[:2]) / self.since_update
+            self.velocity += smoothing * correction
+        self.box = box
+        self.confidence = confidence
+        self.hits += 1
+        self.misses = 0
+        self.since_update = 0
+
+
+# --- IoU + constant-velocity tracker: the detector runs every N frames ---
+class IouTracker:
+    """Carry boxes and IDs between detector runs.
+
+    Call step(img, detect) once per frame. The detector runs on the first
+    frame, every `detect_every` frames after that, and early whenever a
+    confirmed track's confidence has decayed below `min_confidence`. In
+    between, tracks move at their estimated velocity. Detections are matched
+    to tracks of the same class greedily by IoU; a track is confirmed after
+    `min_hits` matches and dropped after `max_misses` detector runs without
+    one.
+
+    counts() counts confirmed tracks per label, so a box that disappears for
+    a single detector run doesn't change the count. `seen` holds the number
+    of distinct track IDs per label since the start.
+    """
+
+    def __init__(self, detect_every=5, iou_threshold=0.3, min_hits=2, max_misses=2,
+                 decay=0.95, min_confidence=0.3, smoothing=0.5):
+        self.detect_every = detect_every
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.decay = decay
+        self.min_confidence = min_confidence
+        self.smoothing = smoothing
+        self.tracks = []
+        self.next_id = 1
+        self.frames = 0
+        self.detector_runs = 0
+        self.since_detect = None
+        self.seen = defaultdict(int)
+
+    def confirmed(self):
+        return [t for t in self.tracks if t.hits >= self.min_hits]
+
+    def needs_detection(self):
+        if self.since_detect is None or self.since_detect + 1 >= self.detect_every:
+            return True
+        return any(t.confidence < self.min_confidence for t in self.confirmed())
+
+    def predict(self):
+        for track in self.tracks:
+            track.predict(self.decay)
+
+    def update(self, detections):
+        tracks = self.tracks
+        matched_tracks, matched_dets = set(), set()
+
+        if tracks and len(detections):
+            iou = iou_matrix(np.array([t.box for t in tracks]), detections.boxes.astype(np.float64))
+            same_class = np.array([t.class_id for t in tracks])[:, None] == detections.class_ids[None, :]
+            iou[~same_class] = 0
+
+            # Greedy: best remaining pair first
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                ti, di = np.unravel_index(flat, iou.shape)
+                if iou[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                tracks[ti].update(detections.boxes[di], float(detections.confidences[di]), self.smoothing)
+                if tracks[ti].hits == self.min_hits:
+                    self.seen[tracks[ti].label] += 1  # counted once, when confirmed
+                matched_tracks.add(ti)
+                matched_dets.add(di)
+
+        survivors = []
+        for i, track in enumerate(tracks):
+            if i not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+            survivors.append(track)
+        self.tracks = survivors
+
+        for di in range(len(detections)):
+            if di not in matched_dets:
+                label = detections.labels[di]
+                self.tracks.append(Track(self.next_id, detections.boxes[di], int(detections.class_ids[di]),
+                                         label, float(detections.confidences[di])))
+                self.next_id += 1
+                if self.min_hits <= 1:
+                    self.seen[label] += 1
+
+    def step(self, img, detect):
+        self.frames += 1
+        if self.frames > 1:
+            self.predict()
+        if self.needs_detection():
+            self.update(detect(img))
+            self.detector_runs += 1
+            self.since_detect = 0
+        else:
+            self.since_detect += 1
+        return self.detections()
+
+    def detections(self):
+        # Confirmed tracks as Detections, so draw_detections etc. work unchanged
+        tracks = self.confirmed()
+        if not tracks:
+            return empty_detections()
+        return Detections(np.array([t.box for t in tracks]).round().astype(np.int32),
+                          np.array([t.class_id for t in tracks], np.int32),
+                          np.array([t.confidence for t in tracks], np.float32),
+                          [t.label for t in tracks])
+
+    def counts(self):
+        count_dict = defaultdict(int)
+        for track in self.confirmed():
+            count_dict[track.label] += 1
+        return count_dict
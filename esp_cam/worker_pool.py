@@ -0,0 +1,311 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+from .detector import Detections
+from .metrics import DISABLED
+
+
+def _worker(shm_name, slot_bytes, tasks, results, detector_kwargs):
+    # Runs in each pool process: load the model once, then serve slots
+    from .detector import Detector
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        detector = Detector(**detector_kwargs)
+    except Exception as e:
+        results.send(('failed', None, repr(e)))
+        shm.close()
+        return
+    results.send(('ready', None, None))
+
+    try:
+        while True:
+            try:
+                task = tasks.recv()
+            except EOFError:  # the pool's process is gone
+                break
+            if task is None:
+                break
+            job, slot, shape = task
+            img = np.ndarray(shape, np.uint8, shm.buf, slot * slot_bytes)
+            try:
+                d = detector.detect(img)
+                results.send(('done', job, (d.boxes, d.class_ids, d.confidences)))
+            except Exception as e:
+                results.send(('error', job, repr(e)))
+            del img  # no view may outlive shm.close()
+    finally:
+        shm.close()
+
+
+# --- Inference in several processes, frames handed over in shared memory ---
+class InferencePool:
+    """Run Detector.detect in `workers` processes, each with its own net.
+
+    Frames go into a shared-memory ring of `slots` fixed-size slots (big
+    enough for max_shape), so a submit is one memcpy and the task pipes
+    only carry (job, slot, shape). Each job goes to the worker with the
+    fewest jobs in flight. Workers send back the boxes, class ids and
+    confidences as small arrays; labels are added here. A slot is reused as
+    soon as its result is back, and submit() blocks while all slots are in
+    use (up to its timeout), which keeps memory and latency bounded.
+
+    Every worker has its own task and result pipe, so a worker that dies
+    (killed, out of memory, a crash in native code) can't leave a shared
+    queue locked; its result pipe closes and the pool notices at once (and
+    checks is_alive() every `check_interval` seconds besides). Its jobs
+    fail with RuntimeError, their slots are freed, and with `respawn` a
+    new worker takes its place once it has loaded the model. A worker
+    that hangs without dying is not detected: pass a timeout to detect(),
+    which covers both the wait for a free slot and the wait for the result.
+
+    Same submit()/detect() interface as BatchingDetector. Each worker gets
+    cpu_count // workers OpenCV threads unless `threads` is given. Extra
+    keyword arguments go to Detector in every worker, so the model files
+    must be reachable from there. Workers are spawned, not forked: the
+    script that creates the pool needs an `if __name__ == '__main__':`
+    guard.
+    """
+
+    def __init__(self, workers=2, slots=None, max_shape=(1200, 1600, 3), threads=None, metrics=None,
+                 check_interval=1.0, respawn=True, **detector_kwargs):
+        self.workers = workers
+        self.slots = slots or 2 * workers
+        self.slot_bytes = int(np.prod(max_shape))
+        self.metrics = metrics or DISABLED
+        self.check_interval = check_interval
+        self.respawn = respawn
+        detector_kwargs.setdefault('threads', threads or max(1, (os.cpu_count() or 1) // workers))
+        self.detector_kwargs = detector_kwargs
+
+        with open(detector_kwargs.get('classesfile', 'coco.names'), 'rt') as f:
+            self.classNames = f.read().rstrip('\n').split('\n')
+
+        self.shm = None
+        self.ring = None  # (slots, slot_bytes) view of the shared block
+        self.free = queue.Queue()
+        self.lock = threading.Lock()
+        self.pending = {}  # job -> (future, slot, submitted, worker)
+        self.next_job = 0
+        self.ctx = mp.get_context('spawn')
+        self.processes = []
+        self.tasks = []      # per worker: our end of its task pipe
+        self.results = []    # per worker: our end of its result pipe
+        self.in_flight = []  # per worker: jobs sent and not answered
+        self.alive = set()   # workers taking jobs (including respawned ones still loading)
+        self.broken = set()  # respawned workers that could not load the model
+        self.thread = None
+        self.stopping = False
+        self.frames = 0
+        self.errors = 0
+        self.restarts = 0
+
+    def _spawn(self, index):
+        task_reader, task_writer = self.ctx.Pipe(duplex=False)
+        result_reader, result_writer = self.ctx.Pipe(duplex=False)
+        process = self.ctx.Process(target=_worker, name=f"inference-{index}", daemon=True,
+                                   args=(self.shm.name, self.slot_bytes, task_reader, result_writer,
+                                         self.detector_kwargs))
+        process.start()
+        # The worker holds the other ends now; closing ours makes its death an EOF
+        task_reader.close()
+        result_writer.close()
+
+        if index < len(self.processes):
+            self.tasks[index].close()
+            self.results[index].close()
+            self.processes[index] = process
+            self.tasks[index] = task_writer
+            self.results[index] = result_reader
+        else:
+            self.processes.append(process)
+            self.tasks.append(task_writer)
+            self.results.append(result_reader)
+            self.in_flight.append(0)
+        self.alive.add(index)
+
+    def start(self, timeout=120):
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        self.ring = np.ndarray((self.slots, self.slot_bytes), np.uint8, self.shm.buf)
+        for slot in range(self.slots):
+            self.free.put(slot)
+        self.stopping = False
+
+        for i in range(self.workers):
+            self._spawn(i)
+
+        # Wait for every worker to load its model before taking frames
+        deadline = time.monotonic() + timeout
+        for process, results in zip(self.processes, self.results):
+            try:
+                if not results.poll(max(0.0, deadline - time.monotonic())):
+                    self.stop()
+                    raise RuntimeError(f"Inference workers did not load the model within {timeout} s")
+                kind, _, error = results.recv()
+            except EOFError:
+                kind, error = 'failed', f"exit code {process.exitcode}"
+            if kind == 'failed':
+                self.stop()
+                raise RuntimeError(f"Inference worker {process.pid} could not load the model: {error}")
+
+        self.thread = threading.Thread(target=self._collect, name="inference-pool", daemon=True)
+        self.thread.start()
+        return self
+
+    def submit(self, image, timeout=None):
+        # TimeoutError when no slot frees up within timeout seconds
+        if self.stopping:
+            raise RuntimeError("Inference pool stopped")
+        if image.dtype != np.uint8 or image.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {image.shape} {image.dtype} does not fit a "
+                             f"{self.slot_bytes}-byte uint8 slot")
+        try:
+            with self.metrics.time('pool_wait'):
+                slot = self.free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No free inference slot within {timeout} s") from None
+        np.copyto(self.ring[slot, :image.nbytes].reshape(image.shape), image)
+
+        future = Future()
+        with self.lock:
+            if not self.alive:
+                self.free.put(slot)
+                raise RuntimeError("No inference workers left")
+            worker = min(self.alive, key=lambda i: self.in_flight[i])
+            job = self.next_job
+            self.next_job += 1
+            self.pending[job] = (future, slot, time.perf_counter(), worker)
+            self.in_flight[worker] += 1
+            try:
+                self.tasks[worker].send((job, slot, image.shape))
+            except OSError:
+                pass  # it just died: the job fails with the rest of its jobs
+        return future
+
+    def detect(self, image, timeout=None):
+        if timeout is None:
+            return self.submit(image).result()
+        deadline = time.monotonic() + timeout
+        future = self.submit(image, timeout)
+        return future.result(max(0.0, deadline - time.monotonic()))
+
+    def _worker_died(self, index):
+        # Fail the jobs of a dead worker, and replace it
+        process = self.processes[index]
+        process.join(timeout=1)  # reap it, for the exit code
+        with self.lock:
+            if self.stopping or index not in self.alive:
+                return
+            self.alive.discard(index)
+            self.errors += 1
+            self.metrics.inc('errors')
+            print(f"[Pool] Inference worker {process.pid} died (exit code {process.exitcode})")
+
+            lost = [self.pending.pop(job) for job, entry in list(self.pending.items()) if entry[3] == index]
+            self.in_flight[index] = 0
+            if self.respawn and index not in self.broken:
+                self.restarts += 1
+                self._spawn(index)
+
+        # Callers that see the error find the replacement already starting
+        for future, slot, _, _ in lost:
+            self.free.put(slot)
+            if not future.cancelled():
+                future.set_exception(RuntimeError(f"Inference worker {process.pid} died"))
+
+    def _collect(self):
+        while not self.stopping:
+            with self.lock:
+                readers = {self.results[i]: i for i in self.alive}
+            for conn in connection.wait(list(readers), timeout=self.check_interval):
+                index = readers[conn]
+                try:
+                    kind, job, payload = conn.recv()
+                except (EOFError, OSError):
+                    self._worker_died(index)
+                    continue
+                self._handle(index, kind, job, payload)
+
+            # A worker that died without its pipe closing (e.g. a stuck child of its own)
+            for index in list(self.alive):
+                if not self.processes[index].is_alive():
+                    self._worker_died(index)
+
+    def _handle(self, index, kind, job, payload):
+        if kind == 'ready':
+            return  # a respawned worker has loaded the model
+        if kind == 'failed':
+            # It exits now: its jobs fail then, and it isn't respawned again
+            print(f"[Pool] Restarted inference worker could not load the model: {payload}")
+            with self.lock:
+                self.broken.add(index)
+            return
+
+        with self.lock:
+            entry = self.pending.pop(job, None)
+            if entry is not None:
+                self.in_flight[index] -= 1
+        if entry is None:
+            return  # failed already
+        future, slot, submitted, _ = entry
+        self.free.put(slot)
+        self.metrics.observe('pool', time.perf_counter() - submitted)
+        if future.cancelled():
+            return  # the caller gave up on it
+
+        if kind == 'done':
+            boxes, class_ids, confidences = payload
+            self.frames += 1
+            future.set_result(Detections(boxes, class_ids, confidences,
+                                         [self.classNames[c] for c in class_ids]))
+        else:
+            self.errors += 1
+            self.metrics.inc('errors')
+            future.set_exception(RuntimeError(f"Inference worker failed: {payload}"))
+
+    def stop(self):
+        # Workers finish what they have and exit; their closing pipes wake the collector
+        with self.lock:
+            self.stopping = True
+            for tasks in self.tasks:
+                try:
+                    tasks.send(None)
+                except OSError:
+                    pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1)
+            if process.is_alive():
+                process.kill()  # e.g. stuck in native code with SIGTERM blocked
+                process.join(timeout=1)
+
+        if self.thread is not None:
+            self.thread.join(timeout=self.check_interval + 5)
+            self.thread = None
+        for conn in self.tasks + self.results:
+            conn.close()
+        self.processes = []
+        self.tasks = []
+        self.results = []
+        self.in_flight = []
+        self.alive.clear()
+        with self.lock:
+            for future, _, _, _ in self.pending.values():
+                if not future.cancelled():
+                    future.set_exception(RuntimeError("Inference pool stopped"))
+            self.pending.clear()
+
+        if self.shm is not None:
+            self.ring = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
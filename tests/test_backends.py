@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import ModelVariant, OpenCVBackend, select_detector
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks')
+
+
+@pytest.fixture
+def tiny_model(tmp_path):
+    # The random-weight Darknet model from bench_stages: loads and runs in milliseconds
+    sys.path.insert(0, BENCHMARKS)
+    from bench_stages import write_tiny_darknet
+    return write_tiny_darknet(str(tmp_path), 320, np.random.default_rng(0))
+
+
+class BrokenVariant(ModelVariant):
+    # Files present, but loading or running the backend raises something unexpected
+    def __init__(self, name, cfg, weights, fail_on):
+        super().__init__(name, modelConfig=cfg, modelWeights=weights)
+        self.fail_on = fail_on
+
+    def backend(self, threads=None):
+        if self.fail_on == 'load':
+            raise RuntimeError("corrupt model file")
+        backend = OpenCVBackend(self.modelConfig, self.modelWeights, threads)
+        if self.fail_on == 'run':
+            def forward(blob):
+                raise RuntimeError("unsupported layer")
+            backend.forward = forward
+        return backend
+
+
+def test_variants_that_fail_to_load_or_run_are_skipped(tiny_model, capsys):
+    cfg, weights, names = tiny_model
+    variants = [
+        BrokenVariant('broken-load', cfg, weights, 'load'),
+        BrokenVariant('broken-run', cfg, weights, 'run'),
+        ModelVariant('missing', modelConfig='missing.cfg', modelWeights='missing.weights'),
+        ModelVariant('tiny', modelConfig=cfg, modelWeights=weights),
+    ]
+    detector = select_detector(variants, budget_ms=1e6, classesfile=names, runs=1)
+
+    assert detector.variant.name == 'tiny'
+    out = capsys.readouterr().out
+    assert "broken-load: RuntimeError('corrupt model file')" in out
+    assert "broken-run: RuntimeError('unsupported layer')" in out
+
+
+def test_no_usable_variant(tiny_model):
+    cfg, weights, names = tiny_model
+    with pytest.raises(FileNotFoundError):
+        select_detector([BrokenVariant('broken', cfg, weights, 'run')], 1e6, classesfile=names, runs=1)
+
+
+def test_opencv_backend_takes_any_input_size(tiny_model):
+    cfg, weights, names = tiny_model
+    detector = select_detector([ModelVariant('tiny', modelConfig=cfg, modelWeights=weights)], 1e6,
+                               classesfile=names, whT=224, runs=1)
+    assert detector.backend.input_size is None
+    assert detector.whT == 224
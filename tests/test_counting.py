@@ -0,0 +1,135 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import BaselineCounter, CountHistory
+
+NAMES = ['person', 'bottle', 'cup']
+PERSON, BOTTLE, CUP = range(3)
+
+
+def ids(bottles=0, cups=0):
+    return [BOTTLE] * bottles + [CUP] * cups
+
+
+def history(window, bottle_counts):
+    h = CountHistory(len(NAMES), window)
+    for n in bottle_counts:
+        h.add(ids(n))
+    return h
+
+
+# --- CountHistory ---
+def test_median_ignores_one_miss():
+    assert history(5, [2, 2, 0, 2, 2]).median()[BOTTLE] == 2
+
+
+def test_median_rounds_half_up():
+    assert history(4, [1, 2, 1, 2]).median()[BOTTLE] == 2
+
+
+def test_median_over_a_partly_filled_window():
+    h = history(5, [3, 1])
+    assert h.filled == 2
+    assert h.median()[BOTTLE] == 2
+
+
+def test_window_drops_old_results():
+    assert history(3, [5, 5, 5, 1, 1]).median()[BOTTLE] == 1
+
+
+def test_mode():
+    assert history(5, [2, 2, 0, 2, 1]).mode()[BOTTLE] == 2
+
+
+def test_mode_tie_goes_to_the_lower_count():
+    assert history(4, [3, 1, 3, 1]).mode()[BOTTLE] == 1
+
+
+def test_clear():
+    h = history(3, [2, 2])
+    h.clear()
+    assert h.filled == 0 and not h.rows.any()
+
+
+# --- BaselineCounter ---
+def test_baseline_waits_for_a_full_window():
+    # Bottle missed on the very first frame: it must not become the reference
+    counter = BaselineCounter(NAMES, policy='first', window=3)
+    assert counter.update(ids(0, 1)) is False
+    assert counter.results_to_baseline() == 2
+    assert counter.update(ids(2, 1)) is False
+    assert counter.update(ids(2, 1)) is True
+    assert counter.baseline_counts() == {'bottle': 2, 'cup': 1}
+    assert counter.results_to_baseline() == 0
+
+
+def test_nothing_missing_before_the_baseline():
+    counter = BaselineCounter(NAMES, window=3, miss_after=1)
+    counter.update(ids(2))
+    counter.update(ids(0))
+    assert counter.baseline is None
+    assert counter.missing_labels() == []
+
+
+def test_hysteresis():
+    counter = BaselineCounter(NAMES, policy='first', window=1, miss_after=2, clear_after=2)
+    counter.update(ids(2))
+    missing = []
+    for bottles in [1, 2, 1, 1, 2, 1, 2, 2]:
+        counter.update(ids(bottles))
+        missing.append(counter.missing_labels())
+    # One low result is ignored, two in a row report it; it clears after two at the baseline
+    assert missing == [[], [], [], ['bottle'], ['bottle'], ['bottle'], ['bottle'], []]
+
+
+def test_smoothing_hides_a_single_miss():
+    counter = BaselineCounter(NAMES, window=5, miss_after=1)
+    for _ in range(5):
+        counter.update(ids(2))
+    for bottles in [0, 2, 2, 0, 2]:
+        counter.update(ids(bottles))
+        assert counter.missing_labels() == []
+        assert counter.counts() == {'bottle': 2}
+
+
+@pytest.mark.parametrize('statistic', ['median', 'mode'])
+def test_first_policy_keeps_the_reference(statistic):
+    counter = BaselineCounter(NAMES, policy='first', window=1, statistic=statistic, miss_after=1)
+    counter.update(ids(3))
+    for bottles in [4, 5, 2]:
+        counter.update(ids(bottles))
+    assert counter.baseline_counts() == {'bottle': 3}
+    assert counter.missing_labels() == ['bottle']
+
+
+def test_previous_policy_follows_rises_and_confirmed_drops():
+    counter = BaselineCounter(NAMES, policy='previous', window=1, miss_after=2, clear_after=2)
+    counter.update(ids(2))
+    counter.update(ids(3))
+    assert counter.baseline_counts() == {'bottle': 3}
+
+    counter.update(ids(2))  # not confirmed yet: the baseline stays
+    assert counter.baseline_counts() == {'bottle': 3}
+    assert counter.missing_labels() == []
+
+    counter.update(ids(2))  # confirmed: reported once, then the new reference
+    assert counter.missing_labels() == ['bottle']
+    assert counter.baseline_counts() == {'bottle': 2}
+
+
+def test_reset():
+    counter = BaselineCounter(NAMES, window=1, miss_after=1)
+    counter.update(ids(2))
+    counter.update(ids(0, 1))
+    counter.reset()
+    assert counter.baseline is None and counter.counts() == {}
+    assert counter.missing_labels() == [] and counter.results_to_baseline() == 1
+
+
+def test_rejects_unknown_options():
+    with pytest.raises(ValueError):
+        BaselineCounter(NAMES, policy='last')
+    with pytest.raises(ValueError):
+        BaselineCounter(NAMES, statistic='mean')
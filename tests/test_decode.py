@@ -0,0 +1,157 @@
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import decode_outputs
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks')
+
+NUM_CLASSES = 80
+
+
+def old_loop(outputs, wT, hT, confThreshold):
+    # The per-row loop findObject / detect_and_count used before decode_outputs
+    bbox = []
+    classIds = []
+    confs = []
+    for output in outputs:
+        for det in output:
+            scores = det[5:]
+            classId = np.argmax(scores)
+            confidence = scores[classId]
+            if confidence > confThreshold:
+                w, h = int(det[2] * wT), int(det[3] * hT)
+                x, y = int((det[0] * wT) - w / 2), int((det[1] * hT) - h / 2)
+                bbox.append([x, y, w, h])
+                classIds.append(classId)
+                confs.append(float(confidence))
+    return bbox, classIds, confs
+
+
+def assert_same(outputs, wT, hT, confThreshold):
+    expected = old_loop(outputs, wT, hT, confThreshold)
+    bbox, classIds, confs = decode_outputs(outputs, wT, hT, confThreshold)
+    assert bbox == expected[0]
+    assert classIds == [int(c) for c in expected[1]]
+    assert confs == expected[2]  # exact: both are the float32 score as a Python float
+    return bbox, classIds, confs
+
+
+def rows(n, rng, hit_rate=0.2):
+    dets = np.zeros((n, 5 + NUM_CLASSES), np.float32)
+    dets[:, :4] = rng.random((n, 4), dtype=np.float32)
+    dets[:, 4] = rng.random(n, dtype=np.float32)
+    dets[:, 5:] = rng.random((n, NUM_CLASSES), dtype=np.float32) * 0.3
+    hits = rng.random(n) < hit_rate
+    dets[hits, 5 + rng.integers(0, NUM_CLASSES, hits.sum())] = rng.uniform(0.3, 1.0, hits.sum())
+    return dets
+
+
+# YOLOv3 at whT=320: three layers of 300, 1200 and 4800 rows
+def yolo_outputs(rng, whT=320):
+    return [rows(3 * (whT // stride) ** 2, rng) for stride in (32, 16, 8)]
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('shape', [(240, 320), (480, 640), (1200, 1600), (296, 400)])
+def test_matches_old_loop_on_random_outputs(seed, shape):
+    rng = np.random.default_rng(seed)
+    hT, wT = shape
+    bbox, _, _ = assert_same(yolo_outputs(rng), wT, hT, 0.5)
+    assert bbox  # the comparison is not vacuous
+
+
+def test_real_network_outputs(tmp_path):
+    # Output tensors of an actual cv2.dnn forward pass (the tiny random-weight
+    # Darknet model from bench_stages), at every ESP32-CAM frame size
+    cv2 = pytest.importorskip('cv2')
+    sys.path.insert(0, BENCHMARKS)
+    from bench_decode import FRAME_SIZES
+    from bench_stages import write_tiny_darknet
+
+    rng = np.random.default_rng(0)
+    cfg, weights, _ = write_tiny_darknet(str(tmp_path), 320, rng)
+    net = cv2.dnn.readNetFromDarknet(cfg, weights)
+    names = net.getUnconnectedOutLayersNames()
+    kept = 0
+    for w, h in FRAME_SIZES.values():
+        img = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+        net.setInput(cv2.dnn.blobFromImage(img, 1 / 255, (320, 320), [0, 0, 0], 1, crop=False))
+        outputs = net.forward(names)
+        for threshold in (0.3, 0.5):
+            kept += len(assert_same(outputs, w, h, threshold)[0])
+    assert kept
+
+
+def test_recorded_output_tensors():
+    # Real-model tensors saved by bench_stages.py --save-outputs yolo.npz
+    path = os.environ.get('ESP_CAM_YOLO_OUTPUTS')
+    if not path:
+        pytest.skip("set ESP_CAM_YOLO_OUTPUTS to a bench_stages --save-outputs .npz file")
+    sys.path.insert(0, BENCHMARKS)
+    from bench_decode import FRAME_SIZES
+
+    recorded = np.load(path)
+    for name, (w, h) in FRAME_SIZES.items():
+        outputs = [recorded[k] for k in sorted(recorded.files) if k.startswith(f"{name}_")]
+        if outputs:
+            assert_same(outputs, w, h, 0.5)
+            assert_same(outputs, w, h, 0.3)
+
+
+def test_truncation_boundaries():
+    # Coordinates whose pixel value lands on or next to an integer, and
+    # negative x/y (box hanging over the left/top edge): int() truncates
+    # toward zero, and these float32 products are where rounding differs
+    wT, hT = 640, 480
+    values = []
+    for pixels in (1, 2, 3, 10, 99, 100, 101, 319, 320, 321, 639, 640):
+        exact = np.float32(pixels / wT)
+        values += [exact, np.nextafter(exact, np.float32(0)), np.nextafter(exact, np.float32(1))]
+    values = np.array(values, np.float32)
+
+    dets = np.zeros((len(values) ** 2 // 4, 5 + NUM_CLASSES), np.float32)
+    grid = np.stack(np.meshgrid(values, values), -1).reshape(-1, 2)[:len(dets)]
+    dets[:, 0] = grid[:, 0]
+    dets[:, 1] = grid[:, 1]
+    dets[:, 2] = grid[::-1, 1]
+    dets[:, 3] = grid[::-1, 0]
+    dets[:, 5] = 0.9
+    bbox, _, _ = assert_same([dets], wT, hT, 0.5)
+    assert len(bbox) == len(dets)
+    assert min(min(b[0], b[1]) for b in bbox) < 0
+
+
+def test_argmax_ties_pick_first_class():
+    dets = np.zeros((4, 5 + NUM_CLASSES), np.float32)
+    dets[:, :4] = 0.5
+    dets[0, [5 + 3, 5 + 7]] = 0.8
+    dets[1, [5 + 0, 5 + 79]] = 0.6
+    dets[2, 5:] = 0.7  # every class tied
+    dets[3, [5 + 40, 5 + 39, 5 + 41]] = 0.9
+    _, classIds, _ = assert_same([dets], 320, 240, 0.5)
+    assert classIds == [3, 0, 0, 39]
+
+
+@pytest.mark.parametrize('threshold', [0.3, 0.5, 0.25, 0.6, 0.7])
+def test_scores_at_the_threshold(threshold):
+    # float32(threshold) may be just above or below the Python float;
+    # the old loop and decode_outputs must agree on which rows that keeps
+    t32 = np.float32(threshold)
+    scores = [t32, np.nextafter(t32, np.float32(0)), np.nextafter(t32, np.float32(1)),
+              np.float32(threshold + 1e-9), np.float32(threshold - 1e-9)]
+    dets = np.zeros((len(scores), 5 + NUM_CLASSES), np.float32)
+    dets[:, :4] = 0.5
+    dets[:, 5 + 2] = scores
+    assert_same([dets], 320, 240, threshold)
+
+
+def test_nothing_above_threshold():
+    dets = np.zeros((10, 5 + NUM_CLASSES), np.float32)
+    dets[:, 5:] = 0.1
+    assert decode_outputs([dets], 320, 240, 0.5) == ([], [], [])
+    assert old_loop([dets], 320, 240, 0.5) == ([], [], [])
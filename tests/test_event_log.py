@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import Detections, EventLog
+from esp_cam.event_log import NO_CLASS, SEARCH_STEP, class_totals, query, read_log
+
+
+def detections(*class_ids):
+    n = len(class_ids)
+    boxes = np.array([[10 * i, 20, 30, 40] for i in range(n)], np.int32).reshape(-1, 4)
+    return Detections(boxes, np.array(class_ids, np.int32), np.full(n, 0.5, np.float32),
+                      [str(c) for c in class_ids])
+
+
+def test_rows_per_class_and_empty_frames(tmp_path):
+    path = str(tmp_path / 'd.evlog')
+    log = EventLog(path)
+    log.record(detections(39, 39, 0), camera=2, t=100.0)
+    log.record(detections(), camera=2, t=101.0)
+    log.close()
+
+    records = read_log(path)
+    assert list(records['class_id']) == [0, 39, NO_CLASS]
+    assert list(records['count']) == [1, 2, 0]
+    bottles = records[records['class_id'] == 39][0]
+    assert (bottles['x0'], bottles['y0'], bottles['x1'], bottles['y1']) == (0, 20, 40, 60)
+    assert class_totals(path) == {0: {'frames': 1, 'mean': 0.5, 'max': 1},
+                                  39: {'frames': 1, 'mean': 1.0, 'max': 2}}
+
+
+def test_concurrent_records_stay_in_time_order(tmp_path):
+    # The multi-camera script records from one thread per camera; query()
+    # searches by time, so the file must never go backwards
+    path = str(tmp_path / 'd.evlog')
+    log = EventLog(path)
+
+    def camera(i):
+        for _ in range(300):
+            log.record(detections(i), camera=i)
+
+    threads = [threading.Thread(target=camera, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    log.close()
+
+    times = read_log(path)['time']
+    assert len(times) == 1200
+    assert np.all(np.diff(times) >= 0)
+    assert len(query(path, start=times[600])) == len(times) - np.searchsorted(times, times[600])
+
+
+def test_rotation(tmp_path):
+    path = str(tmp_path / 'd.evlog')
+    log = EventLog(path, max_bytes=16 + 10 * 30, backups=2)
+    for i in range(35):
+        log.record(detections(1), t=float(i))
+    log.close()
+
+    assert log.rotations == 3
+    assert len(query(path)) == 25  # the oldest file was deleted
+    assert query(path)['time'][0] == 10.0
+
+
+def test_clock_stepping_back(tmp_path, monkeypatch):
+    # An NTP correction sets the wall clock back: rows keep the last time written
+    clock = iter([100.0, 101.0, 95.0, 96.0, 102.0])
+    monkeypatch.setattr('esp_cam.event_log.time.time', lambda: next(clock))
+    path = str(tmp_path / 'd.evlog')
+    log = EventLog(path)
+    for i in range(5):
+        log.record(detections(i))
+    log.close()
+
+    assert list(read_log(path)['time']) == [100.0, 101.0, 101.0, 101.0, 102.0]
+    assert list(query(path, start=101.0)['class_id']) == [1, 2, 3, 4]
+    assert list(query(path, end=101.0)['class_id']) == [0]
+
+
+def test_clock_stepping_back_across_a_restart(tmp_path):
+    path = str(tmp_path / 'd.evlog')
+    log = EventLog(path)
+    log.record(detections(1), t=200.0)
+    log.close()
+
+    log = EventLog(path)
+    log.record(detections(2), t=150.0)
+    log.close()
+    assert list(read_log(path)['time']) == [200.0, 200.0]
+
+
+def test_query_across_search_blocks(tmp_path):
+    path = str(tmp_path / 'd.evlog')
+    log = EventLog(path)
+    times = np.repeat(np.arange(SEARCH_STEP), 3)[:2 * SEARCH_STEP + 5] * 0.5
+    for t in times:
+        log.record(detections(), t=float(t))
+    log.close()
+
+    for start, end in [(0.0, 0.5), (100.0, 1000.5), (682.5, 683.0), (-1.0, 1e9), (1e9, None)]:
+        expected = np.sum(times >= start) if end is None else np.sum((times >= start) & (times < end))
+        assert len(query(path, start, end)) == expected
@@ -0,0 +1,120 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+cv2 = pytest.importorskip('cv2')
+serial = pytest.importorskip('serial')
+
+from esp_cam import SerialCamera
+from esp_cam.fakes import FakeSerialCamera
+from esp_cam.framing import HEADER, MAGIC
+
+def jpeg():
+    rng = np.random.default_rng(0)
+    img = cv2.GaussianBlur(rng.integers(0, 256, (240, 320, 3), dtype=np.uint8), (9, 9), 0)
+    return cv2.imencode('.jpg', img)[1].tobytes()
+
+
+# --- Faults, applied to one framed reply (header + payload + CRC) ---
+def clean(wire):
+    return wire
+
+
+def flip_payload_byte(wire):
+    wire = bytearray(wire)
+    wire[HEADER.size + 100] ^= 0x40
+    return bytes(wire)
+
+
+def flip_length_byte(wire):
+    wire = bytearray(wire)
+    wire[len(MAGIC) + 2] ^= 0x01  # low byte of the length: header CRC no longer matches
+    return bytes(wire)
+
+
+def delete_bytes(wire):
+    mid = HEADER.size + 500
+    return wire[:mid] + wire[mid + 7:]
+
+
+def truncate(wire):
+    return wire[:len(wire) // 2]
+
+
+def noise_before(wire):
+    rng = np.random.default_rng(1)
+    noise = rng.integers(0, 256, 300, dtype=np.uint8).tobytes().replace(MAGIC[:2], b'..')
+    return b"boot: rst:0x1 (POWERON_RESET)\r\n" + noise + wire
+
+
+def magic_in_noise(wire):
+    # A stray magic word followed by a header that fails its CRC
+    return MAGIC + b'\x00' * (HEADER.size - len(MAGIC)) + wire
+
+
+def scripted(faults):
+    # One fault per reply, in order; clean once the script runs out
+    replies = iter(faults)
+    return lambda wire: next(replies, clean)(wire)
+
+
+def capture_all(faults, captures, retries=2):
+    fake = FakeSerialCamera(jpeg(), faults=scripted(faults)).start()
+    ser = serial.Serial(fake.port, 115200, timeout=0.5)
+    try:
+        camera = SerialCamera(ser, verbose=False, framed=True, retries=retries)
+        frames = [camera.capture() for _ in range(captures)]
+    finally:
+        ser.close()
+        fake.stop()
+    return frames, camera.reader.stats(), fake
+
+
+def test_clean_link():
+    frames, stats, fake = capture_all([], 5)
+    assert [f.seq for f in frames] == [0, 1, 2, 3, 4]
+    assert stats == {'frames': 5, 'corrupt': 0, 'dropped': 0, 'retried': 0, 'skipped_bytes': 0}
+    assert fake.captures == 5
+
+
+@pytest.mark.parametrize('fault', [flip_payload_byte, flip_length_byte, delete_bytes, truncate],
+                         ids=lambda f: f.__name__)
+def test_corrupt_frame_is_rejected_and_retried(fault):
+    frames, stats, fake = capture_all([clean, fault], 3)
+    # Capture 2 gets the bad reply, retries and gets seq 2 instead of seq 1
+    assert all(f is not None for f in frames)
+    assert [f.seq for f in frames] == [0, 2, 3]
+    assert stats['frames'] == 3
+    assert stats['corrupt'] >= 1
+    assert stats['retried'] == 1
+    assert stats['dropped'] == 1
+    assert fake.captures == 4
+    assert all(f.image.shape == (240, 320, 3) for f in frames)
+
+
+def test_noise_is_skipped_without_losing_the_frame():
+    frames, stats, _ = capture_all([noise_before, magic_in_noise], 3)
+    assert [f.seq for f in frames] == [0, 1, 2]
+    assert stats['skipped_bytes'] >= 300
+    assert stats['retried'] == 0 and stats['dropped'] == 0
+    assert stats['corrupt'] == 1  # the stray magic word's header
+
+
+def test_every_fault_in_a_row():
+    faults = [flip_payload_byte, noise_before, delete_bytes, truncate, flip_length_byte, magic_in_noise]
+    frames, stats, _ = capture_all(faults, 4, retries=3)
+    assert all(f is not None for f in frames)
+    seqs = [f.seq for f in frames]
+    assert seqs == sorted(seqs)
+    assert stats['frames'] == 4
+    assert stats['corrupt'] >= 5
+    assert stats['retried'] == 4
+    # Sequence gaps after the first good frame (the first reply was lost before it)
+    assert seqs[0] == 1
+    assert stats['dropped'] == seqs[-1] - seqs[0] + 1 - len(frames)
+
+
+def test_gives_up_after_retries():
+    frames, stats, fake = capture_all([truncate] * 3, 1, retries=2)
+    assert frames == [None]
+    assert stats['frames'] == 0 and stats['retried'] == 2 and stats['corrupt'] == 3
+    assert fake.captures == 3
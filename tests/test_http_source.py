@@ -0,0 +1,77 @@
+import time
+import urllib.request
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import HttpCamera
+from esp_cam.fakes import FakeCameraServer
+
+JPEG = b'\xff\xd8' + bytes(range(256)) * 100 + b'\xff\xd9'
+
+
+def test_sequence_numbers_and_data():
+    with FakeCameraServer(JPEG) as server:
+        camera = HttpCamera('shelf', f"{server.url}/cam-hi.jpg")
+        frames = [camera.fetch() for _ in range(5)]
+    assert [f.seq for f in frames] == [1, 2, 3, 4, 5]
+    assert all(f.data == JPEG and f.camera == 'shelf' for f in frames)
+    assert server.requests == 5
+
+
+def test_keep_alive_uses_one_connection():
+    with FakeCameraServer(JPEG) as server:
+        camera = HttpCamera('shelf', f"{server.url}/cam-hi.jpg", keep_alive=True)
+        for _ in range(10):
+            camera.fetch()
+        camera.close()
+    assert server.connections == 1 and camera.connects == 1
+
+
+def test_new_connection_per_fetch_by_default():
+    with FakeCameraServer(JPEG) as server:
+        camera = HttpCamera('shelf', f"{server.url}/cam-hi.jpg")
+        for _ in range(3):
+            camera.fetch()
+    assert server.connections == 3 and camera.conn is None
+
+
+def test_reconnects_after_the_server_drops_the_socket():
+    with FakeCameraServer(JPEG, drop_after=2) as server:
+        camera = HttpCamera('shelf', f"{server.url}/cam-hi.jpg", keep_alive=True)
+        frames = [camera.fetch() for _ in range(5)]
+    assert [f.seq for f in frames] == [1, 2, 3, 4, 5]
+    assert camera.errors == 0
+    assert camera.connects == server.connections == 3
+
+
+def test_http_errors_are_counted():
+    with FakeCameraServer(JPEG) as server:
+        camera = HttpCamera('shelf', f"{server.url}/missing.jpg", keep_alive=True)
+        with pytest.raises(IOError, match="HTTP 404"):
+            camera.fetch()
+    assert camera.errors == 1 and camera.seq == 0
+
+
+def median_ms(fn, repeat=30):
+    fn()  # warm-up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def test_keep_alive_is_not_slower_than_a_new_connection():
+    # With headers and body as separate writes and Nagle on, each keep-alive
+    # request would wait for a delayed ACK (~40 ms on Linux)
+    with FakeCameraServer(JPEG) as server:
+        url = f"{server.url}/cam-hi.jpg"
+        camera = HttpCamera('shelf', url, keep_alive=True)
+        keep_alive = median_ms(camera.fetch)
+        fresh = median_ms(lambda: urllib.request.urlopen(url, timeout=5).read())
+        camera.close()
+    assert keep_alive <= max(2 * fresh, 5.0)
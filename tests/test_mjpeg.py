@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import MjpegStream
+from esp_cam.fakes import FakeCameraServer
+
+
+def jpeg(i, size=300):
+    # SOI, a payload full of 0xFF bytes (but never EOI), EOI
+    payload = bytes((0xFF if j % 3 == 0 else (i + j) % 0xD0) for j in range(size))
+    return b'\xff\xd8' + payload + b'\xff\xd9'
+
+
+class Frames:
+    # Body callable for FakeCameraServer: a different JPEG on every call
+    def __init__(self, first=()):
+        self.queue = list(first)
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return self.queue.pop(0) if self.queue else jpeg(self.calls)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 16384])
+def test_frames_split_across_reads(chunk_size):
+    # Small chunks put SOI and EOI markers across read boundaries
+    frames = [jpeg(i) for i in range(5)]
+    with FakeCameraServer(Frames(frames), fps=200) as server:
+        stream = MjpegStream(f"{server.url}/stream", name='cam', chunk_size=chunk_size)
+        got = [stream.read() for _ in range(5)]
+        stream.close()
+    assert [f.data for f in got] == frames
+    assert [f.seq for f in got] == [1, 2, 3, 4, 5]
+    assert got[0].camera == 'cam'
+
+
+def test_reconnects_after_the_stream_ends():
+    with FakeCameraServer(Frames(), fps=200, stream_frames=2) as server:
+        stream = MjpegStream(f"{server.url}/stream", chunk_size=64)
+        first = [stream.read(), stream.read()]
+        with pytest.raises(IOError, match="stream ended"):
+            stream.read()
+        assert stream.resp is None
+        after = stream.read()  # opens a new request
+        stream.close()
+    assert [f.seq for f in first] == [1, 2] and after.seq == 3
+    assert server.connections == 2
+
+
+def test_rejects_a_response_that_is_not_mjpeg():
+    with FakeCameraServer(jpeg(0)) as server:
+        stream = MjpegStream(f"{server.url}/cam-hi.jpg")
+        with pytest.raises(IOError, match="not an MJPEG stream"):
+            stream.read()
+    assert stream.conn is None
+
+
+def test_resyncs_after_a_frame_without_end_marker():
+    # A truncated frame (SOI, no EOI) longer than max_frame is dropped, not
+    # glued to the next frame
+    broken = b'\xff\xd8' + bytes(range(1, 200)) * 20
+    good = [jpeg(1), jpeg(2)]
+    with FakeCameraServer(Frames([broken] + good), fps=200) as server:
+        stream = MjpegStream(f"{server.url}/stream", chunk_size=128, max_frame=1000)
+        got = [stream.read(), stream.read()]
+        stream.close()
+    assert [f.data for f in got] == good
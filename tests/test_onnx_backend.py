@@ -0,0 +1,135 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+onnx = pytest.importorskip('onnx')
+pytest.importorskip('onnxruntime')
+
+from onnx import TensorProto, helper, numpy_helper
+
+from esp_cam import Detector, OnnxBackend, quantize_onnx
+
+CLASSES = 80
+
+
+def write_graph(path, size=None, split=False, seed=0):
+    """A small stand-in for a YOLO export: 32x32 average pool, 1x1 conv to
+    85 channels, sigmoid, one row per cell. size=None makes the batch,
+    height and width dynamic. split=True ends in pytorch-YOLOv4's boxes
+    (N, R, 1, 4) x1y1x2y2 and confs (N, R, classes) instead of rows."""
+    rng = np.random.default_rng(seed)
+    weights = rng.normal(0, 4, (5 + CLASSES, 3, 1, 1)).astype(np.float32)
+    bias = rng.normal(0, 1, 5 + CLASSES).astype(np.float32)
+    dims = ['batch', 3, 'height', 'width'] if size is None else ['batch', 3, size, size]
+
+    def const(name, values):
+        return numpy_helper.from_array(np.asarray(values), name)
+
+    nodes = [
+        helper.make_node('AveragePool', ['images'], ['pooled'], kernel_shape=[32, 32], strides=[32, 32]),
+        helper.make_node('Conv', ['pooled', 'W', 'B'], ['conv']),
+        helper.make_node('Sigmoid', ['conv'], ['act']),
+        helper.make_node('Transpose', ['act'], ['cells'], perm=[0, 2, 3, 1]),
+        helper.make_node('Reshape', ['cells', 'rows_shape'], ['rows']),
+    ]
+    inits = [numpy_helper.from_array(weights, 'W'), numpy_helper.from_array(bias, 'B'),
+             const('rows_shape', np.array([0, -1, 5 + CLASSES], np.int64))]
+    outputs = [helper.make_tensor_value_info('rows', TensorProto.FLOAT, ['batch', 'cells', 5 + CLASSES])]
+
+    if split:
+        # Same numbers in the other layout: corners from the centre and size
+        nodes += [
+            helper.make_node('Slice', ['rows', 's0', 's2', 'axis'], ['xy']),
+            helper.make_node('Slice', ['rows', 's2', 's4', 'axis'], ['wh']),
+            helper.make_node('Slice', ['rows', 's5', 's85', 'axis'], ['confs']),
+            helper.make_node('Mul', ['wh', 'half'], ['half_wh']),
+            helper.make_node('Sub', ['xy', 'half_wh'], ['x1y1']),
+            helper.make_node('Add', ['xy', 'half_wh'], ['x2y2']),
+            helper.make_node('Concat', ['x1y1', 'x2y2'], ['corners'], axis=-1),
+            helper.make_node('Reshape', ['corners', 'boxes_shape'], ['boxes']),
+        ]
+        inits += [const('s0', np.array([0], np.int64)), const('s2', np.array([2], np.int64)),
+                  const('s4', np.array([4], np.int64)), const('s5', np.array([5], np.int64)),
+                  const('s85', np.array([5 + CLASSES], np.int64)), const('axis', np.array([-1], np.int64)),
+                  const('half', np.array(0.5, np.float32)),
+                  const('boxes_shape', np.array([0, -1, 1, 4], np.int64))]
+        outputs = [helper.make_tensor_value_info('boxes', TensorProto.FLOAT, ['batch', 'cells', 1, 4]),
+                   helper.make_tensor_value_info('confs', TensorProto.FLOAT, ['batch', 'cells', CLASSES])]
+
+    graph = helper.make_graph(nodes, 'tiny-yolo', [helper.make_tensor_value_info('images', TensorProto.FLOAT, dims)],
+                              outputs, inits)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+    onnx.save(model, str(path))
+    return str(path)
+
+
+@pytest.fixture
+def names(tmp_path):
+    path = tmp_path / 'coco.names'
+    path.write_text('\n'.join(f'class{i}' for i in range(CLASSES)) + '\n')
+    return str(path)
+
+
+def frames(count=3):
+    rng = np.random.default_rng(1)
+    return [rng.integers(0, 256, (240, 320, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def same(a, b, box_tolerance=0):
+    assert len(a) == len(b) > 0
+    assert np.abs(a.boxes.astype(np.int64) - b.boxes).max() <= box_tolerance
+    assert a.class_ids.tolist() == b.class_ids.tolist()
+    np.testing.assert_allclose(a.confidences, b.confidences, rtol=1e-6)
+
+
+def test_fixed_input_size(tmp_path):
+    backend = OnnxBackend(write_graph(tmp_path / 'fixed.onnx', size=224))
+    assert backend.input_size == 224
+    assert not backend.split
+
+
+def test_dynamic_input_size(tmp_path, names):
+    backend = OnnxBackend(write_graph(tmp_path / 'dynamic.onnx'))
+    assert backend.input_size is None
+    for whT in (160, 320):
+        detector = Detector(classesfile=names, whT=whT, backend=backend)
+        rows, = detector.forward(frames(1)[0])
+        assert rows.shape == (1, (whT // 32) ** 2, 5 + CLASSES)
+
+
+def test_detect_batch_matches_detect(tmp_path, names):
+    detector = Detector(classesfile=names, whT=320, backend=OnnxBackend(write_graph(tmp_path / 'model.onnx')))
+    images = frames()
+    for one, batched in zip([detector.detect(im) for im in images], detector.detect_batch(images)):
+        same(one, batched)
+
+
+def test_split_boxes_and_confs_layout(tmp_path, names):
+    rows = Detector(classesfile=names, backend=OnnxBackend(write_graph(tmp_path / 'rows.onnx')))
+    split_backend = OnnxBackend(write_graph(tmp_path / 'split.onnx', split=True))
+    assert split_backend.split
+    split = Detector(classesfile=names, backend=split_backend)
+
+    images = frames()
+    for im in images:
+        # Centres go through x1y1x2y2 and back: a pixel of float rounding
+        same(rows.detect(im), split.detect(im), box_tolerance=1)
+    for one, batched in zip(rows.detect_batch(images), split.detect_batch(images)):
+        same(one, batched, box_tolerance=1)
+
+
+def test_quantize_onnx(tmp_path, names):
+    model = write_graph(tmp_path / 'model.onnx', size=320)
+    quantized = quantize_onnx(model, str(tmp_path / 'model-int8.onnx'))
+    ops = {node.op_type for node in onnx.load(quantized).graph.node}
+    assert 'ConvInteger' in ops
+
+    backend = OnnxBackend(quantized)
+    assert backend.input_size == 320
+    im = frames(1)[0]
+    rows, = Detector(classesfile=names, backend=OnnxBackend(model)).forward(im)
+    quantized_rows, = Detector(classesfile=names, backend=backend).forward(im)
+    assert quantized_rows.shape == rows.shape
+    assert np.abs(quantized_rows - rows).max() < 0.1
@@ -0,0 +1,174 @@
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import AdaptiveScheduler
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make(clock, **kwargs):
+    settings = dict(min_interval=2.0, max_interval=60.0, start_interval=10.0, cpu_budget=0.5,
+                    speedup=0.5, backoff=1.5, error_delay=1.0, smoothing=0.3)
+    settings.update(kwargs)
+    return AdaptiveScheduler(clock=clock, sleep=clock.sleep, **settings)
+
+
+def run(clock, scheduler, latency, counts):
+    # One detection: wait until due, take `latency` seconds, record it
+    scheduler.wait()
+    assert scheduler.due()
+    clock.now += latency
+    return scheduler.record(latency, counts)
+
+
+def test_due_immediately_without_start_delay():
+    clock = FakeClock()
+    scheduler = make(clock)
+    assert scheduler.due()
+    assert scheduler.remaining() == 0.0
+    scheduler.wait()
+    assert clock.slept == []
+
+
+def test_start_delay():
+    clock = FakeClock()
+    scheduler = make(clock, start_delay=20)
+    assert not scheduler.due()
+    assert scheduler.remaining() == pytest.approx(20)
+    clock.now += 19.9
+    assert not scheduler.due()
+    clock.now += 0.1
+    assert scheduler.due()
+
+
+def test_first_record_backs_off():
+    # No previous counts to compare with: treated as quiet
+    clock = FakeClock()
+    scheduler = make(clock)
+    run(clock, scheduler, 0.1, {'bottle': 2})
+    assert scheduler.interval == pytest.approx(15.0)
+    assert scheduler.remaining() == pytest.approx(15.0)
+
+
+def test_speeds_up_when_counts_change():
+    clock = FakeClock()
+    scheduler = make(clock)
+    run(clock, scheduler, 0.1, {'bottle': 2})   # 15
+    run(clock, scheduler, 0.1, {'bottle': 3})   # 7.5
+    assert scheduler.interval == pytest.approx(7.5)
+    run(clock, scheduler, 0.1, {'bottle': 3, 'cup': 1})
+    assert scheduler.interval == pytest.approx(3.75)
+    assert scheduler.remaining() == pytest.approx(3.75)
+
+
+def test_backs_off_when_counts_are_stable():
+    clock = FakeClock()
+    scheduler = make(clock)
+    intervals = []
+    for _ in range(4):
+        run(clock, scheduler, 0.1, {'bottle': 2})
+        intervals.append(scheduler.interval)
+    assert intervals == pytest.approx([15.0, 22.5, 33.75, 50.625])
+
+
+def test_counts_compare_as_dicts():
+    # Same counts in another order, or a defaultdict, are not a change
+    from collections import defaultdict
+    clock = FakeClock()
+    scheduler = make(clock)
+    run(clock, scheduler, 0.1, {'bottle': 2, 'cup': 1})
+    counts = defaultdict(int, {'cup': 1, 'bottle': 2})
+    run(clock, scheduler, 0.1, counts)
+    assert scheduler.interval == pytest.approx(22.5)
+
+
+def test_clamped_to_max_interval():
+    clock = FakeClock()
+    scheduler = make(clock)
+    for _ in range(20):
+        run(clock, scheduler, 0.1, {})
+    assert scheduler.interval == 60.0
+    assert scheduler.remaining() == pytest.approx(60.0)
+
+
+def test_clamped_to_min_interval():
+    clock = FakeClock()
+    scheduler = make(clock)
+    for i in range(20):
+        run(clock, scheduler, 0.1, {'bottle': i})
+    assert scheduler.interval == 2.0
+    assert scheduler.remaining() == pytest.approx(2.0)
+
+
+def test_latency_over_cpu_budget_sets_the_floor():
+    # 3 s detections at a 50% budget: never closer than 6 s apart
+    clock = FakeClock()
+    scheduler = make(clock)
+    for i in range(20):
+        run(clock, scheduler, 3.0, {'bottle': i})
+    assert scheduler.interval == 2.0
+    assert scheduler.latency == pytest.approx(3.0)
+    assert scheduler.remaining() == pytest.approx(6.0)
+
+
+def test_latency_is_smoothed():
+    clock = FakeClock()
+    scheduler = make(clock, min_interval=0.1)
+    run(clock, scheduler, 1.0, {'a': 1})
+    run(clock, scheduler, 11.0, {'a': 2})
+    # EWMA: 1 + 0.3 * (11 - 1) = 4, floor 4 / 0.5 = 8 s
+    assert scheduler.latency == pytest.approx(4.0)
+    assert scheduler.remaining() == pytest.approx(max(8.0, scheduler.interval))
+
+
+def test_no_cpu_budget_means_no_floor():
+    clock = FakeClock()
+    scheduler = make(clock, cpu_budget=0)
+    for i in range(20):
+        run(clock, scheduler, 5.0, {'bottle': i})
+    assert scheduler.remaining() == pytest.approx(2.0)
+
+
+def test_errors_back_off_exponentially():
+    clock = FakeClock()
+    scheduler = make(clock, error_delay=1.0, max_interval=60.0)
+    delays = []
+    for _ in range(8):
+        scheduler.record_error()
+        delays.append(scheduler.remaining())
+        scheduler.wait()
+    assert delays == pytest.approx([1, 2, 4, 8, 16, 32, 60, 60])
+    assert clock.slept == pytest.approx(delays)
+
+
+def test_success_resets_error_back_off():
+    clock = FakeClock()
+    scheduler = make(clock, error_delay=1.0)
+    for _ in range(4):
+        scheduler.record_error()
+    assert scheduler.errors_in_row == 4
+    run(clock, scheduler, 0.1, {'bottle': 1})
+    assert scheduler.errors_in_row == 0
+    scheduler.record_error()
+    assert scheduler.remaining() == pytest.approx(1.0)
+
+
+def test_record_returns_next_time():
+    clock = FakeClock()
+    scheduler = make(clock)
+    next_time = run(clock, scheduler, 0.5, {})
+    assert next_time == pytest.approx(clock.now + 15.0)
+    assert scheduler.record_error() == pytest.approx(clock.now + 1.0)
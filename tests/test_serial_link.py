@@ -0,0 +1,142 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+cv2 = pytest.importorskip('cv2')
+serial = pytest.importorskip('serial')
+
+from esp_cam import SerialCamera
+from esp_cam.fakes import FakeSerialCamera
+
+
+def jpeg(width=320, height=240, seed=0):
+    rng = np.random.default_rng(seed)
+    img = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+    ok, data = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    assert ok
+    return data.tobytes()
+
+
+def first_reply(fault):
+    # Apply fault to the first reply only
+    state = {'first': True}
+
+    def faults(wire):
+        if state['first']:
+            state['first'] = False
+            return fault(wire)
+        return wire
+    return faults
+
+
+def open_camera(fake, **kwargs):
+    ser = serial.Serial(fake.port, 115200, timeout=2)
+    return ser, SerialCamera(ser, verbose=False, **kwargs)
+
+
+def test_capture_round_trip_reuses_the_buffer():
+    data = jpeg()
+    with FakeSerialCamera(data) as fake:
+        ser, camera = open_camera(fake)
+        try:
+            frames = [camera.capture() for _ in range(3)]
+            buffers = {id(camera.frame_buffer.buf)}
+            frames.append(camera.capture())
+            buffers.add(id(camera.frame_buffer.buf))
+        finally:
+            ser.close()
+
+    assert all(f is not None for f in frames)
+    assert [f.seq for f in frames] == [1, 2, 3, 4]
+    assert all(f.size == len(data) and f.image.shape == (240, 320, 3) for f in frames)
+    assert len(buffers) == 1  # no reallocation in steady state
+    assert fake.captures == 4
+    assert camera.stats.frames['full'] == 4
+
+
+def test_lcd_text_read_as_header_is_rejected():
+    # The comparison sketch echoes "LCD Line1: ..." on the same port; read as
+    # a header "LCD " is 541 MB. It must not be allocated, and the next
+    # capture must work again.
+    data = jpeg()
+    echo = b"LCD Line1: bottle:2\r\nLCD Line2: No missing objects\r\n"
+    with FakeSerialCamera(data, faults=first_reply(lambda wire: echo + wire)) as fake:
+        ser, camera = open_camera(fake)
+        try:
+            assert camera.capture() is None
+            assert len(camera.frame_buffer.buf) <= camera.max_length
+            frame = camera.capture()
+        finally:
+            ser.close()
+    assert frame is not None and frame.image.shape == (240, 320, 3)
+
+
+@pytest.mark.parametrize('header', [b'\xff\xff\xff\xff', b'\x00\x00\x00\x00', b'\x00\x00\x10\x00'])
+def test_bad_lengths_are_rejected(header):
+    data = jpeg()
+    with FakeSerialCamera(data, faults=first_reply(lambda wire: header + wire[4:])) as fake:
+        ser, camera = open_camera(fake)
+        try:
+            assert camera.capture() is None
+            assert len(camera.frame_buffer.buf) <= camera.max_length
+            assert camera.capture() is not None
+        finally:
+            ser.close()
+
+
+def test_larger_limit_accepts_big_frames():
+    data = jpeg(1600, 1200)
+    with FakeSerialCamera(data) as fake:
+        ser, camera = open_camera(fake, max_length=len(data) - 1)
+        try:
+            assert camera.capture() is None
+            camera.max_length = 4 * 1024 * 1024
+            frame = camera.capture()
+        finally:
+            ser.close()
+    assert frame is not None and frame.image.shape == (1200, 1600, 3)
+
+
+class FailingCamera:
+    # capture() raises like an unplugged port for the first `failures` calls
+    def __init__(self, failures):
+        from esp_cam.metrics import Metrics
+        self.failures = failures
+        self.calls = 0
+        self.metrics = Metrics()
+        self.ser = serial.Serial()  # timeout used by CaptureAhead.stop()
+
+    def capture(self, preview=False):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise serial.SerialException("device reports readiness to read but returned no data")
+        from esp_cam import SerialFrame
+        return SerialFrame(self.calls, 0.0, 0.0, 0, np.zeros((2, 2, 3), np.uint8))
+
+
+def test_capture_ahead_survives_capture_errors():
+    from esp_cam import CaptureAhead
+    camera = FailingCamera(failures=3)
+    ahead = CaptureAhead(camera, error_delay=0.01).start()
+    try:
+        frame = ahead.get(timeout=2)
+    finally:
+        ahead.stop()
+    assert frame is not None and frame.seq == 4  # the thread kept going after the errors
+    assert ahead.errors == 3
+    assert camera.metrics.counters['errors'] == 3
+
+
+@pytest.mark.parametrize('framed', [False, True])
+def test_preview_and_full_captures(framed):
+    full, preview = jpeg(320, 240), jpeg(160, 120, seed=1)
+    with FakeSerialCamera(full, preview=preview) as fake:
+        ser, camera = open_camera(fake, framed=framed)
+        try:
+            frames = [camera.capture(preview=p) for p in (True, True, False, True)]
+        finally:
+            ser.close()
+    assert [f.preview for f in frames] == [True, True, False, True]
+    assert [f.image.shape[:2] for f in frames] == [(120, 160), (120, 160), (240, 320), (120, 160)]
+    assert fake.previews == 3 and fake.captures == 4
+    assert fake.messages == []  # PREVIEW is not mistaken for an LCD message
+    assert camera.stats.frames == {'preview': 3, 'full': 1}
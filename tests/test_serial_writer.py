@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import SerialWriter
+
+
+class Port:
+    def __init__(self, fail=False, block=None):
+        self.written = []
+        self.fail = fail
+        self.block = block
+
+    def write(self, data):
+        if self.block is not None:
+            self.block.wait()
+        if self.fail:
+            raise OSError("port unplugged")
+        self.written.append(data.decode())
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_repeats_are_suppressed():
+    port = Port()
+    writer = SerialWriter(port, min_interval=0, debounce=0, verbose=False).start()
+    for _ in range(3):
+        writer.send("<bottle:2>")
+        assert wait_for(lambda: port.written)
+        time.sleep(0.02)
+    writer.stop()
+    assert port.written == ["<bottle:2>"]
+    assert (writer.sent, writer.suppressed) == (1, 2)
+
+
+def test_repeats_are_sent_when_suppression_is_off():
+    # ESP_offline.ino overwrites the LCD on every CAPTURE: the result must be sent again
+    port = Port()
+    writer = SerialWriter(port, min_interval=0, debounce=0, suppress_repeats=False, verbose=False).start()
+    for i in range(3):
+        writer.send("<bottle:2>")
+        assert wait_for(lambda: len(port.written) == i + 1)
+    writer.stop()
+    assert port.written == ["<bottle:2>"] * 3
+    assert writer.suppressed == 0
+
+
+def test_newest_message_wins():
+    port = Port()
+    writer = SerialWriter(port, min_interval=0, debounce=0.2, verbose=False).start()
+    for n in range(5):
+        writer.send(f"<bottle:{n}>")
+    assert wait_for(lambda: port.written)
+    writer.stop()
+    assert port.written == ["<bottle:4>"]
+    assert writer.dropped == 4
+
+
+def test_rate_is_capped():
+    port = Port()
+    writer = SerialWriter(port, min_interval=0.2, debounce=0, verbose=False).start()
+    start = time.monotonic()
+    for n in range(20):
+        writer.send(f"<bottle:{n}>")
+        time.sleep(0.02)
+    elapsed = time.monotonic() - start
+    writer.stop()
+    assert len(port.written) <= elapsed / 0.2 + 2
+    assert port.written[-1] == "<bottle:19>"
+    assert writer.sent + writer.dropped + writer.suppressed == 20
+
+
+def test_slow_or_failing_port_never_blocks_send():
+    block = threading.Event()
+    port = Port(block=block)
+    writer = SerialWriter(port, min_interval=0, debounce=0, verbose=False).start()
+    writer.send("<a:1>")
+    time.sleep(0.05)  # the writer thread is now stuck in write()
+    start = time.monotonic()
+    for n in range(100):
+        writer.send(f"<a:{n + 2}>")
+    assert time.monotonic() - start < 0.1
+    block.set()
+    assert wait_for(lambda: port.written[-1:] == ["<a:101>"])
+    writer.stop()
+
+    port = Port(fail=True)
+    writer = SerialWriter(port, min_interval=0, debounce=0, verbose=False).start()
+    writer.send("<a:1>")
+    assert wait_for(lambda: writer.errors == 1)
+    writer.send("<a:1>")  # not suppressed: it never reached the LCD
+    assert wait_for(lambda: writer.errors == 2)
+    writer.stop()
+    assert writer.sent == 0 and writer.dropped == 2
@@ -0,0 +1,87 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import TiledDetector, tile_grid
+from esp_cam.detector import Detections
+
+
+def coordinate_frame(width=320, height=240):
+    # Every pixel holds its own (x, y): a crop knows where it came from
+    y, x = np.mgrid[0:height, 0:width]
+    return np.dstack([x, y]).astype(np.int32)
+
+
+class SceneDetector:
+    """detect_batch for TiledDetector: reports every object of `objects`
+    ((x, y, w, h, confidence) in frame pixels) that lies entirely inside a
+    crop, in that crop's coordinates, and records the crops it saw."""
+
+    confThreshold = 0.5
+    nmsThreshold = 0.3
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.crops = []
+
+    def detect_batch(self, crops):
+        results = []
+        for crop in crops:
+            x0, y0 = (int(v) for v in crop[0, 0])
+            h, w = crop.shape[:2]
+            self.crops.append((x0, y0, w, h))
+            seen = [(x - x0, y - y0, bw, bh, c) for x, y, bw, bh, c in self.objects
+                    if x >= x0 and y >= y0 and x + bw <= x0 + w and y + bh <= y0 + h]
+            boxes = np.array([s[:4] for s in seen], np.int32).reshape(-1, 4)
+            results.append(Detections(boxes, np.full(len(seen), 39, np.int32),
+                                      np.array([s[4] for s in seen], np.float32), ['bottle'] * len(seen)))
+        return results
+
+
+def test_grid_covers_the_frame_with_overlap():
+    tiles = tile_grid(320, 240, 2, 2, overlap=0.2)
+    assert len(tiles) == 4
+    assert min(x for x, _, _, _ in tiles) == 0 and max(x + w for x, _, w, _ in tiles) == 320
+    assert min(y for _, y, _, _ in tiles) == 0 and max(y + h for _, y, _, h in tiles) == 240
+    (x0, _, w0, _), (x1, _, _, _) = tiles[:2]
+    assert x1 < x0 + w0  # neighbours overlap
+
+
+def test_boxes_are_shifted_back_to_frame_coordinates():
+    objects = [(20, 30, 10, 10, 0.9), (290, 200, 15, 20, 0.8)]  # one in each corner tile
+    detector = SceneDetector(objects)
+    detections = TiledDetector(detector, grid=(2, 2)).detect(coordinate_frame())
+    assert sorted(map(tuple, detections.boxes.tolist())) == [(20, 30, 10, 10), (290, 200, 15, 20)]
+    assert len(detector.crops) == 4
+
+
+def test_rois_are_clipped_to_the_frame():
+    # A config written for a bigger frame size: the ROI runs off a QVGA frame
+    detector = SceneDetector([])
+    tiled = TiledDetector(detector, rois=[(0, 0, 160, 120), (300, 200, 100, 100), (400, 300, 50, 50)])
+    tiled.detect(coordinate_frame())
+    assert detector.crops == [(0, 0, 160, 120), (300, 200, 20, 40), (319, 239, 1, 1)]
+
+
+def test_duplicates_in_the_overlap_are_merged():
+    # Inside both upper tiles' overlap: seen twice, reported once (best confidence)
+    tiles = tile_grid(320, 240, 2, 2, overlap=0.2)
+    overlap_x = tiles[1][0]
+    objects = [(overlap_x + 5, 20, 20, 20, 0.9)]
+    detections = TiledDetector(SceneDetector(objects), grid=(2, 2)).detect(coordinate_frame())
+    assert len(detections) == 1
+    assert tuple(detections.boxes[0]) == objects[0][:4]
+
+
+def test_full_frame_adds_the_whole_frame():
+    big = [(40, 40, 240, 160, 0.9)]  # fits no tile
+    detector = SceneDetector(big)
+    detections = TiledDetector(detector, grid=(2, 2), full_frame=True).detect(coordinate_frame())
+    assert detector.crops[-1] == (0, 0, 320, 240)
+    assert tuple(detections.boxes[0]) == big[0][:4]
+
+
+def test_nothing_detected():
+    detections = TiledDetector(SceneDetector([]), grid=(2, 2)).detect(coordinate_frame())
+    assert len(detections) == 0
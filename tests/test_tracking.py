@@ -0,0 +1,167 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import IouTracker
+from esp_cam.detector import Detections
+
+LABELS = {39: 'bottle', 41: 'cup'}
+
+
+def detections(objects, confidence=0.9):
+    # objects: (x, y, w, h, class_id)
+    boxes = np.array([o[:4] for o in objects], np.int32).reshape(-1, 4)
+    class_ids = np.array([o[4] for o in objects], np.int32)
+    return Detections(boxes, class_ids, np.full(len(objects), confidence, np.float32),
+                      [LABELS[c] for c in class_ids])
+
+
+class ScriptedDetector:
+    """detect(img) for the tracker: img is the frame number, script(frame)
+    says what is in view. Records which frames the detector ran on."""
+
+    def __init__(self, script, confidence=0.9):
+        self.script = script
+        self.confidence = confidence
+        self.calls = []
+
+    def __call__(self, frame):
+        self.calls.append(frame)
+        return detections(self.script(frame), self.confidence)
+
+
+def per_frame_counts(objects):
+    counts = {}
+    for o in objects:
+        counts[LABELS[o[4]]] = counts.get(LABELS[o[4]], 0) + 1
+    return counts
+
+
+def run(tracker, detect, frames):
+    # (frame, track ids, counts) for every frame
+    history = []
+    for frame in range(1, frames + 1):
+        tracker.step(frame, detect)
+        ids = sorted(t.id for t in tracker.confirmed())
+        history.append((frame, ids, dict(tracker.counts())))
+    return history
+
+
+def test_detector_runs_every_n_frames():
+    detect = ScriptedDetector(lambda f: [(100, 100, 50, 80, 39)])
+    tracker = IouTracker(detect_every=5)
+    run(tracker, detect, 20)
+    assert detect.calls == [1, 6, 11, 16]
+    assert tracker.detector_runs == 4
+    assert tracker.frames == 20
+
+
+def test_stationary_objects_keep_ids_and_counts():
+    objects = [(100, 100, 50, 80, 39), (300, 100, 50, 80, 39), (200, 300, 60, 60, 41)]
+    detect = ScriptedDetector(lambda f: objects)
+    tracker = IouTracker(detect_every=5, min_hits=2)
+    history = run(tracker, detect, 30)
+
+    # Confirmed on the second detector run (frame 6)
+    assert all(counts == {} for frame, _, counts in history if frame < 6)
+    for frame, ids, counts in history[5:]:
+        assert ids == [1, 2, 3]
+        assert counts == per_frame_counts(objects)
+    assert tracker.seen == {'bottle': 2, 'cup': 1}
+
+
+def test_moving_boxes_keep_ids_and_are_predicted_between_runs():
+    # Two bottles moving 4 px/frame in opposite directions, detector every 3 frames
+    def script(frame):
+        return [(100 + 4 * frame, 200, 50, 80, 39), (500 - 4 * frame, 50, 50, 80, 39)]
+
+    detect = ScriptedDetector(script)
+    tracker = IouTracker(detect_every=3, smoothing=0.5)
+    history = run(tracker, detect, 40)
+
+    assert detect.calls == list(range(1, 41, 3))
+    for frame, ids, counts in history[3:]:
+        assert ids == [1, 2]
+        assert counts == {'bottle': 2}
+    assert tracker.next_id == 3  # no track was ever lost and re-created
+
+    # Velocity has been learned: predicted boxes follow the objects between runs
+    tracker.step(41, detect)  # predicted only
+    predicted = {t.id: t.box for t in tracker.tracks}
+    truth = script(41)
+    assert predicted[1][0] == pytest.approx(truth[0][0], abs=2)
+    assert predicted[2][0] == pytest.approx(truth[1][0], abs=2)
+    velocities = sorted(float(t.velocity[0]) for t in tracker.tracks)
+    assert velocities == pytest.approx([-4, 4], abs=0.5)
+
+
+def test_box_missed_for_one_run_keeps_its_track():
+    present = [(100, 100, 50, 80, 39), (300, 100, 50, 80, 41)]
+
+    def script(frame):
+        # The cup is missed on the detector run at frame 16
+        return present[:1] if frame == 16 else present
+
+    detect = ScriptedDetector(script)
+    tracker = IouTracker(detect_every=5, max_misses=2)
+    history = {frame: (ids, counts) for frame, ids, counts in run(tracker, detect, 30)}
+
+    assert 16 in detect.calls
+    raw = per_frame_counts(script(16))
+    assert raw == {'bottle': 1}  # what a per-frame count would have shown
+    for frame in range(6, 31):
+        ids, counts = history[frame]
+        assert ids == [1, 2]
+        assert counts == {'bottle': 1, 'cup': 1}
+    assert tracker.seen == {'bottle': 1, 'cup': 1}
+
+
+def test_box_gone_for_good_is_dropped_after_max_misses():
+    def script(frame):
+        return [(100, 100, 50, 80, 39)] + ([(300, 100, 50, 80, 41)] if frame < 12 else [])
+
+    detect = ScriptedDetector(script)
+    tracker = IouTracker(detect_every=5, max_misses=2)
+    history = {frame: counts for frame, _, counts in run(tracker, detect, 30)}
+    # Detector runs at 11 (seen), 16 (miss 1), 21 (miss 2), 26 (miss 3: dropped)
+    assert history[25] == {'bottle': 1, 'cup': 1}
+    assert history[26] == {'bottle': 1}
+
+
+def test_class_swap_starts_a_new_track():
+    # Same box, but from frame 13 on the detector calls it a cup
+    def script(frame):
+        return [(100, 100, 50, 80, 39 if frame < 13 else 41)]
+
+    detect = ScriptedDetector(script)
+    tracker = IouTracker(detect_every=5, min_hits=2, max_misses=1)
+    history = {frame: (ids, counts) for frame, ids, counts in run(tracker, detect, 30)}
+
+    # Runs at 1, 6, 11 (bottle), 16, 21, 26 (cup)
+    assert detect.calls == [1, 6, 11, 16, 21, 26]
+    assert history[15] == ([1], {'bottle': 1})
+    # 16: cup not matched to the bottle track (other class), new track 2,
+    # not confirmed yet; the bottle has one miss and is still counted
+    assert history[16] == ([1], {'bottle': 1})
+    # 21: cup confirmed, bottle dropped after its second miss
+    assert history[21] == ([2], {'cup': 1})
+    assert tracker.seen == {'bottle': 1, 'cup': 1}
+
+
+def test_decaying_confidence_triggers_an_early_detection():
+    detect = ScriptedDetector(lambda f: [(100, 100, 50, 80, 39)], confidence=0.5)
+    tracker = IouTracker(detect_every=10, decay=0.8, min_confidence=0.3)
+    run(tracker, detect, 20)
+    # Confirmed at 11; predicted confidence 0.4, 0.32, then 0.256 < 0.3 on
+    # the third frame, which runs the detector instead of waiting for 21
+    assert detect.calls == [1, 11, 14, 17, 20]
+
+
+def test_tracked_detections_match_counts():
+    detect = ScriptedDetector(lambda f: [(10, 10, 40, 40, 39), (200, 10, 40, 40, 39), (400, 10, 40, 40, 41)])
+    tracker = IouTracker(detect_every=2)
+    for frame in range(1, 6):
+        result = tracker.step(frame, detect)
+    assert result.counts() == tracker.counts() == {'bottle': 2, 'cup': 1}
+    assert result.boxes.dtype == np.int32 and result.boxes.shape == (3, 4)
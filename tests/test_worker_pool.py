@@ -0,0 +1,95 @@
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('cv2')
+
+from esp_cam import InferencePool
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks')
+
+
+@pytest.fixture
+def pool(tmp_path):
+    # One worker on the tiny random-weight model
+    sys.path.insert(0, BENCHMARKS)
+    from bench_stages import write_tiny_darknet
+    cfg, weights, names = write_tiny_darknet(str(tmp_path), 160, np.random.default_rng(0))
+    pool = InferencePool(workers=1, slots=2, max_shape=(240, 320, 3), threads=1,
+                         modelConfig=cfg, modelWeights=weights, classesfile=names, whT=160).start()
+    yield pool
+    pool.stop()
+
+
+def frame():
+    return np.random.default_rng(1).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_detect(pool):
+    assert pool.detect(frame(), timeout=30).boxes.shape[1] == 4
+    assert pool.frames == 1
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGSTOP'), reason="needs SIGSTOP")
+def test_dead_worker_fails_its_jobs_and_is_replaced(pool):
+    old = pool.processes[0]
+    os.kill(old.pid, signal.SIGSTOP)  # frozen, so the job is still in flight when it dies
+    future = pool.submit(frame())
+    os.kill(old.pid, signal.SIGKILL)
+
+    with pytest.raises(RuntimeError, match="died"):
+        future.result(timeout=10)
+    assert pool.free.qsize() == pool.slots
+    assert pool.errors == 1 and pool.restarts == 1
+
+    # The respawned worker serves the next frames
+    assert pool.processes[0] is not old
+    for _ in range(pool.slots + 1):
+        pool.detect(frame(), timeout=60)
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGSTOP'), reason="needs SIGSTOP")
+def test_detect_times_out_while_a_hung_worker_holds_every_slot(pool):
+    worker = pool.processes[0]
+    os.kill(worker.pid, signal.SIGSTOP)  # hung, not dead
+    try:
+        held = [pool.submit(frame()) for _ in range(pool.slots)]
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            pool.detect(frame(), timeout=0.5)
+        assert time.monotonic() - start < 5
+        assert not any(f.done() for f in held)
+    finally:
+        os.kill(worker.pid, signal.SIGCONT)
+    for future in held:
+        future.result(timeout=30)
+
+
+def test_no_workers_left(pool):
+    pool.respawn = False
+    pool.processes[0].kill()
+    wait_for(lambda: not pool.alive)
+    with pytest.raises(RuntimeError, match="No inference workers"):
+        pool.submit(frame())
+    assert pool.free.qsize() == pool.slots
+
+
+def test_stop(pool):
+    futures = [pool.submit(frame()) for _ in range(pool.slots)]
+    pool.stop()
+    for future in futures:
+        # Answered before the worker exited, or failed: never left hanging
+        assert future.exception(timeout=1) is None or "stopped" in str(future.exception())
+    with pytest.raises(RuntimeError, match="stopped"):
+        pool.submit(frame())